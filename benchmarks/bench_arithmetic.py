@@ -0,0 +1,52 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of arithmetic between Triangles of monthly data with the same and
+with different origin and development axes, and of the peak memory of a
+chain of arithmetic on columns with operators, in-place operators and eval.
+
+Usage: python benchmarks/bench_arithmetic.py [n_keys] [n_years] [n_repeats]
+"""
+import sys
+import time
+import warnings
+from bench_grain import monthly_triangle, profile
+
+
+def main(n_keys=1000, n_years=3, n_repeats=20):
+    warnings.simplefilter('ignore')
+    tri = monthly_triangle(n_keys, n_years)
+    early = tri[tri.development <= 12]
+    late = tri[tri.origin >= tri.origin[len(tri.origin) // 2]]
+    print('Shape: {}'.format(tri.shape))
+    for label, func in [
+            ('aligned +', lambda: tri + tri),
+            ('aligned *', lambda: tri * 2),
+            ('misaligned +', lambda: early + late),
+            ('misaligned /', lambda: early / late)]:
+        func()
+        start = time.time()
+        for _ in range(n_repeats):
+            func()
+        print('{:<14} {:>8.4f}s'.format(
+            label, (time.time() - start) / n_repeats))
+    tri['case'] = tri['paid'] * 0.5
+    tri['olf'] = tri['paid'] * 0 + 1.05
+    tri['exposure'] = tri['paid'] * 0 + 1000.
+
+    def inplace(tri):
+        result = tri['paid']
+        result += tri['case']
+        result *= tri['olf']
+        result /= tri['exposure']
+        return result
+
+    profile('operators', lambda: (
+        tri['paid'] + tri['case']) * tri['olf'] / tri['exposure'])
+    profile('in-place', inplace, tri)
+    profile('eval', tri.eval, '(paid + case) * olf / exposure')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,39 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of BootstrapODPSample on the clrd paid triangles of many companies
+fit at once and one company at a time.
+
+Usage: python benchmarks/bench_bootstrap.py [n_keys] [n_sims]
+"""
+import sys
+import time
+import warnings
+import numpy as np
+import chainladder as cl
+
+
+def main(n_keys=100, n_sims=1000):
+    warnings.simplefilter('ignore')
+    clrd = cl.load_dataset('clrd')['CumPaidLoss']
+    # Companies with positive incremental losses in every cell
+    upper = ~np.isnan(clrd._nan_triangle())
+    clrd = clrd.iloc[np.all(clrd.cum_to_incr().values[..., upper] > 0, (1, 2))]
+    clrd = clrd.iloc[:n_keys]
+    print('Shape: {}'.format(clrd.shape))
+    start = time.time()
+    # Simulations are drawn on first access of resampled_triangles_
+    cl.BootstrapODPSample(
+        n_sims=n_sims, random_state=42).fit(clrd).resampled_triangles_
+    print('{:<12} {:>8.2f}s'.format('all', time.time() - start))
+    start = time.time()
+    for num in range(clrd.shape[0]):
+        cl.BootstrapODPSample(
+            n_sims=n_sims, random_state=42).fit(
+                clrd.iloc[num]).resampled_triangles_
+    print('{:<12} {:>8.2f}s'.format('one by one', time.time() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,49 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of the BootstrapODPSample hat matrix adjustment as the triangle
+grows from yearly to monthly grain.  The closed form only solves X'WX with
+one row per parameter.  For comparison, the full n_obs x n_obs hat matrix is
+formed from the dense design matrix while it has at most max_dense rows.
+
+Usage: python benchmarks/bench_bootstrap_hat.py [n_years] [max_dense]
+"""
+import sys
+import warnings
+import numpy as np
+import chainladder as cl
+from bench_grain import monthly_triangle, profile
+
+
+def dense_hat(bs, X, exp_incr_triangle):
+    ''' Diagonal of the full hat matrix of the first triangle '''
+    design = bs._get_design_matrix(X).toarray()
+    w = exp_incr_triangle[0, 0].T
+    w = np.diag(w[~np.isnan(X._nan_triangle().T)])
+    hat = design.dot(np.linalg.inv(design.T.dot(w).dot(design))) \
+                .dot(design.T).dot(w)
+    return np.diagonal(hat)
+
+
+def main(n_years=10, max_dense=2000):
+    warnings.simplefilter('ignore')
+    tri = monthly_triangle(1, n_years)
+    for grain in ['OYDY', 'OQDQ', 'OMDM']:
+        X = tri.grain(grain) if grain != 'OMDM' else tri
+        bs = cl.BootstrapODPSample(n_sims=1).fit(X)
+        exp = np.nan_to_num(X.cum_to_incr().values) * X._nan_triangle()
+        n_obs = int(np.nansum(X._nan_triangle()))
+        print('{} {} cells'.format(grain, n_obs))
+        profile('design', bs._get_design_matrix, X)
+        hat = profile('closed form', bs._get_hat, X, exp)
+        if n_obs <= max_dense:
+            dense = profile('dense', dense_hat, bs, X, exp)
+            dense = np.sqrt(1 / abs(1 - dense))
+            closed = hat[0, 0].T[~np.isnan(X._nan_triangle().T)]
+            upper = closed != 0
+            np.testing.assert_allclose(closed[upper], dense[upper])
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
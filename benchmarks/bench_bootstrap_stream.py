@@ -0,0 +1,56 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of the Chainladder IBNR distribution of a bootstrapped raa triangle
+fit on all simulations at once and reduced in blocks of simulations, and of
+the reserve distribution with process risk reduced in blocks serially and
+with n_jobs blocks in parallel.
+
+Usage:
+    python benchmarks/bench_bootstrap_stream.py [n_sims] [block_size] [n_jobs]
+"""
+import sys
+import warnings
+import numpy as np
+import chainladder as cl
+from bench_grain import profile
+
+
+def materialized(bs):
+    ibnr = cl.Chainladder().fit(bs.resampled_triangles_).ibnr_.sum('origin')
+    return np.mean(ibnr.values), np.percentile(ibnr.values, 99.5)
+
+
+def streamed(bs, block_size):
+    summary = cl.SimulationSummary()
+    for block in bs.iter_resampled(block_size):
+        summary.update(cl.Chainladder().fit(block).ibnr_.sum('origin'))
+    return (summary.mean_.values[0, 0, 0, 0],
+            summary.quantile(.995).values[0, 0, 0, 0])
+
+
+def reserves(bs, block_size):
+    summary = cl.SimulationSummary()
+    for block in bs.iter_reserves(block_size):
+        summary.update(block.sum('origin'))
+    return (summary.mean_.values[0, 0, 0, 0],
+            summary.quantile(.995).values[0, 0, 0, 0])
+
+
+def main(n_sims=100000, block_size=10000, n_jobs=-1):
+    warnings.simplefilter('ignore')
+    raa = cl.load_dataset('raa')
+    for label, func, args, jobs in [
+            ('all', materialized, (), None),
+            ('blocks', streamed, (block_size,), None),
+            ('reserves', reserves, (block_size,), None),
+            ('n_jobs={}'.format(n_jobs), reserves, (block_size,), n_jobs)]:
+        bs = cl.BootstrapODPSample(n_sims=n_sims, random_state=42,
+                                   n_jobs=jobs).fit(raa)
+        mean, tail = profile(label, func, bs, *args)
+        print('{:<12} mean {:,.0f} 99.5% {:,.0f}'.format('', mean, tail))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,60 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of Development.fit on many companies, fit all at once and in
+chunks of the index.
+
+Usage: python benchmarks/bench_development_chunks.py [n_keys] [chunk_size]
+"""
+import sys
+import time
+import tracemalloc
+import warnings
+import numpy as np
+import chainladder as cl
+
+
+def many_companies(n_keys, seed=42):
+    ''' clrd paid losses resampled with noise to n_keys companies '''
+    clrd = cl.load_dataset('clrd')['CumPaidLoss']
+    rng = np.random.RandomState(seed)
+    idx = rng.randint(0, clrd.shape[0], n_keys)
+    tri = clrd.copy()
+    tri.values = clrd.values[idx] * rng.lognormal(0, .1, (n_keys, 1, 1, 1))
+    tri.kdims = np.array([['key {}'.format(num), 'all']
+                          for num in range(n_keys)])
+    return tri
+
+
+def profile(label, func, *args, **kwargs):
+    ''' Runs func and reports its peak traced memory and wall time '''
+    tracemalloc.start()
+    start = time.time()
+    result = func(*args, **kwargs)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print('{:<24} peak {:>8.1f} MB {:>8.2f}s'.format(
+        label, peak / 2**20, elapsed))
+    return result
+
+
+def main(n_keys=20000, chunk_size=1000):
+    warnings.simplefilter('ignore')
+    tri = many_companies(n_keys)
+    print('Shape: {}, values {:.1f} MB'.format(
+        tri.shape, tri.values.nbytes / 2**20))
+    kwargs = dict(n_periods=5, drop_high=True)
+    dev = profile('all at once', cl.Development(**kwargs).fit, tri)
+    chunked = profile('chunk_size={}'.format(chunk_size), cl.Development(
+        chunk_size=chunk_size, **kwargs).fit, tri)
+    threaded = profile('chunk_size={}, n_jobs=4'.format(chunk_size),
+                       cl.Development(chunk_size=chunk_size, n_jobs=4,
+                                      **kwargs).fit, tri)
+    for item in [chunked, threaded]:
+        np.testing.assert_equal(dev.ldf_.values, item.ldf_.values)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
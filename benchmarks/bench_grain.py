@@ -0,0 +1,65 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of Triangle.grain on 30 years of monthly origin/monthly development
+data (OMDM) for many index keys.
+
+Usage: python benchmarks/bench_grain.py [n_keys] [n_years]
+"""
+import sys
+import time
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+import chainladder as cl
+
+
+def monthly_triangle(n_keys, n_years, seed=42):
+    ''' Cumulative OMDM Triangle with n_keys of random losses '''
+    n = n_years * 12
+    origin, lag = [item.flatten() for item in np.mgrid[:n, :n]]
+    origin, lag = origin[origin + lag < n], lag[origin + lag < n]
+    start = np.datetime64('1990-01', 'M')
+    df = pd.DataFrame({
+        'origin': (start + origin).astype('datetime64[ns]'),
+        'development': (start + origin + lag).astype('datetime64[ns]'),
+        'paid': 1.})
+    tri = cl.Triangle(df, origin='origin', development='development',
+                      columns='paid', cumulative=False)
+    rng = np.random.RandomState(seed)
+    values = rng.lognormal(3, 1, (n_keys, 1, n, n))
+    tri.values = np.cumsum(values * tri._nan_triangle(), axis=3)
+    tri.kdims = np.array([['key {}'.format(num)] for num in range(n_keys)])
+    tri.is_cumulative = True
+    return tri
+
+
+def profile(label, func, *args, **kwargs):
+    ''' Runs func and reports its peak traced memory and wall time '''
+    tracemalloc.start()
+    start = time.time()
+    result = func(*args, **kwargs)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print('{:<12} peak {:>8.1f} MB {:>8.2f}s'.format(
+        label, peak / 2**20, elapsed))
+    return result
+
+
+def main(n_keys=1000, n_years=30):
+    warnings.simplefilter('ignore')
+    tri = monthly_triangle(n_keys, n_years)
+    print('Shape: {}, values {:.1f} MB'.format(
+        tri.shape, tri.values.nbytes / 2**20))
+    for grain in ['OQDQ', 'OYDQ', 'OYDY']:
+        result = profile(grain, tri.grain, grain)
+        np.testing.assert_allclose(
+            np.nansum(result.latest_diagonal.values),
+            np.nansum(tri.latest_diagonal.values))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,43 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of GridSearch over a reserving Pipeline fit serially and in
+parallel.  Candidates that share their Development parameters reuse its
+fitted transform, which is reported as cache hits.
+
+Usage: python benchmarks/bench_gridsearch.py [n_jobs]
+"""
+import sys
+import time
+import warnings
+import chainladder as cl
+
+
+def search(n_jobs=None):
+    ''' Searches development, tail and method parameters on clrd '''
+    clrd = cl.load_dataset('clrd')['CumPaidLoss'].groupby('LOB').sum()
+    pipe = cl.Pipeline([('dev', cl.Development()), ('tail', cl.TailCurve()),
+                        ('model', cl.Chainladder())])
+    param_grid = dict(dev__n_periods=[3, 5, 7, -1],
+                      dev__average=['volume', 'simple', 'regression'],
+                      tail__curve=['exponential', 'inverse_power'],
+                      tail__extrap_periods=[50, 100])
+    scoring = {'IBNR': lambda x: x.named_steps.model.ibnr_.sum().sum()}
+    return cl.GridSearch(pipe, param_grid, scoring=scoring,
+                         n_jobs=n_jobs).fit(clrd)
+
+
+def main(n_jobs=-1):
+    warnings.simplefilter('ignore')
+    for label, jobs in [('serial', None), ('n_jobs={}'.format(n_jobs),
+                                           n_jobs)]:
+        start = time.time()
+        grid = search(jobs)
+        print('{:<12} {} candidates {:>8.2f}s, {} cache hits'.format(
+            label, len(grid.results_), time.time() - start,
+            grid.results_['cache_hits'].sum()))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,29 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of the peak memory and time of groupby aggregations of a Triangle
+of quarterly data for many index keys grouped into segments.
+
+Usage: python benchmarks/bench_groupby.py [n_keys] [n_groups]
+"""
+import sys
+import warnings
+import numpy as np
+from bench_grain import monthly_triangle, profile
+
+
+def main(n_keys=20000, n_groups=300):
+    warnings.simplefilter('ignore')
+    tri = monthly_triangle(n_keys, 3).grain('OQDQ')
+    tri.kdims = np.array([['segment {}'.format(num % n_groups),
+                           'key {}'.format(num)] for num in range(n_keys)])
+    tri.key_labels = ['segment', 'key']
+    print('Shape: {}'.format(tri.shape))
+    for label in ['sum', 'mean', 'max', 'std', 'median']:
+        profile(label, lambda: getattr(tri.groupby('segment'), label)())
+    profile('quantile', lambda: tri.groupby('segment').quantile(0.75))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,34 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of MackChainladder on the paid and incurred triangles of every
+clrd company fit at once and one company at a time.
+
+Usage: python benchmarks/bench_mack.py [n_keys]
+"""
+import sys
+import time
+import warnings
+import chainladder as cl
+
+
+def main(n_keys=None):
+    warnings.simplefilter('ignore')
+    clrd = cl.load_dataset('clrd')[['CumPaidLoss', 'IncurLoss']]
+    clrd = clrd.iloc[:n_keys]
+    print('Shape: {}'.format(clrd.shape))
+    start = time.time()
+    mack = cl.MackChainladder().fit(cl.Development().fit_transform(clrd))
+    mack.mack_std_err_
+    print('{:<12} {:>8.2f}s'.format('all', time.time() - start))
+    start = time.time()
+    for num in range(clrd.shape[0]):
+        mack = cl.MackChainladder().fit(
+            cl.Development().fit_transform(clrd.iloc[num]))
+        mack.mack_std_err_
+    print('{:<12} {:>8.2f}s'.format('one by one', time.time() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
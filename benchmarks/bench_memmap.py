@@ -0,0 +1,41 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of the index sum, groupby sum, latest diagonal and Development fit
+of a Triangle of monthly data for many index keys held in memory and memory
+mapped from disk.
+
+The memory mapped triangle is read in chunks of a tenth of its index.
+
+Usage: python benchmarks/bench_memmap.py [n_keys] [n_years]
+"""
+import os
+import sys
+import tempfile
+import warnings
+import numpy as np
+import chainladder as cl
+from bench_grain import monthly_triangle, profile
+
+
+def main(n_keys=200, n_years=10):
+    warnings.simplefilter('ignore')
+    tri = monthly_triangle(n_keys, n_years)
+    tri.kdims = np.array([['group {}'.format(num % 10), 'key {}'.format(num)]
+                          for num in range(n_keys)])
+    tri.key_labels = ['group', 'key']
+    print('Shape: {}'.format(tri.shape))
+    path = os.path.join(tempfile.mkdtemp(), 'values.npy')
+    memmap = tri.to_memmap(path, chunk_size=max(1, n_keys // 10))
+    for label, func in [
+            ('sum', lambda x: x.sum()),
+            ('groupby', lambda x: x.groupby('group').sum()),
+            ('diagonal', lambda x: x.latest_diagonal),
+            ('development', lambda x: cl.Development().fit(x))]:
+        profile(label, func, tri)
+        profile('', func, memmap)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,37 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of MunichAdjustment on the paid and incurred triangles of every
+clrd company fit at once and one company at a time.
+
+Usage: python benchmarks/bench_munich.py [n_keys]
+"""
+import sys
+import time
+import warnings
+import chainladder as cl
+
+
+def main(n_keys=None):
+    warnings.simplefilter('ignore')
+    clrd = cl.load_dataset('clrd')[['CumPaidLoss', 'IncurLoss']]
+    clrd = clrd.iloc[:n_keys]
+    paid_to_incurred = {'CumPaidLoss': 'IncurLoss'}
+    print('Shape: {}'.format(clrd.shape))
+    start = time.time()
+    cl.MunichAdjustment(paid_to_incurred).fit(clrd).ldf_
+    print('{:<12} {:>8.2f}s'.format('all', time.time() - start))
+    start = time.time()
+    failed = 0
+    for num in range(clrd.shape[0]):
+        try:
+            cl.MunichAdjustment(paid_to_incurred).fit(clrd.iloc[num]).ldf_
+        except ValueError:
+            failed += 1
+    print('{:<12} {:>8.2f}s, {} failed'.format(
+        'one by one', time.time() - start, failed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,39 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of the memory allocated by each step of a
+Development -> TailCurve -> Chainladder pipeline fit on the clrd dataset.
+
+Usage: python benchmarks/bench_pipeline_memory.py
+"""
+import time
+import tracemalloc
+import warnings
+import chainladder as cl
+
+
+def profile(label, func, *args, **kwargs):
+    ''' Runs func and reports its peak traced memory and wall time '''
+    tracemalloc.start()
+    start = time.time()
+    result = func(*args, **kwargs)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print('{:<12} peak {:>8.1f} MB {:>8.2f}s'.format(
+        label, peak / 2**20, elapsed))
+    return result
+
+
+def main():
+    warnings.simplefilter('ignore')
+    clrd = cl.load_dataset('clrd')
+    print('Triangle values: {:.1f} MB'.format(clrd.values.nbytes / 2**20))
+    dev = profile('Development', cl.Development().fit_transform, clrd)
+    tail = profile('TailCurve', cl.TailCurve().fit_transform, dev)
+    profile('Chainladder', cl.Chainladder().fit, tail)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of iloc, loc, column selection and column assignment of a
+Triangle of monthly data for many index keys.
+
+Usage: python benchmarks/bench_slice.py [n_keys] [n_years] [n_repeats]
+"""
+import sys
+import time
+import warnings
+from bench_grain import monthly_triangle
+
+
+def main(n_keys=5000, n_years=3, n_repeats=20):
+    warnings.simplefilter('ignore')
+    tri = monthly_triangle(n_keys, n_years)
+    tri['incurred'] = tri['paid'] * 2
+    print('Shape: {}'.format(tri.shape))
+    for label, func in [
+            ('iloc', lambda: tri.iloc[n_keys // 2]),
+            ('loc', lambda: tri.loc['key {}'.format(n_keys // 2)]),
+            ('iloc rows', lambda: tri.iloc[:100, 1]),
+            ('column', lambda: tri['paid']),
+            ('columns', lambda: tri[['incurred', 'paid']]),
+            ('set columns', lambda: tri.copy(deep=False).__setitem__(
+                ['reported', 'paid'], tri))]:
+        func()
+        start = time.time()
+        for _ in range(n_repeats):
+            func()
+        print('{:<12} {:>8.4f}s'.format(
+            label, (time.time() - start) / n_repeats))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
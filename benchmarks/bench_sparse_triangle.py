@@ -0,0 +1,67 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of dense and sparse Triangle storage on synthetic policy level data
+where each policy has a handful of annual valuations of a single origin.
+
+Usage: python benchmarks/bench_sparse_triangle.py [n_policies]
+"""
+import sys
+import time
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+import chainladder as cl
+
+
+def policy_data(n_policies, n_years=10, seed=42):
+    ''' Cumulative paid losses of n_policies with up to four valuations '''
+    rng = np.random.RandomState(seed)
+    policy = np.repeat(np.arange(n_policies), 4)
+    origin = np.repeat(rng.randint(0, n_years, n_policies), 4)
+    lag = np.tile(np.arange(4), n_policies)
+    paid = np.cumsum(rng.lognormal(7, 1, len(policy)).reshape(-1, 4), 1)
+    df = pd.DataFrame({
+        'policy': policy, 'segment': policy % 20,
+        'origin': 1990 + origin, 'development': 1990 + origin + lag,
+        'paid': paid.flatten()})
+    return df[df['development'] < 1990 + n_years]
+
+
+def profile(label, func, *args, **kwargs):
+    ''' Runs func and reports its peak traced memory and wall time '''
+    tracemalloc.start()
+    start = time.time()
+    result = func(*args, **kwargs)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print('{:<24} peak {:>8.1f} MB {:>8.2f}s'.format(
+        label, peak / 2**20, elapsed))
+    return result
+
+
+def workflow(df, array_backend):
+    ''' Builds the policy triangle and summarizes it by segment '''
+    tri = cl.Triangle(df, origin='origin', development='development',
+                      index=['segment', 'policy'], columns='paid',
+                      cumulative=True, array_backend=array_backend)
+    tri.latest_diagonal.sum()
+    tri.cum_to_incr().groupby('segment').sum()
+    return tri.groupby('segment').sum().grain('OYDY').to_dense()
+
+
+def main(n_policies=50000):
+    warnings.simplefilter('ignore')
+    df = policy_data(n_policies)
+    print('Records: {:,}'.format(len(df)))
+    dense = profile('numpy', workflow, df, 'numpy')
+    sparse = profile('sparse', workflow, df, 'sparse')
+    np.testing.assert_allclose(np.nan_to_num(dense.values),
+                               np.nan_to_num(sparse.values))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,76 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of Triangle construction on the clrd dataset replicated many times
+over with distinct index keys.  The scatter based constructor is compared to
+the pivot_table based approach it replaced.
+
+Usage: python benchmarks/bench_triangle_init.py [n_copies]
+"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import chainladder as cl
+
+DATA = os.path.join(os.path.dirname(cl.__file__), 'utils', 'data', 'clrd.csv')
+INDEX = ['GRNAME', 'LOB']
+COLUMNS = ['IncurLoss', 'CumPaidLoss', 'BulkLoss', 'EarnedPremDIR',
+           'EarnedPremCeded', 'EarnedPremNet']
+
+
+def scaled_clrd(n_copies):
+    ''' clrd stacked n_copies times, each copy with its own company names '''
+    df = pd.read_csv(DATA)
+    copies = []
+    for num in range(n_copies):
+        copy = df.copy()
+        copy['GRNAME'] = copy['GRNAME'] + ' ' + str(num)
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def pivot_values(df):
+    ''' The groupby/cross join/pivot_table construction of the 4D values '''
+    origin = pd.to_datetime(df['AccidentYear'].astype(str), format='%Y')
+    development = pd.to_datetime(df['DevelopmentYear'].astype(str),
+                                 format='%Y')
+    df = df.assign(origin=origin, development=development.dt.year -
+                   origin.dt.year + 1)
+    data_agg = df.groupby(['origin', 'development'] + INDEX)[COLUMNS] \
+                 .sum().reset_index()
+    axes = data_agg[['origin', 'development']].drop_duplicates()
+    kdims = data_agg[INDEX].drop_duplicates()
+    axes['key'] = kdims['key'] = 1
+    axes = pd.merge(axes, kdims, on='key').drop('key', axis=1)
+    data_agg = axes.merge(data_agg, how='left').fillna(0)
+    data_agg = pd.pivot_table(data_agg, index=INDEX + ['origin'],
+                              columns='development', values=COLUMNS,
+                              aggfunc='sum')
+    k = len(data_agg.index.droplevel(-1).unique())
+    o = len(data_agg.index.levels[-1])
+    d = len(data_agg.columns.levels[-1])
+    values = np.swapaxes(np.reshape(
+        np.array(data_agg), (k, o, len(COLUMNS), d)), 1, 2)
+    values[values == 0] = np.nan
+    return values
+
+
+def main(n_copies=100):
+    df = scaled_clrd(n_copies)
+    print('Records: {:,}'.format(len(df)))
+    start = time.time()
+    expected = pivot_values(df)
+    print('pivot_table: {:.2f}s'.format(time.time() - start))
+    start = time.time()
+    tri = cl.Triangle(df, origin='AccidentYear', development='DevelopmentYear',
+                      index=INDEX, columns=COLUMNS)
+    print('Triangle:    {:.2f}s'.format(time.time() - start))
+    print('Shape:      ', tri.shape)
+    np.testing.assert_allclose(tri.values, expected)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,45 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of a Triangle of monthly data for many index keys written and read
+back as json, as npz and as npz with memory mapped values.
+
+Usage: python benchmarks/bench_triangle_io.py [n_keys] [n_years]
+"""
+import os
+import sys
+import tempfile
+import warnings
+import chainladder as cl
+from bench_grain import monthly_triangle, profile
+
+
+def json_io(tri, path):
+    with open(path, 'w') as f:
+        f.write(tri.to_json())
+    with open(path) as f:
+        return cl.read_json(f.read())
+
+
+def npz_io(tri, path, mmap_mode=None):
+    tri.to_npz(path)
+    return cl.read_npz(path, mmap_mode=mmap_mode)
+
+
+def main(n_keys=50, n_years=10):
+    warnings.simplefilter('ignore')
+    tri = monthly_triangle(n_keys, n_years)
+    print('Shape: {}'.format(tri.shape))
+    folder = tempfile.mkdtemp()
+    for label, func, args in [
+            ('json', json_io, (os.path.join(folder, 'tri.json'),)),
+            ('npz', npz_io, (os.path.join(folder, 'tri.npz'),)),
+            ('npz mmap', npz_io, (os.path.join(folder, 'tri.npz'), 'r'))]:
+        profile(label, func, tri, *args)
+        print('{:<12} {:>8.1f}MB'.format(
+            '', os.path.getsize(args[0]) / 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,28 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of the development lag/valuation round trip on monthly origin/monthly
+development data (OMDM).
+
+Usage: python benchmarks/bench_val_dev.py [n_keys] [n_years]
+"""
+import sys
+import warnings
+import numpy as np
+from bench_grain import monthly_triangle, profile
+
+
+def main(n_keys=10, n_years=30):
+    warnings.simplefilter('ignore')
+    tri = monthly_triangle(n_keys, n_years)
+    print('Shape: {}, values {:.1f} MB'.format(
+        tri.shape, tri.values.nbytes / 2**20))
+    val = profile('dev_to_val', tri.dev_to_val)
+    dev = profile('val_to_dev', val.val_to_dev)
+    np.testing.assert_allclose(np.nan_to_num(dev.values),
+                               np.nan_to_num(tri.values))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
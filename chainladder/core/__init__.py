@@ -2,3 +2,4 @@
 """
 from chainladder.core.triangle import Triangle # noqa (API import)
 from chainladder.core.io import EstimatorIO # noqa (API import)
+from chainladder.core.cache import EstimatorCache # noqa (API import)
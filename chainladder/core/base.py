@@ -3,78 +3,132 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 import pandas as pd
 import numpy as np
+import copy
+import weakref
+from collections import OrderedDict
 
 from chainladder.core.display import TriangleDisplay
 from chainladder.core.dunders import TriangleDunders
 from chainladder.core.pandas import TrianglePandas
 from chainladder.core.slice import TriangleSlicer
 from chainladder.core.io import TriangleIO
+from chainladder.core.sparse import TriangleSparse
+from chainladder.core.memmap import TriangleMemmap
 
 
 class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
-                   TriangleDunders, TrianglePandas):
+                   TriangleDunders, TrianglePandas, TriangleSparse,
+                   TriangleMemmap):
     ''' This class handles the initialization of a triangle '''
 
     def __init__(self, data=None, origin=None, development=None,
                  columns=None, index=None, origin_format=None,
-                 development_format=None, cumulative=None, *args, **kwargs):
+                 development_format=None, cumulative=None,
+                 array_backend='numpy', *args, **kwargs):
         if data is None:
             ' Instance with nothing set'
             return
         # Sanitize inputs
         index, columns, origin, development = self._str_to_list(
             index, columns, origin, development)
-        key_gr = origin + self._flatten(development, index)
-        # Aggregate data
-        data_agg = data.groupby(key_gr).sum().reset_index()
-        if not index:
+        # Encode each axis as integer codes into its distinct values
+        origin_code, origin_key = TriangleBase._factorize(data, origin)
+        if index:
+            index_code, index_key = TriangleBase._factorize(data, index)
+        else:
             index = ['Total']
-            data_agg[index[0]] = 'Total'
+            index_code = np.zeros(len(data), dtype='int64')
+            index_key = pd.DataFrame({'Total': ['Total']})
+        if development:
+            development_code, development_key = \
+                TriangleBase._factorize(data, development)
+        else:
+            development_code = origin_code
+        # Rows with missing keys are dropped, consistent with groupby
+        keep = (origin_code >= 0) & (index_code >= 0) & \
+               (development_code >= 0)
+        origin_code, index_code, development_code = \
+            origin_code[keep], index_code[keep], development_code[keep]
         # Initialize origin and development dates and grains
-        origin_date = TriangleBase._to_datetime(
-            data_agg, origin, format=origin_format)
+        origin_date, self.origin_format = TriangleBase._to_datetime(
+            origin_key, origin, format=origin_format)
         self.origin_grain = TriangleBase._get_grain(origin_date)
         m_cnt = {'Y': 12, 'Q': 3, 'M': 1}
         if development:
-            development_date = TriangleBase._to_datetime(
-                data_agg, development, period_end=True,
-                format=development_format)
+            development_date, self.development_format = \
+                TriangleBase._to_datetime(
+                    development_key, development, period_end=True,
+                    format=development_format)
             self.development_grain = TriangleBase._get_grain(development_date)
-            col = 'development'
         else:
             development_date = origin_date + \
                 pd.tseries.offsets.MonthEnd(m_cnt[self.origin_grain])
             self.development_grain = self.origin_grain
-            col = None
-        # Prep the data for 4D Triangle
-        data_agg = self._get_axes(data_agg, index, columns,
-                                  origin_date, development_date)
-        data_agg = pd.pivot_table(data_agg, index=index+['origin'],
-                                  columns=col, values=columns,
-                                  aggfunc='sum')
-        # Assign object properties
-        self.kdims = np.array(np.array(data_agg.index.droplevel(-1).unique()).tolist())
-        self.odims = np.array(data_agg.index.levels[-1].unique())
+            self.development_format = None
+        # Locate each record on the origin and development axes
+        used_origin = np.unique(origin_code)
+        origin_period = TriangleBase._period_number(
+            origin_date, self.origin_grain)
+        origin_idx = origin_period[origin_code] - \
+            origin_period[used_origin].min()
+        used_origin = origin_date.values[used_origin]
+        used_development = development_date.values[
+            np.unique(development_code)]
         if development:
-            self.ddims = np.array(data_agg.columns.levels[-1].unique())
-            self.ddims = self.ddims*(m_cnt
-                                     [self.development_grain])
-            self.vdims = np.array(data_agg.columns.levels[0].unique())
+            origin_period = TriangleBase._period_number(
+                origin_date, self.development_grain)
+            development_period = TriangleBase._period_number(
+                development_date, self.development_grain)
+            development_idx = development_period[development_code] - \
+                origin_period[origin_code]
+            n_lags = TriangleBase._period_number(
+                pd.Series(used_development.max()), self.development_grain) - \
+                TriangleBase._period_number(
+                    pd.Series(used_origin.min()), self.development_grain)
+            self.ddims = np.arange(1, n_lags[0] + 2) * \
+                m_cnt[self.development_grain]
         else:
+            development_idx = np.zeros(len(origin_idx), dtype='int64')
             self.ddims = np.array([None])
-            self.vdims = np.array(data_agg.columns.unique())
-        self.valuation_date = development_date.max()
+        self.odims = pd.period_range(
+            start=used_origin.min(), end=used_origin.max(),
+            freq=self.origin_grain).to_timestamp().values
+        self.kdims = np.array(np.array(
+            index_key.set_index(index).index).tolist())
+        self.vdims = np.array(sorted(columns))
+        self.valuation_date = pd.Timestamp(used_development.max())
         self.key_labels = index
         self._set_slicers()
-        # Create 4D Triangle
-        triangle = \
-            np.reshape(np.array(data_agg), (len(self.kdims), len(self.odims),
-                       len(self.vdims), len(self.ddims)))
-        triangle = np.swapaxes(triangle, 1, 2)
-        # Set all 0s to NAN for nansafe ufunc arithmetic
-        triangle[triangle == 0] = np.nan
-
-        self.values = np.array(triangle, dtype=kwargs.get('dtype', None))
+        # Development periods prior to the origin period are excluded
+        keep[keep] = development_idx >= 0
+        index_code = index_code[development_idx >= 0]
+        cell = (origin_idx*len(self.ddims) +
+                development_idx)[development_idx >= 0]
+        n_cells = len(self.odims)*len(self.ddims)
+        weights = [np.nan_to_num(data[item].values[keep].astype('float64'))
+                   for item in self.vdims]
+        shape = (len(self.kdims), len(self.vdims),
+                 len(self.odims), len(self.ddims))
+        if array_backend == 'sparse':
+            # Only populated cells are stored, one row per index key
+            self._set_sparse_coords(
+                (np.tile(index_code, len(weights)),
+                 np.repeat(np.arange(len(weights)), len(cell)),
+                 *np.unravel_index(np.tile(cell, len(weights)), shape[2:])),
+                np.concatenate(weights), shape)
+            if kwargs.get('dtype', None) is not None:
+                self._sparse = self._sparse.astype(kwargs['dtype'])
+        else:
+            # Create 4D Triangle by summing each record into its cell
+            cell = index_code*n_cells + cell
+            triangle = np.empty(shape)
+            for num, item in enumerate(weights):
+                triangle[:, num] = np.reshape(np.bincount(
+                    cell, weights=item, minlength=triangle[:, num].size),
+                    triangle[:, num].shape)
+            # Set all 0s to NAN for nansafe ufunc arithmetic
+            triangle[triangle == 0] = np.nan
+            self.values = np.array(triangle, dtype=kwargs.get('dtype', None))
         # Used to show NANs in lower part of triangle
         self.nan_override = False
         self.valuation = self._valuation_triangle()
@@ -87,118 +141,174 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
                 '{} elements, new values have'.format(len(x)),
                 ' {} elements'.format(len(y)))
 
-    def _get_date_axes(self, origin_date, development_date):
-        ''' Function to find any missing origin dates or development dates that
-            would otherwise mess up the origin/development dimensions.
-        '''
-        def complete_date_range(origin_date, development_date,
-                                origin_grain, development_grain):
-            ''' Determines origin/development combinations in full.  Useful for
-                when the triangle has holes in it. '''
-            origin_unique = pd.period_range(
-                start=origin_date.min(),
-                end=origin_date.max(),
-                freq=origin_grain).to_timestamp()
-            development_unique = pd.period_range(
-                start=origin_date.min(),
-                end=development_date.max(),
-                freq=development_grain).to_timestamp(how='e')
-            # Let's get rid of any development periods before origin periods
-            cart_prod = TriangleBase._cartesian_product(
-                origin_unique, development_unique)
-            cart_prod = cart_prod[cart_prod[:, 0] <= cart_prod[:, 1], :]
-            return pd.DataFrame(cart_prod, columns=['origin', 'development'])
-        cart_prod_o = complete_date_range(
-            pd.Series(origin_date.min()), development_date,
-            self.origin_grain, self.development_grain)
-        cart_prod_d = complete_date_range(
-            origin_date, pd.Series(origin_date.max()),
-            self.origin_grain, self.development_grain)
-        cart_prod_t = pd.DataFrame({'origin': origin_date,
-                                   'development': development_date})
-        cart_prod = cart_prod_o.append(cart_prod_d, sort=True) \
-                               .append(cart_prod_t, sort=True) \
-                               .drop_duplicates()
-        cart_prod = cart_prod[cart_prod['development'] >= cart_prod['origin']]
-        return cart_prod
-
-    def _get_axes(self, data_agg, groupby, columns,
-                  origin_date, development_date):
-        ''' Preps axes for the 4D triangle
+    def copy(self, deep=True):
+        ''' Make a copy of the Triangle.
+
+        Parameters
+        ----------
+        deep : bool (default=True)
+            Whether to copy the underlying data.  A shallow copy shares its
+            ``values`` and axis metadata with the original.  Triangle methods
+            never write into the ``values`` of a Triangle they did not create,
+            they assign newly computed arrays instead, so the shared data is
+            only ever copied when a new Triangle is written.  The in-place
+            operators copy shared ``values`` before writing to them.  Callers
+            must not write to the ``values`` of a shallow copy, e.g.
+            ``obj.values[...] = x``, as that also changes the original.
+
+        Returns
+        -------
+            Triangle
         '''
-        date_axes = self._get_date_axes(origin_date, development_date)
-        kdims = data_agg[groupby].drop_duplicates()
-        kdims['key'] = date_axes['key'] = 1
-        all_axes = pd.merge(date_axes, kdims, on='key').drop('key', axis=1)
-        data_agg = all_axes.merge(
-            data_agg, how='left',
-            left_on=['origin', 'development'] + groupby,
-            right_on=[origin_date, development_date] + groupby).fillna(0)
-        data_agg = data_agg[['origin', 'development'] + groupby + columns]
-        data_agg['development'] = TriangleBase._development_lag(
-            data_agg['origin'], data_agg['development'])
-        return data_agg
+        if deep and self.array_backend == 'memmap':
+            # The memory mapped values are read-only and are not copied
+            obj = copy.deepcopy(self, {id(self._values): self._values})
+        elif deep:
+            obj = copy.deepcopy(self)
+        else:
+            obj = copy.copy(self)
+        if deep:
+            obj.__dict__.pop('_shared_values', None)
+        obj.__dict__.pop('_held', None)
+        obj._set_slicers()
+        return obj
+
+    def __copy__(self):
+        obj = self.__class__.__new__(self.__class__)
+        if isinstance(self.__dict__.get('_values'), np.ndarray):
+            # Both triangles hold the values until one assigns new ones
+            self._shared_values = weakref.ref(self._values)
+        obj.__dict__.update(self.__dict__)
+        # The copy is not the Triangle held by an estimator
+        obj.__dict__.pop('_held', None)
+        return obj
+
+    def _unshare_values(self, parent):
+        ''' Copies the values when they are still those of parent so that
+            the Triangle returned to the caller can be written to '''
+        values = self.__dict__.get('_values')
+        if self.array_backend == 'numpy' and \
+           values is parent.__dict__.get('_values'):
+            self.values = values.copy()
+        return self
+
+    def _owns_values(self):
+        ''' Whether the values are a writeable numpy array that no other
+            Triangle shares and the Triangle is not held by an estimator '''
+        values = self.__dict__.get('_values')
+        shared = self.__dict__.get('_shared_values')
+        return self.array_backend == 'numpy' and \
+            not self.__dict__.get('_held') and \
+            type(values) is np.ndarray and values.base is None and \
+            values.flags.writeable and \
+            (shared is None or shared() is not values)
 
     def _nan_triangle(self):
         '''Given the current triangle shape and grain, it determines the
            appropriate placement of NANs in the triangle for future valuations.
-           This becomes useful when managing array arithmetic.
+           This becomes useful when managing array arithmetic.  The array is
+           shared by all triangles with the same axes and is read-only.
         '''
 
-        if min(self.values.shape[2:]) == 1 or self.nan_override:
-            return np.ones(self.values.shape[2:], dtype='float16')
-        if len(self.valuation) != len(self.odims)*len(self.ddims) or not \
-           hasattr(self, '_nan_triangle_'):
-            self.valuation = self._valuation_triangle()
-            val_array = self.valuation
-            val_array = val_array.to_timestamp().values.reshape(self.shape[-2:], order='f')
-            nan_triangle = np.array(
-                pd.DataFrame(val_array) > self.valuation_date)
-            nan_triangle = np.array(np.where(nan_triangle, np.nan, 1), dtype='float16')
-            self._nan_triangle_ = nan_triangle
-        return self._nan_triangle_
+        if min(self.shape[2:]) == 1 or self.nan_override:
+            return np.ones(self.shape[2:], dtype='float16')
+        return self._axis_metadata(self.ddims)['nan_triangle']
 
     def _valuation_triangle(self, ddims=None):
         ''' Given origin and development, develop a triangle of valuation
         dates.
         '''
         ddims = self.ddims if ddims is None else ddims
+        if type(ddims) != pd.PeriodIndex:
+            if ddims[0] is None:
+                ddims = pd.Series([self.valuation_date]*len(self.origin))
+                return pd.DatetimeIndex(ddims.values).to_period(
+                    self._lowest_grain())
+            special_cases = dict(Ultimate='2262-03-01',
+                                 Latest=self.valuation_date)
+            if ddims[0] in special_cases.keys():
+                return pd.DatetimeIndex(
+                    [pd.to_datetime(special_cases[ddims[0]])] *
+                    len(self.origin)).to_period(self._lowest_grain())
+            if type(self.valuation_date) is not pd.Timestamp:
+                self.valuation_date = self.valuation_date.to_timestamp()
+        return self._axis_metadata(ddims)['valuation']
+
+    def _axis_metadata(self, ddims):
+        ''' Valuation dates and nan triangle of the origin and development
+            axes.  These only depend on the axes, so they are computed once in
+            whole months and shared by all triangles with the same axes.
+        '''
+        key = (_axis_key(self.odims), _axis_key(ddims), self.origin_grain,
+               self.development_grain, self.valuation_date)
+        if key in _metadata_cache:
+            _metadata_cache.move_to_end(key)
+            return _metadata_cache[key]
+        grain = self._lowest_grain()
+        valuation_date = self._to_months(
+            np.datetime64(self.valuation_date, 'ns'))
         if type(ddims) == pd.PeriodIndex:
-            return pd.DatetimeIndex(pd.DataFrame(
-                np.repeat(self.ddims.to_timestamp(how='e').values[np.newaxis],
-                          len(self.odims), 0))
-                .unstack().values).to_period(self._lowest_grain())
-        if ddims[0] is None:
-            ddims = pd.Series([self.valuation_date]*len(self.origin))
-            return pd.DatetimeIndex(ddims.values).to_period(self._lowest_grain())
-        special_cases = dict(Ultimate='2262-03-01', Latest=self.valuation_date)
-        if ddims[0] in special_cases.keys():
-            return pd.DatetimeIndex(
-                [pd.to_datetime(special_cases[ddims[0]])] *
-                len(self.origin)).to_period(self._lowest_grain())
-        if type(ddims[0]) is np.str_:
-            ddims = [int(item[:item.find('-'):]) for item in ddims]
-        origin = pd.PeriodIndex(self.odims, freq=self.origin_grain) \
-                   .to_timestamp(how='s')
-        origin = pd.Series(origin)
-        if type(self.valuation_date) is not pd.Timestamp:
-            self.valuation_date = self.valuation_date.to_timestamp()
-        # Limit origin to valuation date
-        origin[origin > self.valuation_date] = self.valuation_date
-        next_development = origin+pd.DateOffset(days=-1, months=ddims[0])
-        val_array = np.array(next_development)[..., np.newaxis]
-        for item in ddims[1:]:
-            if item == 9999:
-                next_development = pd.Series([pd.to_datetime('2262-03-01')] *
-                                             len(origin))
-                next_development = np.array(next_development)[..., np.newaxis]
-            else:
-                next_development = np.array(
-                    origin+pd.DateOffset(days=-1, months=item)
-                )[..., np.newaxis]
-            val_array = np.concatenate((val_array, next_development), -1)
-        val_array = pd.DatetimeIndex(pd.DataFrame(val_array).unstack().values)
-        return val_array.to_period(self._lowest_grain())
+            months = self._to_months(ddims.to_timestamp(how='e').values)
+            months = np.repeat(months[np.newaxis], len(self.odims), 0)
+            missing = np.zeros(months.shape, dtype=bool)
+        else:
+            if type(ddims[0]) is np.str_:
+                ddims = [int(item[:item.find('-'):]) for item in ddims]
+            ddims = np.array(ddims, dtype='int64')
+            origin = pd.PeriodIndex(self.odims, freq=self.origin_grain) \
+                       .to_timestamp(how='s').values
+            origin, missing = self._to_months(origin), np.isnat(origin)
+            # Origins beyond the valuation date start from the valuation date
+            # itself, which is only a whole month when it falls on the 1st.
+            late = origin > valuation_date
+            origin[late] = valuation_date + (self.valuation_date.day != 1)
+            months = origin[:, np.newaxis] + ddims - 1
+            months[:, ddims == 9999] = 2262*12 + 2
+            missing = missing[:, np.newaxis] & (ddims != 9999)
+        dates = self._from_months(months)
+        dates[missing] = np.datetime64('NaT')
+        valuation = pd.DatetimeIndex(dates.flatten(order='F')).to_period(grain)
+        step = {'M': 1, 'Q': 3, 'Y': 12}[grain]
+        nan_triangle = np.where(
+            ~missing & (months - months % step > valuation_date), np.nan, 1)
+        nan_triangle = np.array(nan_triangle, dtype='float16')
+        nan_triangle.setflags(write=False)
+        metadata = dict(valuation=valuation, nan_triangle=nan_triangle)
+        _metadata_cache[key] = metadata
+        while len(_metadata_cache) > _metadata_cache_size:
+            _metadata_cache.popitem(last=False)
+        return metadata
+
+    def _alignment_plan(self, other):
+        ''' Union of the origin and development axes of two triangles and
+            the positions of the axes of each triangle in it.  These only
+            depend on the axes, so they are computed once and shared by all
+            pairs of triangles with the same axes.
+        '''
+        key = tuple(_axis_key(item) for item in
+                    [self.odims, self.ddims, other.odims, other.ddims])
+        if key in _plan_cache:
+            _plan_cache.move_to_end(key)
+            return _plan_cache[key]
+        odims = pd.concat((pd.Series(self.odims, index=self.odims),
+                           pd.Series(other.odims, index=other.odims)),
+                          axis=1).index
+        ddims = pd.concat((pd.Series(self.ddims, index=self.ddims),
+                           pd.Series(other.ddims, index=other.ddims)),
+                          axis=1).index
+        positions = []
+        for obj in [self, other]:
+            o = odims.get_indexer(obj.odims)[:, np.newaxis]
+            d = ddims.get_indexer(obj.ddims)
+            o.setflags(write=False)
+            d.setflags(write=False)
+            positions.append((Ellipsis, o, d))
+        plan = dict(odims=np.array(odims), ddims=np.array(ddims),
+                    positions=positions)
+        _plan_cache[key] = plan
+        while len(_plan_cache) > _metadata_cache_size:
+            _plan_cache.popitem(last=False)
+        return plan
 
     def _lowest_grain(self):
         my_list = ['M', 'Q', 'Y']
@@ -215,51 +325,69 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
     @staticmethod
     def _to_datetime(data, fields, period_end=False, format=None):
         '''For tabular form, this will take a set of data
-        column(s) and return a single date array.  This function heavily
-        relies on pandas, but does two additional things:
+        column(s) and return a single date array along with the date format
+        used to parse it.  This function heavily relies on pandas, but does
+        three additional things:
         1. It extends the automatic inference using date_inference_list
         2. it allows pd_to_datetime on a set of columns
+        3. It only parses distinct values and caches them across calls
         '''
         # Concat everything into one field
-        target_field = data[fields].astype(str).apply(
-            lambda x: '-'.join(x), axis=1)
-        datetime_arg = target_field.unique()
-        date_inference_list = \
-            [{'arg': datetime_arg, 'format': '%Y%m'},
-             {'arg': datetime_arg, 'format': '%Y'},
-             {'arg': datetime_arg, 'infer_datetime_format': True}]
+        target_field = data[fields[0]].astype(str)
+        for field in fields[1:]:
+            target_field = target_field + '-' + data[field].astype(str)
+        codes, datetime_arg = pd.factorize(target_field)
+        datetime_arg = np.array(datetime_arg, dtype=object)
+        date_inference_list = ['%Y%m', '%Y', None]
         if format is not None:
-            date_inference_list = [{'arg': datetime_arg, 'format': format}] + \
-                                  date_inference_list
+            date_inference_list = [format] + date_inference_list
         for item in date_inference_list:
             try:
-                arr = dict(zip(datetime_arg, pd.to_datetime(**item)))
+                arr, format = _parse_dates(datetime_arg, item)
                 break
-            except:
+            except (ValueError, TypeError, OverflowError):
                 pass
-        target = target_field.map(arr)
+        else:
+            raise ValueError('Unable to parse dates in {}'.format(fields))
+        target = pd.Series(arr[codes], index=data.index)
         if period_end:
             target = target.dt.to_period(
                 TriangleBase._get_grain(target)
             ).dt.to_timestamp(how='e')
         target.name = 'valuation'
-        return target
+        return target, format
 
     @staticmethod
-    def _development_lag(origin, development):
-        ''' For tabular format, this will convert the origin/development
-            difference to a development lag '''
-        year_diff = development.dt.year - origin.dt.year
-        quarter_diff = development.dt.quarter - origin.dt.quarter
-        month_diff = development.dt.month - origin.dt.month
-        if np.all(origin != development):
-            development_grain = TriangleBase._get_grain(development)
-        else:
-            development_grain = 'M'
-        diffs = dict(Y=year_diff + 1,
-                     Q=year_diff * 4 + quarter_diff + 1,
-                     M=year_diff * 12 + month_diff + 1)
-        return diffs[development_grain]
+    def _period_number(dates, grain):
+        ''' Counts the periods of the given grain elapsed from year zero to
+            each date.  Differencing these gives development lags. '''
+        period = dict(Y=dates.dt.year,
+                      Q=dates.dt.year*4 + dates.dt.quarter - 1,
+                      M=dates.dt.year*12 + dates.dt.month - 1)
+        return period[grain].values
+
+    @staticmethod
+    def _to_months(dates):
+        ''' Converts dates to the number of months elapsed from year zero '''
+        return np.array(dates, dtype='datetime64[M]').astype('int64') + \
+            1970*12
+
+    @staticmethod
+    def _from_months(months):
+        ''' Converts months elapsed from year zero to the first day of each
+            month '''
+        return (np.array(months) - 1970*12).astype('datetime64[M]') \
+            .astype('datetime64[ns]')
+
+    @staticmethod
+    def _last_filled(values):
+        ''' Index along the last axis of the latest nonzero value at or before
+            each position.  Positions before the first nonzero value index
+            position zero. '''
+        filled = (values != 0) & ~np.isnan(values)
+        idx = filled * np.arange(
+            values.shape[-1], dtype=np.min_scalar_type(values.shape[-1]))
+        return np.maximum.accumulate(idx, axis=-1)
 
     @staticmethod
     def _get_grain(array):
@@ -268,22 +396,97 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
         return grain[len(months)]
 
     @staticmethod
-    def _cartesian_product(*arrays):
-        '''A fast implementation of cartesian product, used for filling in gaps
-        in triangles (if any)'''
-        arr = np.empty([len(a) for a in arrays]+[len(arrays)],
-                       dtype=np.result_type(*arrays))
-        for i, a in enumerate(np.ix_(*arrays)):
-            arr[..., i] = a
-        arr = arr.reshape(-1, len(arrays))
-        return arr
+    def _factorize(data, fields):
+        ''' Encodes the distinct combinations of a set of columns as integer
+            codes.  Returns the codes along with a dataframe of the distinct
+            combinations in sorted order. Rows with a missing value in any
+            of the columns are coded as -1. '''
+        codes, levels = zip(*[pd.factorize(data[field], sort=True)
+                              for field in fields])
+        if len(fields) == 1:
+            return codes[0], pd.DataFrame({fields[0]: levels[0]})
+        valid = np.all(np.array(codes) >= 0, axis=0)
+        combined = np.zeros(len(data), dtype='int64')
+        for code, level in zip(codes, levels):
+            combined = combined*len(level) + code
+        code = np.repeat(-1, len(data))
+        code[valid], unique = pd.factorize(combined[valid], sort=True)
+        key = {}
+        for field, level in zip(fields[::-1], levels[::-1]):
+            key[field] = level[unique % len(level)]
+            unique = unique // len(level)
+        return code, pd.DataFrame(key)[fields]
 
     def _str_to_list(self, *args):
         return tuple([arg] if type(arg) is str else arg for arg in args)
 
-    def _flatten(self, *args):
-        return_list = []
-        for item in args:
-            if item:
-                return_list = return_list + item
-        return return_list
+
+# Process-wide cache of parsed dates keyed by (raw value, format)
+_date_cache = OrderedDict()
+_date_cache_size = 100000
+
+
+# Process-wide cache of triangle axis metadata, see _axis_metadata
+_metadata_cache = OrderedDict()
+_metadata_cache_size = 1000
+# Process-wide cache of the alignment of pairs of axes, see _alignment_plan
+_plan_cache = OrderedDict()
+
+
+def _axis_key(dims):
+    ''' Hashable representation of an origin or development axis '''
+    if type(dims) == pd.PeriodIndex:
+        return (dims.freqstr, dims.asi8.tobytes())
+    dims = np.asarray(dims)
+    if dims.dtype == object:
+        return tuple(dims.tolist())
+    return (dims.dtype.str, dims.tobytes())
+
+
+def _parse_dates(values, format=None):
+    ''' Parses an array of distinct date strings with pd.to_datetime.  When
+        no format is given, one is inferred from the values where possible.
+        Dates parsed with a known format are kept in a least-recently-used
+        cache keyed by the value and that format, so subsequent calls with
+        the same values skip parsing entirely.  Without a format, how a
+        value parses depends on the rest of the array, so those results are
+        not cached.
+
+        Returns the parsed dates and the format used to parse them.
+    '''
+    if format is None:
+        inferred = _guess_datetime_format(values)
+        if inferred is not None:
+            try:
+                return _parse_dates(values, inferred)
+            except (ValueError, TypeError, OverflowError):
+                pass
+        return pd.to_datetime(
+            values, infer_datetime_format=True).values, None
+    parsed = np.empty(len(values), dtype='datetime64[ns]')
+    missing = []
+    for num, value in enumerate(values):
+        key = (value, format)
+        if key in _date_cache:
+            _date_cache.move_to_end(key)
+            parsed[num] = _date_cache[key]
+        else:
+            missing.append(num)
+    if missing:
+        new = pd.to_datetime(values[missing], format=format).values
+        parsed[missing] = new
+        for value, date in zip(values[missing], new):
+            _date_cache[(value, format)] = date
+        while len(_date_cache) > _date_cache_size:
+            _date_cache.popitem(last=False)
+    return parsed, format
+
+
+def _guess_datetime_format(values):
+    ''' Infers the strftime format of an array of date strings, if possible '''
+    try:
+        from pandas.core.tools.datetimes import \
+            _guess_datetime_format_for_array
+        return _guess_datetime_format_for_array(values)
+    except (ImportError, TypeError, ValueError):
+        return None
@@ -0,0 +1,90 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import functools
+import numpy as np
+import pandas as pd
+from chainladder.core.base import TriangleBase
+
+
+def fitted_property(func):
+    ''' Property of a fitted estimator that is computed on first access and
+        then held until the estimator is fit again, predicts or has its
+        parameters set.  Each access returns a shallow copy of the held
+        Triangle, so in-place arithmetic on it leaves the estimator unchanged.
+        Held arrays are returned as read-only views.
+    '''
+    name = func.__name__
+
+    @functools.wraps(func)
+    def getter(self):
+        if not self.cache_fitted:
+            return func(self)
+        cache = self.__dict__.get('_fitted_cache')
+        if cache is None:
+            cache = self.__dict__['_fitted_cache'] = {}
+        if name not in cache:
+            cache[name] = func(self)
+        value = cache[name]
+        if isinstance(value, np.ndarray):
+            value = value.view()
+            value.flags.writeable = False
+            return value
+        return value.copy(deep=False)
+    return property(getter)
+
+
+class EstimatorCache:
+    ''' Holds the ``fitted_property`` attributes of an estimator.  Triangles
+    set on the estimator are marked as held, so in-place arithmetic on them
+    returns a new Triangle rather than changing the estimator.
+
+    Attributes
+    ----------
+    cache_fitted : bool (default=True)
+        Whether fitted properties are held between accesses.  Set it on an
+        estimator to opt out for that estimator or on ``EstimatorCache`` to
+        opt out for all of them.
+    '''
+    cache_fitted = True
+
+    def __setattr__(self, name, value):
+        if isinstance(value, TriangleBase):
+            value._held = True
+        super().__setattr__(name, value)
+
+    def set_params(self, **params):
+        self.clear_cache()
+        return super().set_params(**params)
+
+    def clear_cache(self):
+        ''' Drops the fitted properties held by the estimator
+
+        Returns
+        -------
+            self
+        '''
+        # Replaced rather than cleared as shallow copies of the estimator
+        # share the dictionary
+        self.__dict__.pop('_fitted_cache', None)
+        return self
+
+    def cache_info(self):
+        ''' Memory held by each fitted property of the estimator
+
+        Returns
+        -------
+            Series of the number of bytes of each held property
+        '''
+        cache = self.__dict__.get('_fitted_cache', {})
+        return pd.Series([_nbytes(value) for value in cache.values()],
+                         index=list(cache.keys()), name='nbytes',
+                         dtype='int64')
+
+
+def _nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return int(getattr(value, 'values', value).nbytes)
@@ -7,7 +7,7 @@ import numpy as np
 
 class TriangleDisplay():
     def __repr__(self):
-        if (self.values.shape[0], self.values.shape[1]) == (1, 1):
+        if (self.shape[0], self.shape[1]) == (1, 1):
             data = self._repr_format()
             return data.to_string()
         else:
@@ -21,7 +21,7 @@ class TriangleDisplay():
 
     def _repr_html_(self):
         ''' Jupyter/Ipython HTML representation '''
-        if (self.values.shape[0], self.values.shape[1]) == (1, 1):
+        if (self.shape[0], self.shape[1]) == (1, 1):
             data = self._repr_format()
             if np.nanmean(abs(data)) < 10:
                 fmt_str = '{0:,.4f}'
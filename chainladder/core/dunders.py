@@ -1,9 +1,12 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
-import pandas as pd
 import numpy as np
+import ast
 import copy
+import operator
+from scipy import sparse
+from chainladder.core.memmap import index_chunked
 
 
 class TriangleDunders:
@@ -11,11 +14,12 @@ class TriangleDunders:
         Triangle class
     '''
     def _validate_arithmetic(self, other):
-        ''' Common functionality BEFORE arithmetic operations '''
-        obj = copy.deepcopy(self)
-        other = other if type(other) in [int, float] else copy.deepcopy(other)
-        ddims = None
-        odims = None
+        ''' Common functionality BEFORE arithmetic operations.  Returns the
+            Triangle to hold the result, the values of other and whether the
+            values of both are new arrays that can be written to. '''
+        obj = self.copy(deep=False)
+        other = other if type(other) in [int, float] else copy.copy(other)
+        owned = False
         if type(other) not in [int, float, np.float64, np.int64]:
             if len(self.vdims) != len(other.vdims):
                 raise ValueError('Triangles must have the same number of ' +
@@ -25,105 +29,302 @@ class TriangleDunders:
                                  'index')
             if len(self.vdims) == 1:
                 other.vdims = np.array([None])
-            # If broadcasting doesn't work, then try union of origin/developments
-            # before failure
+            # If broadcasting doesn't work, then try union of
+            # origin/developments before failure
             a, b = self.shape[-2:], other.shape[-2:]
             if not (a[0] == 1 or b[0] == 1 or a[0] == b[0]) or \
                not (a[1] == 1 or b[1] == 1 or a[1] == b[1]):
-                ddims = pd.concat((pd.Series(self.ddims, index=self.ddims),
-                                pd.Series(other.ddims, index=other.ddims)), axis=1)
-                odims = pd.concat((pd.Series(self.odims, index=self.odims),
-                                pd.Series(other.odims, index=other.odims)), axis=1)
-                other_arr = np.zeros(
-                    (other.shape[0], other.shape[1], len(odims), len(ddims)))
-                other_arr[:] = np.nan
-                ol, oh = np.where(~odims[1].isna().values == 1)[0].min(
-                ), np.where(~odims[1].isna().values == 1)[0].max()+1
-                if np.any(self.ddims != other.ddims):
-                    dl, dh = np.where(~ddims[1].isna().values == 1)[0].min(
-                    ), np.where(~ddims[1].isna().values == 1)[0].max()+1
-                    other_arr[:, :, ol:oh, dl:dh] = other.values
-                else:
-                    other_arr[:, :, ol:oh, :] = other.values
-
-                obj_arr = np.zeros(
-                    (self.shape[0], self.shape[1], len(odims), len(ddims)))
-                obj_arr[:] = np.nan
-                ol, oh = np.where(~odims[0].isna().values == 1)[0].min(
-                ), np.where(~odims[0].isna().values == 1)[0].max()+1
-                if np.any(self.ddims != other.ddims):
-                    dl, dh = np.where(~ddims[0].isna().values == 1)[0].min(
-                    ), np.where(~ddims[0].isna().values == 1)[0].max()+1
-                    obj_arr[:, :, ol:oh, dl:dh] = self.values
-                else:
-                    obj_arr[:, :, ol:oh, :] = self.values
-
-                odims = np.array(odims.index)
-                ddims = np.array(ddims.index)
-                obj.ddims =  ddims
-                obj.odims =  odims
-                obj.values = obj_arr
-                other.values = other_arr
+                plan = self._alignment_plan(other)
+                shape = (len(plan['odims']), len(plan['ddims']))
+                obj.values = _scatter(
+                    self.values, plan['positions'][0], shape)
+                other.values = _scatter(
+                    other.values, plan['positions'][1], shape)
+                obj.odims = plan['odims']
+                obj.ddims = plan['ddims']
                 obj._set_slicers()
                 obj.valuation = obj._valuation_triangle()
-                if hasattr(obj, '_nan_triangle_'):
-                    # Force update on _nan_triangle at next access.
-                    del obj._nan_triangle_
-            other = other.values
-        return obj, other
+                owned = True
+            if obj.array_backend == 'sparse' and \
+               other.array_backend == 'sparse' and obj.shape == other.shape:
+                other = other._sparse
+            else:
+                other = other.values
+        return obj, other, owned
 
     def _arithmetic_cleanup(self, obj):
         ''' Common functionality AFTER arithmetic operations '''
-        obj.values = obj.values * self._expand_dims(obj._nan_triangle())
+        if obj.array_backend == 'sparse':
+            obj._sparse_nan_mask()
+            return obj
+        # The values are the new array holding the result
+        obj.values = _into(np.multiply, obj.values,
+                           self._expand_dims(obj._nan_triangle()), obj.values)
         obj.values[obj.values == 0] = np.nan
         return obj
 
+    @index_chunked
     def __add__(self, other):
-        obj, other = self._validate_arithmetic(other)
-        obj.values = np.nan_to_num(obj.values) + np.nan_to_num(other)
+        obj, other, owned = self._validate_arithmetic(other)
+        if sparse.issparse(other):
+            obj._set_sparse(obj._sparse + other, obj.shape)
+        else:
+            values = np.nan_to_num(obj.values, copy=not owned)
+            obj.values = _into(np.add, values, np.nan_to_num(
+                other, copy=not owned), values)
         return self._arithmetic_cleanup(obj)
 
     def __radd__(self, other):
         return self if other == 0 else self.__add__(other)
 
+    @index_chunked
     def __sub__(self, other):
-        obj, other = self._validate_arithmetic(other)
-        obj.values = np.nan_to_num(obj.values) - \
-            np.nan_to_num(other)
+        obj, other, owned = self._validate_arithmetic(other)
+        if sparse.issparse(other):
+            obj._set_sparse(obj._sparse - other, obj.shape)
+        else:
+            values = np.nan_to_num(obj.values, copy=not owned)
+            obj.values = _into(np.subtract, values, np.nan_to_num(
+                other, copy=not owned), values)
         return self._arithmetic_cleanup(obj)
 
+    @index_chunked
     def __rsub__(self, other):
-        obj, other = self._validate_arithmetic(other)
-        obj.values = np.nan_to_num(other) - \
-            np.nan_to_num(obj.values)
+        obj, other, owned = self._validate_arithmetic(other)
+        if sparse.issparse(other):
+            obj._set_sparse(other - obj._sparse, obj.shape)
+        else:
+            values = np.nan_to_num(obj.values, copy=not owned)
+            obj.values = _into(np.subtract, np.nan_to_num(
+                other, copy=not owned), values, values)
         return self._arithmetic_cleanup(obj)
 
+    def _inplace_arithmetic(self, other, func, method):
+        ''' Applies func to the values of the Triangle and other in place
+            when the Triangle owns its values and other broadcasts to them.
+            Otherwise the result of method is returned as a new Triangle,
+            leaving any other reference to the Triangle unchanged. '''
+        values = other
+        if type(other) not in [int, float, np.float64, np.int64]:
+            values = other.values if self._owns_values() and \
+                len(self.vdims) == len(other.vdims) and \
+                len(self.kdims) == len(other.kdims) else None
+        if values is not None and self._owns_values() and \
+           np.ndim(values) <= 4 and all(
+               b in [1, a] for a, b in zip(self.shape[::-1],
+                                           np.shape(values)[::-1])) and \
+           np.result_type(self._values, values) == self._values.dtype:
+            np.nan_to_num(self._values, copy=False)
+            if func in [np.add, np.subtract]:
+                values = np.nan_to_num(values)
+            func(self._values, values, out=self._values)
+            self._arithmetic_cleanup(self)
+        else:
+            return getattr(self, method)(other)
+        return self
+
+    def __iadd__(self, other):
+        return self._inplace_arithmetic(other, np.add, '__add__')
+
+    def __isub__(self, other):
+        return self._inplace_arithmetic(other, np.subtract, '__sub__')
+
+    def __imul__(self, other):
+        return self._inplace_arithmetic(other, np.multiply, '__mul__')
+
+    def __itruediv__(self, other):
+        return self._inplace_arithmetic(other, np.divide, '__truediv__')
+
+    def eval(self, expr, local_dict=None, inplace=False):
+        ''' Evaluates an arithmetic expression of the columns of the
+        Triangle.
+
+        The result is the same as that of the chain of Triangle arithmetic,
+        but when every Triangle in the expression has dense values of the same
+        shape and valuation, the chain is evaluated in place in a single
+        buffer and masked by the nan triangle once rather than after each
+        operation.
+
+        Parameters
+        ----------
+        expr : str
+            An expression of column names, numbers, parentheses and the
+            operators ``+``, ``-``, ``*`` and ``/``, for example
+            ``'(paid + case) * olf / exposure'``.  An assignment such as
+            ``'incurred = paid + case'`` sets the column ``incurred`` to the
+            result.
+        local_dict : dict, optional (default=None)
+            Triangles and numbers for names in expr that are not columns of
+            the Triangle.
+        inplace : bool (default=False)
+            Whether an assignment sets the column of the Triangle rather than
+            of a copy of it.
+
+        Returns
+        -------
+            Triangle
+        '''
+        body = ast.parse(expr.strip()).body
+        if len(body) != 1 or type(body[0]) not in [ast.Expr, ast.Assign] or \
+           (type(body[0]) is ast.Assign and (
+               len(body[0].targets) != 1 or
+               type(body[0].targets[0]) is not ast.Name)):
+            raise ValueError('expr must be a single expression or an ' +
+                             'assignment to a single column')
+        local_dict = {} if local_dict is None else local_dict
+        columns = list(self.vdims)
+        names = {}
+        for node in ast.walk(body[0].value):
+            if type(node) is ast.Name:
+                if node.id in columns:
+                    names[node.id] = node.id
+                elif node.id in local_dict:
+                    names[node.id] = local_dict[node.id]
+                else:
+                    raise ValueError('{} is not a column of the Triangle or '
+                                     'in local_dict'.format(node.id))
+            elif type(node) not in _eval_nodes or (
+                    type(node) in _eval_constants and
+                    type(ast.literal_eval(node)) not in _eval_numbers):
+                raise ValueError('Unsupported expression: {}'.format(
+                    type(node).__name__))
+        triangles = [item for item in names.values()
+                     if type(item) not in _eval_numbers + [str]]
+        if any(type(item) is str for item in names.values()):
+            triangles.append(self)
+        kind = None
+        if len(triangles) > 0 and all(
+                item.array_backend == 'numpy' and
+                np.issubdtype(item.values.dtype, np.floating) and
+                (item is self or item.shape[1] == 1) and
+                item.shape[:1] + item.shape[2:] ==
+                triangles[0].shape[:1] + triangles[0].shape[2:] and
+                np.array_equal(np.isnan(item._nan_triangle()),
+                               np.isnan(triangles[0]._nan_triangle()))
+                for item in triangles):
+            result, kind = self._eval_fused(body[0].value, names)
+        if kind == 'temp':
+            template = _eval_template(body[0].value, names)
+            if type(template) is str:
+                obj = self.copy(deep=False)
+                obj.vdims = np.array([template])
+            else:
+                obj = template.copy(deep=False)
+            obj.values = result
+            result = obj._arithmetic_cleanup(obj)
+        else:
+            result = self._eval_triangle(body[0].value, names)
+        if type(body[0]) is ast.Expr:
+            return result
+        obj = self if inplace else self.copy(deep=False)
+        obj[body[0].targets[0].id] = result
+        return obj
+
+    def _eval_triangle(self, node, names):
+        ''' Evaluates the expression node with Triangle arithmetic '''
+        if type(node) is ast.Name:
+            name = names[node.id]
+            return self[name] if type(name) is str else name
+        if type(node) is ast.BinOp:
+            return _eval_operators[type(node.op)](
+                self._eval_triangle(node.left, names),
+                self._eval_triangle(node.right, names))
+        if type(node) is ast.UnaryOp:
+            value = self._eval_triangle(node.operand, names)
+            return -value if type(node.op) is ast.USub else value
+        return ast.literal_eval(node)
+
+    def _eval_fused(self, node, names):
+        ''' Evaluates the expression node on the values of the columns and
+            Triangles in it.  Returns the result and its kind: 'scalar',
+            'column' or 'local' values that must not be written to, or a
+            'temp' array that is yet to be masked by the nan triangle. '''
+        if type(node) is ast.Name:
+            name = names[node.id]
+            if type(name) is str:
+                position = list(self.vdims).index(name)
+                return self.values[:, position:position + 1], 'column'
+            if type(name) in _eval_numbers:
+                return name, 'scalar'
+            return name.values, 'local'
+        if type(node) is ast.UnaryOp:
+            value, kind = self._eval_fused(node.operand, names)
+            if type(node.op) is ast.UAdd:
+                return value, kind
+            if kind == 'temp':
+                return np.negative(value, out=value), kind
+            return -value, 'scalar' if kind == 'scalar' else 'temp'
+        if type(node) is not ast.BinOp:
+            return ast.literal_eval(node), 'scalar'
+        x, x_kind = self._eval_fused(node.left, names)
+        y, y_kind = self._eval_fused(node.right, names)
+        op = type(node.op)
+        func = _eval_ufuncs[op]
+        if x_kind == 'scalar' and y_kind == 'scalar':
+            return _eval_operators[op](x, y), 'scalar'
+        if x_kind == 'scalar':
+            # Reflected operations of a number and a Triangle
+            if op is ast.Div:
+                out = y if y_kind == 'temp' else np.array(y)
+                if y_kind != 'local':
+                    out[out == 0] = np.nan
+                return func(x, out, out=out), 'temp'
+            out = np.nan_to_num(y, copy=y_kind != 'temp')
+            return (func(x, out, out=out) if op is ast.Sub else
+                    func(out, x, out=out)), 'temp'
+        out = np.nan_to_num(x, copy=x_kind != 'temp')
+        if op in [ast.Add, ast.Sub]:
+            y = np.nan_to_num(y, copy=y_kind != 'temp')
+        if op is ast.Div and y_kind in ['column', 'temp']:
+            # Zeros of Triangle results are missing values
+            zero = y == 0
+            func(out, y, out=out, where=~zero)
+            out[zero] = np.nan
+            return out, 'temp'
+        return func(out, y, out=out), 'temp'
+
     def __len__(self):
         return self.shape[0]
 
+    @index_chunked
     def __neg__(self):
-        obj = copy.deepcopy(self)
-        obj.values = -obj.values
+        obj = self.copy(deep=False)
+        if obj.array_backend == 'sparse':
+            obj._set_sparse(-obj._sparse, obj.shape)
+        else:
+            obj.values = -obj.values
         return obj
 
     def __pos__(self):
         return self
 
+    @index_chunked
     def __mul__(self, other):
-        obj, other = self._validate_arithmetic(other)
-        obj.values = np.nan_to_num(obj.values)*other
+        obj, other, owned = self._validate_arithmetic(other)
+        if obj.array_backend != 'sparse' or \
+           not obj._sparse_ufunc(np.multiply, other):
+            values = np.nan_to_num(obj.values, copy=not owned)
+            obj.values = _into(np.multiply, values, other, values)
         return self._arithmetic_cleanup(obj)
 
     def __rmul__(self, other):
         return self if other == 1 else self.__mul__(other)
 
+    @index_chunked
     def __truediv__(self, other):
-        obj, other = self._validate_arithmetic(other)
-        obj.values = np.nan_to_num(obj.values)/other
+        obj, other, owned = self._validate_arithmetic(other)
+        if obj.array_backend != 'sparse' or \
+           not obj._sparse_ufunc(np.divide, other):
+            values = np.nan_to_num(obj.values, copy=not owned)
+            obj.values = _into(np.divide, values, other, values)
         return self._arithmetic_cleanup(obj)
 
+    @index_chunked
     def __rtruediv__(self, other):
-        obj = copy.deepcopy(self)
+        obj = self.copy(deep=False)
+        if obj.array_backend == 'sparse' and \
+           obj._sparse_ufunc(lambda x, y: y / x, other):
+            return obj
         obj.values = other / self.values
         obj.values[obj.values == 0] = np.nan
         return obj
@@ -139,3 +340,47 @@ class TriangleDunders:
         if self.__dict__.get(value, None) is None:
             return False
         return True
+
+
+def _scatter(values, positions, shape):
+    ''' values placed at positions of an array of NaNs with the origin and
+        development shape, shape '''
+    out = np.full(values.shape[:-2] + shape, np.nan)
+    out[positions] = values
+    return out
+
+
+def _into(func, x, y, out):
+    ''' func(x, y) written into out when the result has its shape and dtype
+        '''
+    if np.broadcast(x, y).shape == out.shape and \
+       np.result_type(x, y) == out.dtype:
+        return func(x, y, out=out)
+    return func(x, y)
+
+
+def _eval_template(node, names):
+    ''' The column name or Triangle whose axes the result of the expression
+        node takes, or None for a number '''
+    if type(node) is ast.Name:
+        name = names[node.id]
+        return None if type(name) in _eval_numbers else name
+    if type(node) is ast.UnaryOp:
+        return _eval_template(node.operand, names)
+    if type(node) is ast.BinOp:
+        template = _eval_template(node.left, names)
+        return _eval_template(node.right, names) if template is None \
+            else template
+    return None
+
+
+_eval_numbers = [int, float, np.float64, np.int64]
+_eval_operators = {ast.Add: operator.add, ast.Sub: operator.sub,
+                   ast.Mult: operator.mul, ast.Div: operator.truediv}
+_eval_ufuncs = {ast.Add: np.add, ast.Sub: np.subtract,
+                ast.Mult: np.multiply, ast.Div: np.divide}
+# Numbers are parsed as Num before Python 3.8 and as Constant after
+_eval_constants = [getattr(ast, item) for item in ['Num', 'Constant']
+                   if hasattr(ast, item)]
+_eval_nodes = [ast.Name, ast.Load, ast.BinOp, ast.UnaryOp, ast.USub,
+               ast.UAdd] + list(_eval_operators) + _eval_constants
@@ -29,9 +29,59 @@ class TriangleIO():
         json_dict['development_grain'] = self.development_grain
         json_dict['nan_override'] = self.nan_override
         json_dict['is_cumulative'] = self.is_cumulative
+        json_dict['array_backend'] = self.array_backend
         json_dict['valuation_date'] = self.valuation_date.strftime('%Y-%m-%d')
         return json.dumps(json_dict)
 
+    def to_npz(self, path):
+        ''' Saves the triangle to an uncompressed numpy .npz archive.  Each
+        array is stored in binary as its own .npy member alongside a json
+        header of the other attributes.  No member is pickled, and the
+        ``values`` of a dense triangle can be memory mapped when read back
+        with ``read_npz``.
+
+        Parameters
+        ----------
+        path : str or file
+            The file to write.  '.npz' is appended to a str path without it.
+        '''
+        arrays, dtypes = {}, {}
+        kdims = np.asarray(self.kdims)
+        levels = kdims.T if kdims.ndim == 2 else [kdims]
+        for num, level in enumerate(levels):
+            arrays['kdims_{}'.format(num)], dtypes['kdims_{}'.format(num)] = \
+                _to_npy(level)
+        for name in ['vdims', 'odims', 'ddims', 'valuation']:
+            arrays[name], dtypes[name] = _to_npy(getattr(self, name))
+        if self.array_backend == 'sparse':
+            arrays['sparse_data'] = self._sparse.data
+            arrays['sparse_indices'] = self._sparse.indices
+            arrays['sparse_indptr'] = self._sparse.indptr
+        else:
+            arrays['values'] = np.asarray(self.values)
+        header = {
+            'format_version': 1,
+            'shape': list(self.shape),
+            'kdims_dtype': str(kdims.dtype),
+            'kdims_ndim': kdims.ndim,
+            'dtypes': dtypes,
+            'key_labels': list(self.key_labels),
+            'origin_grain': self.origin_grain,
+            'development_grain': self.development_grain,
+            'origin_format': getattr(self, 'origin_format', None),
+            'development_format': getattr(self, 'development_format', None),
+            'nan_override': bool(self.nan_override),
+            'is_cumulative': self.is_cumulative,
+            'array_backend': self.array_backend}
+        if self.array_backend == 'sparse':
+            fill = getattr(self, '_sparse_fill', np.nan)
+            header['sparse_fill'] = None if np.isnan(fill) else fill
+        arrays['valuation_date'] = np.array(
+            pd.Timestamp(self.valuation_date).to_datetime64(),
+            dtype='datetime64[ns]')
+        arrays['header'] = np.array(json.dumps(header))
+        np.savez(path, **arrays)
+
 
 class EstimatorIO:
     ''' Class intended to allow persistence of estimator objects
@@ -55,3 +105,33 @@ class EstimatorIO:
         if self.__dict__.get(value, None) is None:
             return False
         return True
+
+
+def _to_npy(array):
+    ''' An array that numpy can store without pickling and the dtype to
+    restore it with '''
+    if isinstance(array, pd.PeriodIndex):
+        return array.asi8, 'period[{}]'.format(array.freqstr)
+    array = np.asarray(array)
+    if array.dtype != object:
+        return array, str(array.dtype)
+    if all(item is None for item in array.tolist()):
+        # Axes of a single lag, such as the latest diagonal, hold None
+        return np.zeros(array.shape, dtype='int8'), 'none'
+    stored = np.array(array.tolist())
+    if stored.dtype == object or \
+       not np.array_equal(stored.astype(object), array):
+        raise ValueError(
+            'Mixed types along an axis cannot be stored without pickling.')
+    return stored, 'object'
+
+
+def _from_npy(array, dtype):
+    ''' Inverse of _to_npy '''
+    if dtype.startswith('period['):
+        return pd.PeriodIndex(ordinal=array, freq=dtype[len('period['):-1])
+    if dtype == 'none':
+        return np.full(array.shape, None, dtype=object)
+    if dtype == 'object':
+        return array.astype(object)
+    return array
@@ -0,0 +1,178 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import functools
+import os
+import tempfile
+import numpy as np
+
+
+def index_chunked(method):
+    ''' Runs a Triangle method that treats each index entry independently on
+        one chunk of the index at a time when the values are memory mapped.
+        Triangle and array arguments with the same index are split into the
+        same chunks. '''
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.array_backend != 'memmap':
+            return method(self, *args, **kwargs)
+        return self._memmap_apply(lambda chunk, key: method(
+            chunk, *[self._chunk_of(arg, key) for arg in args], **kwargs))
+    return wrapper
+
+
+class TriangleMemmap:
+    ''' Memory mapped storage of Triangle values.
+
+    A memory mapped Triangle reads its 4D values from a file on disk rather
+    than holding them in memory.  The file is opened read-only and is never
+    written to.  Slicing, ``latest_diagonal``, arithmetic, ``incr_to_cum``
+    and ``cum_to_incr`` read the values one chunk of the index at a time and
+    write their result to a new memory mapped file.  Index sums and groupby
+    sums read the values one chunk at a time into an in-memory Triangle.
+    ``Development`` fits one chunk of the index at a time.  Any other
+    functionality reads ``values`` whole.
+    '''
+    _memmap_dir = None
+    _memmap_chunk_size = None
+
+    def to_memmap(self, path=None, chunk_size=None):
+        ''' Converts the Triangle to values memory mapped from a file.
+
+        Parameters
+        ----------
+        path : str, optional (default=None)
+            The .npy file to write the values to.  By default the values are
+            written to a temporary file that is removed once no Triangle
+            uses it.  Results of operations on the Triangle are written to
+            temporary files in the directory of path.
+        chunk_size : int, optional (default=None)
+            Number of index entries read at a time.  By default as many as
+            fit in 64MB.
+
+        Returns
+        -------
+            Triangle
+        '''
+        obj = self.copy(deep=False)
+        if path is not None:
+            obj._memmap_dir = os.path.dirname(os.path.abspath(path))
+        obj._memmap_chunk_size = chunk_size
+        values = obj._new_memmap(self.shape, self.values.dtype
+                                 if self.array_backend != 'sparse'
+                                 else self._sparse.dtype, path)
+        for key in obj._memmap_keys():
+            values[key[0]:key[-1] + 1] = self._index_chunk(key).values
+        obj._set_memmap(obj._close_memmap(values, path))
+        return obj
+
+    def _set_memmap(self, values):
+        ''' Stores a memory mapped array as the values of the Triangle '''
+        self._values = values
+        self._sparse = None
+        self.array_backend = 'memmap'
+
+    def _new_memmap(self, shape, dtype, path=None):
+        ''' A writeable memory mapped array of zeros.  Without a path, the
+            array is backed by an anonymous temporary file. '''
+        if path is not None:
+            return np.lib.format.open_memmap(
+                path, mode='w+', dtype=dtype, shape=tuple(shape))
+        if np.prod(shape) == 0:
+            return np.zeros(shape, dtype=dtype)
+        # The mapping holds its own handle on the file, which is deleted
+        # when the last handle is closed
+        with tempfile.TemporaryFile(dir=self._memmap_dir) as f:
+            return np.memmap(f, dtype=dtype, mode='w+', shape=tuple(shape))
+
+    @staticmethod
+    def _close_memmap(values, path=None):
+        ''' Read-only view of a memory mapped array once it is written '''
+        if isinstance(values, np.memmap):
+            values.flush()
+        if path is not None:
+            return np.load(path, mmap_mode='r')
+        values.flags.writeable = False
+        return values
+
+    def _memmap_keys(self, index=None):
+        ''' Positions of the index entries, index, in chunks of at most
+            chunk_size entries '''
+        index = np.arange(self.shape[0]) if index is None else \
+            np.arange(self.shape[0])[index]
+        size = self._memmap_chunk_size
+        if size is None:
+            row = np.prod(self.shape[1:]) * 8
+            size = max(1, int(2**26 // max(row, 1)))
+        return [index[start:start + size]
+                for start in range(0, len(index), size)]
+
+    def _index_chunk(self, key):
+        ''' In-memory Triangle of the index entries at the positions, key '''
+        obj = self.copy(deep=False)
+        obj.kdims = self.kdims[key]
+        if self.array_backend == 'sparse':
+            obj._sparse_take(0, key)
+        else:
+            obj.values = self._index_values(key)
+        return obj
+
+    def _index_values(self, key):
+        ''' In-memory values of the index entries at the positions, key '''
+        if len(key) > 0 and np.all(np.diff(key) == 1):
+            return np.array(self._values[key[0]:key[-1] + 1])
+        return np.array(self._values[key])
+
+    def _chunk_of(self, other, key):
+        ''' The index entries, key, of an argument with the same index '''
+        if len(getattr(other, 'shape', ())) != 4 or \
+           other.shape[0] != self.shape[0]:
+            return other
+        if hasattr(other, 'kdims'):
+            return other._index_chunk(key)
+        return other[key]
+
+    def _memmap_map(self, func, index=None):
+        ''' Memory mapped array of func(values, key) applied to the values of
+            each chunk of the index entries, index '''
+        values, start = None, 0
+        keys = self._memmap_keys(index)
+        n_rows = sum(len(key) for key in keys)
+        for key in keys:
+            result = func(self._index_values(key), key)
+            if values is None:
+                values = self._new_memmap(
+                    (n_rows,) + result.shape[1:], result.dtype)
+            values[start:start + len(key)] = result
+            start = start + len(key)
+        return self._close_memmap(values)
+
+    def _memmap_apply(self, func):
+        ''' Applies func(chunk, key), an operation on the in-memory Triangle
+            of the index entries key, to each chunk of the index and writes
+            the values of the resulting Triangles to a new memory mapped
+            array '''
+        obj, values, kdims = None, None, []
+        for key in self._memmap_keys():
+            result = func(self._index_chunk(key), key)
+            if not isinstance(result, TriangleMemmap):
+                # Scalars of reductions of a single index entry
+                return result
+            if values is None:
+                obj = result
+                values = self._new_memmap(
+                    (self.shape[0],) + result.shape[1:], result.values.dtype)
+            values[key[0]:key[-1] + 1] = result.values
+            kdims.append(result.kdims)
+        obj.kdims = np.concatenate(kdims)
+        obj._set_memmap(self._close_memmap(values))
+        obj._set_slicers()
+        return obj
+
+    def _memmap_reduce(self, func):
+        ''' Sum of func(values, key) over each chunk of the index '''
+        total = None
+        for key in self._memmap_keys():
+            result = func(self._index_values(key), key)
+            total = result if total is None else total + result
+        return total
@@ -3,12 +3,17 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 import pandas as pd
 import numpy as np
-import copy
+import warnings
+from scipy import sparse
 
 
 class TriangleGroupBy:
+    ''' Groups of the index of a Triangle.  Aggregations sort the index
+        entries by group and reduce each contiguous segment of the sorted
+        values, so they use memory in proportion to the values and the result.
+    '''
     def __init__(self, old_obj, by):
-        obj = copy.deepcopy(old_obj)
+        obj = old_obj.copy(deep=False)
         if by != -1:
             indices = obj.index.groupby(by).indices
             new_index = obj.index.groupby(by).count().index
@@ -16,18 +21,69 @@ class TriangleGroupBy:
             indices = {'All': np.arange(len(obj.index))}
             new_index = pd.Index(['All'], name='All')
         groups = [indices[item] for item in sorted(list(indices.keys()))]
-        old_k_by_new_k = np.zeros(
-            (len(obj.index.index), len(groups)), dtype='bool')
-        for num, item in enumerate(groups):
-            old_k_by_new_k[:, num][item] = True
-        old_k_by_new_k = np.swapaxes(old_k_by_new_k, 0, 1)
-        for i in range(3):
-            old_k_by_new_k = old_k_by_new_k[..., np.newaxis]
-        self.old_k_by_new_k = old_k_by_new_k
+        self.groups = groups
+        # Index positions ordered by group and the first position of each
+        self.order = np.concatenate(groups)
+        self.starts = np.cumsum([0] + [len(item) for item in groups[:-1]])
+        self.n_keys = len(obj.kdims)
         obj.kdims = np.array(list(new_index))
         obj.key_labels = list(new_index.names)
         self.obj = obj
 
+    @property
+    def old_k_by_new_k(self):
+        ''' Indicator of the index entries of each group of shape
+            (groups, index, 1, 1, 1) '''
+        old_k_by_new_k = np.zeros(
+            (len(self.groups), self.n_keys), dtype='bool')
+        for num, item in enumerate(self.groups):
+            old_k_by_new_k[num, item] = True
+        return old_k_by_new_k[..., np.newaxis, np.newaxis, np.newaxis]
+
+    def _segments(self, func, x):
+        ''' Stacks func applied to the rows of x of each group '''
+        ends = list(self.starts[1:]) + [len(x)]
+        with warnings.catch_warnings():
+            # Cells that are missing for a whole group are missing
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.stack([func(x[start:end])
+                             for start, end in zip(self.starts, ends)])
+
+    def _reduce(self, v, ddof=0):
+        ''' The numpy nan-aggregation, v, of the index entries of each
+            group.  Cells that are missing for a whole group are missing. '''
+        x = self.obj.values[self.order]
+        x[~np.isfinite(x)] = np.nan
+        if v == 'nanmedian':
+            return self._segments(lambda x: np.nanmedian(x, axis=0), x)
+        count = np.add.reduceat(~np.isnan(x), self.starts, axis=0)
+        if v == 'count':
+            return count.astype('float64')
+        if v in ['nanmax', 'nanmin']:
+            func = np.fmax if v == 'nanmax' else np.fmin
+            return func.reduceat(x, self.starts, axis=0)
+        if v == 'nanprod':
+            x[np.isnan(x)] = 1
+            result = np.multiply.reduceat(x, self.starts, axis=0)
+        else:
+            np.nan_to_num(x, copy=False)
+            result = np.add.reduceat(x, self.starts, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if v in ['nanmean', 'nanvar', 'nanstd']:
+                result = result / count
+            if v in ['nanvar', 'nanstd']:
+                # Squared deviations from the mean of the group
+                x = self.obj.values[self.order] - np.repeat(
+                    result, [len(item) for item in self.groups], axis=0)
+                x[~np.isfinite(x)] = 0
+                result = np.add.reduceat(x * x, self.starts, axis=0) / \
+                    (count - ddof)
+                result[count - ddof <= 0] = np.nan
+            if v == 'nanstd':
+                result = np.sqrt(result)
+        result[count == 0] = np.nan
+        return result
+
     def quantile(self, q, axis=1, *args, **kwargs):
         """ Return values at the given quantile over requested axis.  If
             Triangle is convertible to DataFrame then pandas quantile
@@ -45,12 +101,9 @@ class TriangleGroupBy:
             Triangle
 
         """
-        x = self.obj.values*self.old_k_by_new_k
-        ignore_vector = np.sum(np.isnan(x), axis=1, keepdims=True) == \
-            x.shape[1]
-        x = np.where(ignore_vector, 0, x)
-        self.obj.values = \
-            getattr(np, 'nanpercentile')(x, q*100, axis=1, *args, **kwargs)
+        self.obj.values = self._segments(
+            lambda x: np.nanpercentile(x, q*100, axis=0, *args, **kwargs),
+            self.obj.values[self.order])
         self.obj.values[self.obj.values == 0] = np.nan
         return self.obj
 
@@ -145,8 +198,15 @@ class TrianglePandas:
         -------
             New Triangle with appended data.
         """
-        return_obj = copy.deepcopy(self)
+        return_obj = self.copy(deep=False)
         return_obj.kdims = (return_obj.index.append(other.index)).values
+        if self.array_backend == 'sparse' and \
+           self.shape[1:] == other.shape[1:]:
+            return_obj._set_sparse(
+                sparse.vstack((self._sparse, other.to_sparse()._sparse)),
+                (self.shape[0] + other.shape[0],) + self.shape[1:])
+            return_obj._set_slicers()
+            return return_obj
         try:
             return_obj.values = np.append(return_obj.values, other.values, axis=0)
         except:
@@ -200,49 +260,85 @@ class TrianglePandas:
         -------
             Triangle as new datatype.
         '''
-        obj = copy.deepcopy(self) if inplace is True else self
-        obj.values = obj.values.astype(dtype)
+        obj = self.copy(deep=False) if inplace is True else self
+        if obj.array_backend == 'sparse':
+            obj._sparse = obj._sparse.astype(dtype)
+        else:
+            obj.values = obj.values.astype(dtype)
         return obj
 
 
 def add_triangle_agg_func(cls, k, v):
     ''' Aggregate Overrides in Triangle '''
     def agg_func(self, axis=None, *args, **kwargs):
-            obj = copy.deepcopy(self)
-            if axis is None:
-                axis = min([num for num, _ in enumerate(obj.shape) if _ != 1])
-            else:
-                axis = self._get_axis(axis)
-            func = getattr(np, v)
-            kwargs.update({'keepdims': True})
+        obj = self.copy(deep=False)
+        if axis is None:
+            axis = min([num for num, _ in enumerate(obj.shape) if _ != 1])
+        else:
+            axis = self._get_axis(axis)
+        func = getattr(np, v)
+        kwargs.update({'keepdims': True})
+        if obj.array_backend == 'memmap' and axis != 0:
+            return obj._memmap_apply(lambda chunk, key: agg_func(
+                chunk, axis, *args, **kwargs))
+        if obj.array_backend == 'sparse' and v == 'nansum':
+            obj._sparse_sum(axis)
+        elif obj.array_backend == 'memmap' and v == 'nansum':
+            obj.values = obj._memmap_reduce(
+                lambda values, key: func(values, axis=0, **kwargs))
+        else:
             obj.values = func(obj.values, axis=axis, *args, **kwargs)
-            if axis == 0 and obj.values.shape[axis] == 1:
-                obj.kdims = np.array([None])
-                obj.key_labels = [None]
-            if axis == 1 and obj.values.shape[axis] == 1:
-                obj.vdims = np.array([None])
-            if axis == 2 and obj.values.shape[axis] == 1:
-                obj.odims = np.array([None])
-            if axis == 3 and obj.values.shape[axis] == 1:
-                obj.ddims = np.array([None])
-            obj._set_slicers()
-            obj.values = obj.values * obj._expand_dims(obj._nan_triangle())
+        if axis == 0 and obj.shape[axis] == 1:
+            obj.kdims = np.array([None])
+            obj.key_labels = [None]
+        if axis == 1 and obj.shape[axis] == 1:
+            obj.vdims = np.array([None])
+        if axis == 2 and obj.shape[axis] == 1:
+            obj.odims = np.array([None])
+        if axis == 3 and obj.shape[axis] == 1:
+            obj.ddims = np.array([None])
+        obj._set_slicers()
+        if obj.array_backend == 'sparse':
+            obj._sparse_nan_mask()
+        else:
+            obj.values = obj.values * \
+                obj._expand_dims(obj._nan_triangle())
             obj.values[obj.values == 0] = np.nan
-            if obj.shape == (1, 1, 1, 1):
-                return obj.values[0, 0, 0, 0]
-            else:
-                return obj
+        if obj.shape == (1, 1, 1, 1):
+            return obj.values[0, 0, 0, 0]
+        else:
+            return obj
     set_method(cls, agg_func, k)
 
 
 def add_groupby_agg_func(cls, k, v):
     ''' Aggregate Overrides in GroupBy '''
     def agg_func(self, axis=1, *args, **kwargs):
-        obj = copy.deepcopy(self.obj)
-        x = np.broadcast_to(
-            self.obj.values,
-            (self.old_k_by_new_k.shape[0], *self.obj.values.shape)) * \
-            self.old_k_by_new_k
+        obj = self.obj.copy(deep=False)
+        if obj.array_backend in ['sparse', 'memmap'] and v == 'nansum':
+            # Sum the index keys of each group with an indicator matrix
+            groups = sparse.csr_matrix(
+                (np.ones(sum(len(item) for item in self.groups)),
+                 (np.repeat(np.arange(len(self.groups)),
+                            [len(item) for item in self.groups]),
+                  np.concatenate(self.groups))),
+                shape=(len(self.groups), obj.shape[0]))
+            shape = (len(self.groups),) + obj.shape[1:]
+            if obj.array_backend == 'sparse':
+                obj._set_sparse(groups.dot(obj._sparse), shape)
+                return obj
+            obj.values = obj._memmap_reduce(
+                lambda values, key: groups[:, key[0]:key[-1] + 1].dot(
+                    np.where(np.isfinite(values), values, 0).reshape(
+                        len(key), -1)).reshape(shape))
+            obj.values[obj.values == 0] = np.nan
+            return obj
+        if v in _segment_funcs and len(args) == 0 and \
+           set(kwargs).issubset(['ddof']):
+            obj.values = self._reduce(v, **kwargs)
+            obj.values[obj.values == 0] = np.nan
+            return obj
+        x = np.where(self.old_k_by_new_k, self.obj.values, np.nan)
         ignore_vector = np.sum(np.isnan(x), axis=1, keepdims=True) == \
             x.shape[1]
         x = np.where(ignore_vector, 0, x)
@@ -280,6 +376,11 @@ agg_funcs = {**agg_funcs, **{item: item for item in more_aggs}}
 for item in df_passthru:
     add_df_passthru(TrianglePandas, item)
 
+# Aggregations of groups that reduce the segments of the sorted index
+_segment_funcs = ['nansum', 'nanmean', 'nanmedian', 'nanmax', 'nanmin',
+                  'nanprod', 'nanvar', 'nanstd', 'count']
+
 for k, v in agg_funcs.items():
     add_triangle_agg_func(TrianglePandas, k, v)
     add_groupby_agg_func(TriangleGroupBy, k, v)
+add_groupby_agg_func(TriangleGroupBy, 'count', 'count')
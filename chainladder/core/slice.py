@@ -3,7 +3,7 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 import pandas as pd
 import numpy as np
-import copy
+from chainladder.core.memmap import index_chunked
 
 
 class _LocBase:
@@ -11,20 +11,30 @@ class _LocBase:
     def __init__(self, obj):
         self.obj = obj
 
-    def get_idx(self, idx):
-        ''' Returns a slice of the original Triangle '''
-        obj = copy.deepcopy(self.obj)
-        vdims = pd.Series(obj.vdims)
+    def get_idx(self, idx, ordered=False):
+        ''' Returns a slice of the original Triangle.  Index positions are
+            taken in the order selected and column positions in the order of
+            the Triangle unless ordered is True. '''
+        obj = self.obj.copy(deep=False)
         obj.kdims = np.array(idx.index.unique())
-        # Honor order of column labels
-        obj.vdims = np.array(vdims[vdims.isin(idx.columns.unique())])
         obj.key_labels = list(idx.index.names)
-        obj.iloc, obj.loc = Ilocation(obj), Location(obj)
-        idx_slice = np.array(idx).flatten()
-        x = tuple([np.unique(np.array(item))
-                   for item in list(zip(*idx_slice))])
-        obj.values = obj.values[x[0]][:, x[1]]
-        obj.values[obj.values == 0] = np.nan
+        codes = np.asarray(idx, dtype='int64').flatten()
+        x = (pd.unique(codes // len(self.obj.vdims)),
+             (pd.unique if ordered else np.unique)(
+                 codes % len(self.obj.vdims)))
+        obj.vdims = np.array(pd.Series(obj.vdims).iloc[x[1]])
+        if obj.array_backend == 'sparse':
+            obj._sparse_take(0, x[0])
+            obj._sparse_take(1, x[1])
+        elif obj.array_backend == 'memmap':
+            def take(values, key):
+                values = values[:, x[1]]
+                values[values == 0] = np.nan
+                return values
+            obj._set_memmap(obj._memmap_map(take, x[0]))
+        else:
+            obj.values = obj.values[np.ix_(x[0], x[1])]
+            obj.values[obj.values == 0] = np.nan
         return obj
 
 
@@ -54,22 +64,33 @@ class TriangleSlicer:
             else:
                 # One row selection
                 idx = idx.to_frame()
-        elif type(idx) is tuple:
+        elif np.ndim(idx) == 0:
             # Single cell selection
-            idx = self._idx_table().iloc[idx[0]:idx[0] + 1,
-                                         idx[1]:idx[1] + 1]
+            k, v = divmod(int(idx), len(self.vdims))
+            idx = self._idx_table().iloc[k:k + 1, v:v + 1]
         return idx
 
     def _idx_table(self):
-        ''' private method that generates a dataframe of triangle indices.
+        ''' private method that returns a dataframe of triangle indices.
             The dataframe is meant ot be sliced using pandas and the resultant
-            indices are then to be extracted from the Triangle object.
+            indices are then to be extracted from the Triangle object.  Each
+            cell holds index position * len(columns) + column position.  The
+            dataframe is built once for each index and columns and must not
+            be modified.
         '''
-        df = pd.DataFrame(list(self.kdims), columns=self.key_labels)
-        for num, item in enumerate(self.vdims):
-            df[item] = list(zip(np.arange(len(df)),
-                            (np.ones(len(df))*num).astype(int)))
-        df.set_index(self.key_labels, inplace=True)
+        axes = (self.kdims, self.vdims, self.key_labels)
+        cached = self.__dict__.get('_idx_table_')
+        if cached is not None and all(
+                a is b for a, b in zip(cached[0], axes)) and \
+           cached[1].shape == (len(self.kdims), len(self.vdims)):
+            return cached[1]
+        index = pd.DataFrame(list(self.kdims), columns=self.key_labels) \
+                  .set_index(self.key_labels).index
+        df = pd.DataFrame(
+            np.arange(len(self.kdims) * len(self.vdims), dtype='int64')
+              .reshape(len(self.kdims), len(self.vdims)),
+            index=index, columns=self.vdims)
+        self._idx_table_ = (axes, df)
         return df
 
     def __getitem__(self, key):
@@ -89,44 +110,51 @@ class TriangleSlicer:
         else:
             idx = self._idx_table()[key]
             idx = self._idx_table_format(idx)
-            obj = _LocBase(self).get_idx(idx)
-            if type(key) is not str and key != list(obj.vdims):
-                # Honor order of the slice
-                obj2 = obj[key[0]]
-                for item in key[1:]:
-                    obj2[item] = obj[item]
-                return obj2
-            else:
-                return _LocBase(self).get_idx(idx)
+            # Honor order of the slice
+            return _LocBase(self).get_idx(idx, ordered=type(key) is not str)
 
     def __setitem__(self, key, value):
-        ''' Function for pandas style column indexing setting '''
-        idx = self._idx_table()
-        idx[key] = 1
-        if key in self.vdims:
-            i = np.where(self.vdims == key)[0][0]
-            self.values[:, i:i+1] = value.values
-        else:
-            self.vdims = np.array(idx.columns.unique())
-            try:
-                self.values = np.append(self.values, value.values, axis=1)
-            except:
-                # For misaligned triangle support
-                self.values = np.append(
-                    self.values,
-                    (self.iloc[:, 0]*0+value).values, axis=1)
-
-
+        ''' Function for pandas style column indexing setting.  A list of
+            columns is set to the columns of value in a single pass. '''
+        keys = key if type(key) is list else [key]
+        columns = self._idx_table().columns
+        columns = columns.append(
+            pd.Index([item for item in keys if item not in columns])).unique()
+        if self.array_backend == 'sparse' and len(keys) == 1 and \
+           value.shape[1] == 1 and value.shape[0] == self.shape[0] and \
+           value.shape[2:] == self.shape[2:]:
+            self._sparse_setitem(keys[0], value)
+            self.vdims = np.array(columns)
+            return
+        other = value.values
+        if len(keys) == 1 and other.shape[2:] != self.shape[2:]:
+            # For misaligned triangle support
+            other = (self.iloc[:, 0]*0+value).values
+        values = self.values
+        new_values = np.empty(
+            values.shape[:1] + (len(columns),) + values.shape[2:],
+            dtype=np.result_type(values, other))
+        new_values[:, :values.shape[1]] = values
+        new_values[:, columns.get_indexer(keys)] = other
+        if len(columns) != len(self.vdims):
+            self.vdims = np.array(columns)
+        self.values = new_values
+
+    @index_chunked
     def _slice_origin(self, key):
         ''' private method for handling of origin slicing '''
-        obj = copy.deepcopy(self)
+        obj = self.copy(deep=False)
         obj.odims = obj.odims[key]
-        obj.values = obj.values[..., key, :]
+        if obj.array_backend == 'sparse':
+            obj._sparse_take(2, key)
+        else:
+            obj.values = obj.values[..., key, :]
         return self._cleanup_slice(obj)
 
+    @index_chunked
     def _slice_valuation(self, key):
         ''' private method for handling of valuation slicing '''
-        obj = copy.deepcopy(self)
+        obj = self.copy(deep=False)
         obj.valuation_date = min(
             obj.valuation[key].max().to_timestamp(how='e'), obj.valuation_date)
         key = key.reshape(self.shape[-2:], order='f')
@@ -139,26 +167,41 @@ class TriangleSlicer:
         obj.odims = obj.odims[np.sum(np.isnan(nan_tri), 1) != d]
         if len(obj.ddims) > 1:
             obj.ddims = obj.ddims[np.sum(np.isnan(nan_tri), 0) != o]
-        obj.values = (obj.values*nan_tri)
-        obj.values = np.take(np.take(obj.values, o_idx, -2), d_idx, -1)
+        if obj.array_backend == 'sparse':
+            obj._sparse_ufunc(np.multiply, nan_tri)
+            obj._sparse_take(2, o_idx)
+            obj._sparse_take(3, d_idx)
+        else:
+            obj.values = (obj.values*nan_tri)
+            obj.values = np.take(np.take(obj.values, o_idx, -2), d_idx, -1)
         return self._cleanup_slice(obj)
 
+    @index_chunked
     def _slice_development(self, key):
         ''' private method for handling of development slicing '''
-        obj = copy.deepcopy(self)
+        obj = self.copy(deep=False)
         obj.ddims = obj.ddims[key]
-        obj.values = obj.values[..., key]
+        if obj.array_backend == 'sparse':
+            obj._sparse_take(3, key)
+        else:
+            obj.values = obj.values[..., key]
         return self._cleanup_slice(obj)
 
     def _cleanup_slice(self, obj):
         ''' private method with common post-slicing functionality'''
         obj.valuation = obj._valuation_triangle()
-        if hasattr(obj, '_nan_triangle_'):
-            # Force update on _nan_triangle at next access.
-            del obj._nan_triangle_
-            obj._nan_triangle_ = obj._nan_triangle()
         return obj
 
+    @property
+    def iloc(self):
+        return Ilocation(self)
+
+    @property
+    def loc(self):
+        return Location(self)
+
     def _set_slicers(self):
-        ''' Call any time the shape of index or column changes '''
-        self.iloc, self.loc = Ilocation(self), Location(self)
+        ''' loc and iloc are created on access, so they always follow the
+            current index and columns and do not keep the Triangle in a
+            reference cycle that only the garbage collector can free. '''
+        pass
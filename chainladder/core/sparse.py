@@ -0,0 +1,212 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import numpy as np
+from scipy import sparse
+
+
+class TriangleSparse:
+    ''' Sparse storage of Triangle values.
+
+    A sparse Triangle holds its 4D values as a scipy.sparse CSR matrix with
+    one row per index key and one column per (column, origin, development)
+    cell. Cells that are not stored are NaN, which is consistent with the
+    treatment of zeros as NaN in dense triangles.  Index sums and groupby
+    sums, arithmetic, slicing, ``latest_diagonal``, ``incr_to_cum``,
+    ``cum_to_incr`` and ``grain`` work on the stored cells directly.  Any
+    other functionality reads ``values``, which returns a dense copy of the
+    data.
+    '''
+    def to_sparse(self):
+        ''' Converts the Triangle to sparse storage.
+
+        Returns
+        -------
+            Triangle
+        '''
+        obj = self.copy(deep=False)
+        if self.array_backend != 'sparse':
+            values = self.values
+            # Values without nans, such as the latest diagonal, keep their 0s
+            fill = np.nan if np.any(np.isnan(values)) else 0
+            values = np.nan_to_num(values)
+            obj._set_sparse(values.reshape(values.shape[0], -1), values.shape,
+                            fill)
+        return obj
+
+    def to_dense(self):
+        ''' Converts the Triangle to dense numpy storage.
+
+        Returns
+        -------
+            Triangle
+        '''
+        obj = self.copy(deep=False)
+        if self.array_backend == 'memmap':
+            obj.values = np.array(self.values)
+        else:
+            obj.values = self.values
+        return obj
+
+    def _set_sparse(self, matrix, shape, fill=np.nan):
+        ''' Stores a 2D matrix of shape (index, column*origin*development)
+            as the values of the Triangle.  Cells that are not stored become
+            fill when the values are made dense. '''
+        matrix = sparse.csr_matrix(matrix)
+        matrix.data[np.isnan(matrix.data)] = 0
+        matrix.eliminate_zeros()
+        self._sparse = matrix
+        self._shape = tuple(shape)
+        self._sparse_fill = fill
+        self._values = None
+        self.array_backend = 'sparse'
+
+    def _sparse_to_dense(self):
+        values = self._sparse.toarray().reshape(self._shape)
+        values[values == 0] = getattr(self, '_sparse_fill', np.nan)
+        return values
+
+    def _sparse_coords(self):
+        ''' Returns the 4D coordinates and data of the stored cells '''
+        coo = self._sparse.tocoo()
+        v, o, d = np.unravel_index(coo.col, self._shape[1:])
+        return (coo.row, v, o, d), coo.data
+
+    def _set_sparse_coords(self, coords, data, shape):
+        ''' Stores data at the given 4D coordinates.  Data at duplicate
+            coordinates is summed. '''
+        col = np.ravel_multi_index(coords[1:], shape[1:])
+        matrix = sparse.coo_matrix(
+            (data, (coords[0], col)),
+            shape=(shape[0], int(np.prod(shape[1:])))).tocsr()
+        self._set_sparse(matrix, shape)
+
+    def _sparse_nan_mask(self):
+        ''' Drops the stored cells that fall outside of the nan triangle '''
+        coords, data = self._sparse_coords()
+        mask = np.nan_to_num(self._nan_triangle())[coords[2], coords[3]]
+        self._set_sparse_coords(coords, data * mask, self._shape)
+
+    def _sparse_take(self, axis, idx):
+        ''' Selects the distinct indices, idx, along an axis '''
+        idx = np.arange(self._shape[axis])[idx]
+        if len(np.unique(idx)) != len(idx):
+            self.values = np.take(self.values, idx, axis)
+            return
+        position = np.repeat(-1, self._shape[axis])
+        position[idx] = np.arange(len(idx))
+        coords, data = self._sparse_coords()
+        coords = list(coords)
+        coords[axis] = position[coords[axis]]
+        keep = coords[axis] >= 0
+        shape = list(self._shape)
+        shape[axis] = len(idx)
+        self._set_sparse_coords(
+            [item[keep] for item in coords], data[keep], shape)
+
+    def _sparse_setitem(self, key, value):
+        ''' Sets the column, key, to the values of a single column Triangle
+            of the same index, origin and development '''
+        coords, data = self._sparse_coords()
+        value = value.to_sparse()._sparse_coords()
+        shape = list(self._shape)
+        if key in self.vdims:
+            num = np.where(self.vdims == key)[0][0]
+            keep = coords[1] != num
+            coords, data = [item[keep] for item in coords], data[keep]
+        else:
+            num = shape[1]
+            shape[1] = shape[1] + 1
+        coords = [np.concatenate((item, other)) for item, other in
+                  zip(coords, value[0])]
+        coords[1][len(data):] = num
+        self._set_sparse_coords(
+            coords, np.concatenate((data, value[1])), shape)
+
+    def _sparse_sum(self, axis):
+        ''' Sums the stored cells over an axis, keeping its dimension '''
+        coords, data = self._sparse_coords()
+        coords = list(coords)
+        coords[axis] = np.zeros(len(data), dtype=coords[axis].dtype)
+        shape = list(self._shape)
+        shape[axis] = 1
+        self._set_sparse_coords(coords, data, shape)
+
+    def _sparse_other(self, other):
+        ''' Returns the values of other at each stored cell or None if other
+            cannot be aligned to the stored cells without densifying '''
+        if type(other) in [int, float, np.float64, np.int64]:
+            return other
+        if sparse.issparse(other):
+            if other.shape != self._sparse.shape:
+                return None
+            coo = self._sparse.tocoo()
+            if coo.nnz == 0:
+                return np.array([])
+            other = np.asarray(other[coo.row, coo.col]).flatten()
+            return np.where(other == 0, np.nan, other)
+        other = np.asarray(other)
+        if other.ndim > 4:
+            return None
+        shape = (1,) * (4 - other.ndim) + other.shape
+        if any(b not in [1, a] for a, b in zip(self._shape, shape)):
+            return None
+        coords, data = self._sparse_coords()
+        return np.broadcast_to(other, self._shape)[coords]
+
+    def _sparse_ufunc(self, func, other):
+        ''' Applies func to the stored cells and the aligned values of other.
+            Returns False if other could not be aligned. '''
+        other = self._sparse_other(other)
+        if other is None:
+            return False
+        coords, data = self._sparse_coords()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            data = func(data, other)
+        self._set_sparse_coords(coords, data, self._shape)
+        return True
+
+    def _sparse_development_apply(self, func):
+        ''' Applies func along the development axis of each stored
+            (index, column, origin) vector and masks the result with the nan
+            triangle '''
+        coords, data = self._sparse_coords()
+        row = np.ravel_multi_index(coords[:3], self._shape[:3])
+        row, inverse = np.unique(row, return_inverse=True)
+        block = np.zeros((len(row), self._shape[3]), dtype=data.dtype)
+        block[inverse, coords[3]] = data
+        k, v, o = np.unravel_index(row, self._shape[:3])
+        block = func(block) * np.nan_to_num(self._nan_triangle())[o]
+        r, d = np.nonzero(block)
+        self._set_sparse_coords(
+            (k[r], v[r], o[r], d), block[r, d], self._shape)
+
+    def _sparse_grain(self, grain):
+        ''' grain of a sparse development triangle.  Each incremental cell
+            is summed into the cell of the new grain whose development age is
+            the first to include the cell's valuation. '''
+        obj = self.copy(deep=False)
+        obj.incr_to_cum(inplace=True)
+        # Missing cumulative cells carry forward the prior value
+        obj._sparse_development_apply(lambda x: x[
+            np.arange(len(x))[:, np.newaxis], obj._last_filled(x)])
+        obj.cum_to_incr(inplace=True)
+        origin, o_map, odims, ddims = obj._grain_axes(grain)
+        valuation = origin[:, np.newaxis] + \
+            np.array(obj.ddims, dtype='int64')[np.newaxis] - 1
+        (k, v, o, d), data = obj._sparse_coords()
+        d = np.searchsorted(ddims, valuation[o, d] - odims[o_map[o]] + 1)
+        keep = d < len(ddims)
+        o = o_map[o]
+        obj._set_sparse_coords(
+            (k[keep], v[keep], o[keep], d[keep]), data[keep],
+            (obj.shape[0], obj.shape[1], len(odims), len(ddims)))
+        obj.odims = obj._from_months(odims)
+        obj.ddims = ddims
+        obj.origin_grain = grain[1:2]
+        obj.development_grain = grain[-1]
+        obj.valuation = obj._valuation_triangle()
+        obj._sparse_nan_mask()
+        if self.is_cumulative:
+            obj = obj.incr_to_cum()
+        return obj
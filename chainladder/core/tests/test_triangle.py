@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from numpy.testing import assert_equal
 import copy
+import os
 
 tri = cl.load_dataset('clrd')
 qtr = cl.load_dataset('quarterly')
@@ -31,6 +32,28 @@ def test_slice_by_loc_iloc():
     assert tri.groupby('LOB').sum().loc['comauto'].index.iloc[0, 0] == 'comauto'
 
 
+def test_slice_positions():
+    assert tri._idx_table() is tri._idx_table()
+    assert_equal(tri.iloc[[5, 2]].values, tri.values[[5, 2]])
+    assert_equal(tri.iloc[3, 1].values, tri.values[3:4, 1:2])
+    assert_equal(tri.iloc[:, [4, 1]].values, tri.values[:, [1, 4]])
+    renamed = tri.copy(deep=False)
+    renamed.columns = ['a', 'b', 'c', 'd', 'e', 'f']
+    assert list(renamed._idx_table().columns) == list(renamed.columns)
+    assert_equal(renamed['c'].values, tri.values[:, 2:3])
+
+
+def test_multi_column_getset():
+    cols = ['IncurLoss', 'BulkLoss', 'CumPaidLoss']
+    assert list(tri[cols].columns) == cols
+    assert_equal(tri[cols].values, tri.values[:, [5, 0, 1]])
+    new = tri[cols]
+    new[['a', 'IncurLoss', 'b']] = \
+        tri[['BulkLoss', 'CumPaidLoss', 'IncurLoss']]
+    assert list(new.columns) == cols + ['a', 'b']
+    assert_equal(new.values, tri.values[:, [1, 0, 1, 0, 5]])
+
+
 def test_repr():
     np.testing.assert_equal(pd.read_html(cl.load_dataset('raa')._repr_html_())[0].set_index('Origin').values,
                             cl.load_dataset('raa').to_frame().values)
@@ -72,6 +95,29 @@ def test_multilevel_index_groupby_sum2():
     assert a == b
 
 
+def test_groupby_mean_of_group_members():
+    ppauto = tri['CumPaidLoss'][tri['LOB'] == 'ppauto'].values
+    np.testing.assert_allclose(
+        tri['CumPaidLoss'].groupby('LOB').mean().loc['ppauto'].values[0],
+        np.nanmean(ppauto, 0))
+
+
+def test_groupby_aggregations_of_group_members():
+    ppauto = tri['CumPaidLoss'][tri['LOB'] == 'ppauto'].values
+    grouped = tri['CumPaidLoss'].groupby('LOB')
+    for name, expected in [
+            ('max', np.nanmax(ppauto, 0)), ('min', np.nanmin(ppauto, 0)),
+            ('std', np.nanstd(ppauto, 0)),
+            ('count', np.sum(~np.isnan(ppauto), 0))]:
+        np.testing.assert_allclose(
+            np.nan_to_num(getattr(grouped, name)().loc['ppauto'].values[0]),
+            np.nan_to_num(expected))
+    np.testing.assert_allclose(
+        np.nan_to_num(tri['CumPaidLoss'].groupby('LOB').quantile(0.25)
+                      .loc['ppauto'].values[0]),
+        np.nan_to_num(np.nanpercentile(ppauto, 25, 0)))
+
+
 def test_boolean_groupby_eq_groupby_loc():
     np.testing.assert_equal(tri[tri['LOB']=='ppauto'].sum().values,
                         tri.groupby('LOB').sum().loc['ppauto'].values)
@@ -259,3 +305,228 @@ def test_commutative():
     assert full.cum_to_incr().grain('OYDY').val_to_dev() == full.val_to_dev().cum_to_incr().grain('OYDY')
     assert np.allclose(np.nan_to_num(full.grain('OYDY').cum_to_incr().val_to_dev().incr_to_cum().values),
             np.nan_to_num(full.val_to_dev().grain('OYDY').values), atol=1e-5)
+
+
+def test_misaligned_arithmetic():
+    raa = cl.load_dataset('raa')
+    old = raa[raa.valuation < '1987']
+    late = raa[raa.origin > '1983']
+    total = old + late
+    assert raa._alignment_plan(late) is raa._alignment_plan(late)
+    assert total.shape == (1, 1, 10, 10)
+    assert np.all(total.odims == raa.odims)
+    values = np.nan_to_num(raa.values)
+    expected = np.where(np.array(raa.valuation < '1987').reshape(
+        raa.shape[2:], order='f'), values, 0) + \
+        np.where(np.arange(10)[:, np.newaxis] > 2, values, 0)
+    assert np.allclose(np.nan_to_num(total.values),
+                       expected * np.nan_to_num(total._nan_triangle()))
+    assert (old - late).shape == total.shape
+    assert np.all(np.isnan(old.values) == np.isnan(
+        raa[raa.valuation < '1987'].values))
+
+
+def test_inplace_arithmetic():
+    raa = cl.load_dataset('raa')
+    tri = raa.copy()
+    values = tri.values
+    tri += raa
+    tri *= 2
+    assert tri.values is values
+    assert tri == (raa + raa) * 2
+    view = tri.copy(deep=False)
+    tri -= raa
+    assert tri.values is not values and view.values is values
+    assert tri == (raa + raa) * 2 - raa
+    tri /= raa[raa.valuation < '1987']
+    assert tri == ((raa + raa) * 2 - raa) / raa[raa.valuation < '1987']
+
+
+def test_shared_values():
+    raa = cl.load_dataset('raa')
+    incr, val = raa.cum_to_incr(), raa.dev_to_val()
+    pairs = [(raa, raa.set_index(raa.index)), (raa, raa.incr_to_cum()),
+             (incr, incr.cum_to_incr()), (raa, raa.val_to_dev()),
+             (val, val.dev_to_val())]
+    for parent, child in pairs:
+        expected = parent.values.copy()
+        child.values[..., 0, 0] = 0
+        assert_equal(parent.values, expected)
+    for op in ['__iadd__', '__isub__', '__imul__', '__itruediv__']:
+        for parent, child in pairs + [(raa, raa.copy(deep=False))]:
+            expected = parent.values.copy()
+            getattr(child, op)(2)
+            assert_equal(parent.values, expected)
+
+
+def test_held_inplace_arithmetic():
+    raa = cl.load_dataset('raa')
+    dev = cl.Development().fit(raa)
+    model = cl.Chainladder().fit(dev.transform(raa))
+    for est, attr in [(dev, 'ldf_'), (dev, 'cdf_'), (model, 'X_'),
+                      (model, 'ultimate_'), (model, 'ibnr_')]:
+        expected = getattr(est, attr).values.copy()
+        for op in ['__iadd__', '__isub__', '__imul__', '__itruediv__']:
+            tri = getattr(est, attr)
+            tri = getattr(tri, op)(2)
+            tri = getattr(tri, op)(raa.latest_diagonal)
+            assert_equal(getattr(est, attr).values, expected)
+
+
+def test_eval():
+    clrd = cl.load_dataset('clrd')
+    olf = clrd['EarnedPremNet'] * 0 + 1.05
+    expected = (clrd['IncurLoss'] - clrd['BulkLoss']) * olf / \
+        clrd['EarnedPremNet']
+    result = clrd.eval('(IncurLoss - BulkLoss) * olf / EarnedPremNet',
+                       local_dict={'olf': olf})
+    assert result.shape == expected.shape
+    assert np.all(result.vdims == expected.vdims)
+    assert np.allclose(np.nan_to_num(result.values),
+                       np.nan_to_num(expected.values))
+    assert np.all(np.isnan(result.values) == np.isnan(expected.values))
+    assert clrd.eval('-2 / CumPaidLoss') == -2 / clrd['CumPaidLoss']
+    clrd.eval('CaseIncur = IncurLoss - BulkLoss', inplace=True)
+    assert clrd['CaseIncur'] == clrd['IncurLoss'] - clrd['BulkLoss']
+
+
+def test_unordered_records():
+    path = os.path.join(os.path.dirname(cl.__file__), 'utils', 'data')
+    df = pd.read_csv(os.path.join(path, 'clrd.csv')).sample(
+        frac=1., random_state=42)
+    df = df.append(df.iloc[:10].assign(LOB=np.nan))
+    shuffled = cl.Triangle(
+        df, origin='AccidentYear', development='DevelopmentYear',
+        index=['GRNAME', 'LOB'], columns=list(tri.columns))
+    assert_equal(shuffled.kdims, tri.kdims)
+    assert_equal(shuffled.values, tri.values)
+
+
+def test_pinned_date_format():
+    raa = cl.load_dataset('raa')
+    path = os.path.join(os.path.dirname(cl.__file__), 'utils', 'data')
+    df = pd.read_csv(os.path.join(path, 'raa.csv'))
+    df['origin'] = df['origin'].astype(str) + '-01-01'
+    pinned = cl.Triangle(df, origin='origin', development='development',
+                         columns='values', origin_format='%Y-%m-%d',
+                         development_format=raa.development_format)
+    assert (raa.origin_format, pinned.origin_format) == ('%Y', '%Y-%m-%d')
+    assert_equal(pinned.values, raa.values)
+
+
+def test_nan_triangle_is_pure():
+    raa = cl.load_dataset('raa')
+    for obj in [raa, raa.grain('OYDY'), raa.dev_to_val(),
+                raa.dev_to_val().val_to_dev(), raa[raa.development <= 48],
+                raa[raa.valuation < '1985'],
+                raa + raa[raa.development <= 48]]:
+        valuation = obj.valuation
+        obj._nan_triangle()
+        assert obj.valuation is valuation
+        assert len(valuation) == np.prod(obj.shape[-2:])
+
+
+def test_date_cache():
+    from chainladder.core.base import _parse_dates, _date_cache
+    # Mixed strings have no format and parse in the context of the array
+    mixed = np.array(['2000-01-01', 'March 2001'], dtype=object)
+    dates, format = _parse_dates(mixed)
+    assert format is None
+    assert all((value, None) not in _date_cache for value in mixed)
+    dated = np.array(['2000-01-15', '2001-03-01'], dtype=object)
+    dates, format = _parse_dates(dated)
+    assert format == '%Y-%m-%d'
+    assert all((value, format) in _date_cache for value in dated)
+    assert_equal(_parse_dates(dated)[0], dates)
+
+
+def test_sparse_backend():
+    sparse = cl.load_dataset('clrd', array_backend='sparse')
+    assert sparse.array_backend == 'sparse'
+    np.testing.assert_equal(sparse.values, tri.values)
+    np.testing.assert_equal(sparse.to_dense().values, tri.values)
+    np.testing.assert_equal(tri.to_sparse().values, tri.values)
+
+
+def test_sparse_operations():
+    sparse = tri.to_sparse()
+    tests = [lambda x: x.groupby('LOB').sum(),
+             lambda x: x.sum(axis=2),
+             lambda x: x.latest_diagonal,
+             lambda x: x.cum_to_incr(),
+             lambda x: x.cum_to_incr().incr_to_cum(),
+             lambda x: x.iloc[:10]['CumPaidLoss'],
+             lambda x: x - x / 2 * x.sum(axis=2),
+             lambda x: x[x.valuation < x.valuation_date]]
+    for test in tests:
+        result = test(sparse)
+        assert result.array_backend == 'sparse'
+        np.testing.assert_allclose(
+            np.nan_to_num(result.values), np.nan_to_num(test(tri).values))
+    assert_equal(sparse.latest_diagonal.values, tri.latest_diagonal.values)
+    assert_equal(tri.latest_diagonal.to_sparse().values,
+                 tri.latest_diagonal.values)
+    result = qtr.to_sparse().grain('OYDY')
+    assert result.array_backend == 'sparse'
+    np.testing.assert_allclose(np.nan_to_num(result.values),
+                               np.nan_to_num(qtr.grain('OYDY').values))
+
+
+def test_memmap_operations():
+    memmap = tri.to_memmap(chunk_size=100)
+    assert memmap.array_backend == 'memmap'
+    assert isinstance(memmap.values, np.memmap)
+    tests = [lambda x: x.groupby('LOB').sum(),
+             lambda x: x.sum(),
+             lambda x: x.sum(axis=2),
+             lambda x: x.latest_diagonal,
+             lambda x: x.cum_to_incr(),
+             lambda x: x.cum_to_incr().incr_to_cum(),
+             lambda x: x.iloc[:150]['CumPaidLoss'],
+             lambda x: x - x / 2 * x.sum(axis=2),
+             lambda x: x[x.valuation < x.valuation_date],
+             lambda x: cl.Development().fit(x).ldf_]
+    for test in tests:
+        result = test(memmap)
+        np.testing.assert_allclose(
+            np.nan_to_num(result.values), np.nan_to_num(test(tri).values))
+        assert_equal(result.kdims, test(tri).kdims)
+    assert memmap.latest_diagonal.array_backend == 'memmap'
+    assert memmap.sum().array_backend == 'numpy'
+    assert not memmap.values.flags.writeable
+
+
+def test_grain_monthly():
+    origin, lag = [item.flatten() for item in np.mgrid[:36, :36]]
+    origin, lag = origin[origin + lag < 36], lag[origin + lag < 36]
+    start = np.datetime64('2015-01', 'M')
+    df = pd.DataFrame({
+        'origin': (start + origin).astype('datetime64[ns]'),
+        'development': (start + origin + lag).astype('datetime64[ns]'),
+        'paid': origin + lag + 1.})
+    omdm = cl.Triangle(df, origin='origin', development='development',
+                       columns='paid', cumulative=False)
+    assert omdm.grain('OQDQ').grain('OYDY') == omdm.grain('OYDY')
+    assert omdm.grain('OYDY').shape == (1, 1, 3, 3)
+    assert np.nansum(omdm.grain('OYDY').values) == np.nansum(omdm.values)
+
+
+def test_valdev_carry_forward():
+    raa = cl.load_dataset('raa')
+    incr = raa.cum_to_incr()
+    values = raa.values.copy()
+    values[0, 0, 0, 3] = np.nan
+    raa.values = values
+    assert raa.dev_to_val().values[0, 0, 0, 3] == values[0, 0, 0, 2]
+    values = incr.values.copy()
+    values[0, 0, 0, 3] = np.nan
+    incr.values = values
+    assert np.isnan(incr.dev_to_val().values[0, 0, 0, 3])
+
+
+def test_valdev_incremental_grain():
+    q = cl.load_dataset('quarterly')
+    a = q.cum_to_incr().dev_to_val().grain('OYDY').incr_to_cum()
+    b = q.dev_to_val().grain('OYDY')
+    assert a == b
+    assert q._nan_triangle() is q.iloc[:, :1]._nan_triangle()
@@ -4,10 +4,10 @@
 
 import pandas as pd
 import numpy as np
-import copy
 
 
 from chainladder.core.base import TriangleBase
+from chainladder.core.memmap import index_chunked
 
 
 class Triangle(TriangleBase):
@@ -42,6 +42,11 @@ class Triangle(TriangleBase):
         Whether the triangle is cumulative or incremental.  This attribute is
         required to use the `grain` and `dev_to_val` methods and will be
         automatically set when invoking `cum_to_incr` or `incr_to_cum` methods.
+    array_backend : str (options: ['numpy', 'sparse'])
+        Storage of the triangle values.  'sparse' stores only the populated
+        cells and is intended for triangles with a large index, such as
+        policy level data, where most cells are empty.  Use ``to_memmap``
+        for triangles that do not fit in memory.
 
     Attributes
     ----------
@@ -61,6 +66,12 @@ class Triangle(TriangleBase):
         Displays age-to-age ratios for the triangle.
     valuation_date : date
         The latest valuation date of the data
+    origin_format : str or None
+        The date format used to parse the origin of the data.  If it was
+        inferred, it can be passed as ``origin_format`` to pin it on later
+        loads of similar data.  None if no format could be inferred.
+    development_format : str or None
+        The date format used to parse the development of the data.
     loc : Triangle
         pandas-style ``loc`` accessor
     iloc : Triangle
@@ -75,15 +86,55 @@ class Triangle(TriangleBase):
         Whether the triangle development period is expressed as valuation
         periods.
     values : array
-        4D numpy array underlying the Triangle instance
+        4D numpy array underlying the Triangle instance.  For sparse triangles
+        this is a dense copy of the data.
+    array_backend : str
+        Storage of the triangle values, either 'numpy', 'sparse' or
+        'memmap'.  Use ``to_sparse``, ``to_memmap`` and ``to_dense`` to
+        convert between them.
     T : Triangle
         Transpose index and columns of object.  Only available when Triangle is
         convertible to DataFrame.
     """
+    array_backend = 'numpy'
+
     @property
     def shape(self):
+        if self.array_backend == 'sparse':
+            return self._shape
         return self.values.shape
 
+    @property
+    def values(self):
+        if self.array_backend == 'sparse':
+            return self._sparse_to_dense()
+        return self._values
+
+    @values.setter
+    def values(self, value):
+        self._values = value
+        self._sparse = None
+        self.array_backend = 'numpy'
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The index table is rebuilt on demand
+        state.pop('_idx_table_', None)
+        # The values are not shared once unpickled
+        state.pop('_shared_values', None)
+        return state
+
+    def __setstate__(self, state):
+        # Triangles pickled before values became a property
+        if 'values' in state:
+            state['_values'] = state.pop('values')
+        # The nan triangle used to be cached on each instance
+        state.pop('_nan_triangle_', None)
+        # loc and iloc used to be stored on each instance
+        state.pop('loc', None)
+        state.pop('iloc', None)
+        self.__dict__.update(state)
+
     @property
     def index(self):
         return pd.DataFrame(list(self.kdims), columns=self.key_labels)
@@ -103,8 +154,9 @@ class Triangle(TriangleBase):
             self.index = value
             return self
         else:
-            new_obj = copy.deepcopy(self)
-            return new_obj.set_index(value=value, inplace=True)
+            new_obj = self.copy(deep=False)
+            new_obj.set_index(value=value, inplace=True)
+            return new_obj._unshare_values(self)
 
     @property
     def columns(self):
@@ -155,7 +207,7 @@ class Triangle(TriangleBase):
 
     @property
     def link_ratio(self):
-        obj = copy.deepcopy(self)
+        obj = self.copy(deep=False)
         temp = obj.values.copy()
         temp[temp == 0] = np.nan
         val_array = obj.valuation.to_timestamp().values.reshape(
@@ -179,6 +231,7 @@ class Triangle(TriangleBase):
     # ---------------------------------------------------------------- #
     # ---------------------- End User Methods ------------------------ #
     # ---------------------------------------------------------------- #
+    @index_chunked
     def _get_latest_diagonal(self, compress=True):
         ''' Method to return the latest diagonal of the triangle.  Requires
             self.nan_overide == False.
@@ -188,19 +241,29 @@ class Triangle(TriangleBase):
         compress: bool
             Whether to collapse the diagonal into a single columns
         '''
-        obj = copy.deepcopy(self)
-        diagonal = obj[obj.valuation == obj.valuation_date].values
+        obj = self.copy(deep=False)
+        diagonal = obj[obj.valuation == obj.valuation_date]
         if compress:
-            diagonal = np.expand_dims(np.nansum(diagonal, 3), 3)
+            if diagonal.array_backend == 'sparse':
+                diagonal._sparse_sum(3)
+            else:
+                diagonal.values = np.expand_dims(
+                    np.nansum(diagonal.values, 3), 3)
             obj.ddims = np.array([None])
             obj.valuation = pd.DatetimeIndex(
                 [pd.to_datetime(obj.valuation_date)] *
                 len(obj.odims)).to_period(self._lowest_grain())
-        obj.values = diagonal
+        if diagonal.array_backend == 'sparse':
+            # The dense diagonal sums to 0 where no cells are stored
+            obj._set_sparse(diagonal._sparse, diagonal.shape,
+                            0 if compress else np.nan)
+        else:
+            obj.values = diagonal.values
         return obj
 
     def incr_to_cum(self, inplace=False):
-        """Method to convert an incremental triangle into a cumulative triangle.
+        """Method to convert an incremental triangle into a cumulative
+        triangle.
 
         Parameters
         ----------
@@ -213,15 +276,24 @@ class Triangle(TriangleBase):
         """
 
         if inplace:
+            if not self.is_cumulative and self.array_backend == 'memmap':
+                obj = self._memmap_apply(
+                    lambda chunk, key: chunk.incr_to_cum(inplace=True))
+                self._set_memmap(obj._values)
+                self.is_cumulative = True
+            if not self.is_cumulative and self.array_backend == 'sparse':
+                self._sparse_development_apply(lambda x: np.cumsum(x, axis=1))
+                self.is_cumulative = True
             if not self.is_cumulative:
-                np.cumsum(np.nan_to_num(self.values), axis=3, out=self.values)
-                self.values = self._expand_dims(self._nan_triangle())*self.values
+                self.values = np.cumsum(np.nan_to_num(self.values), axis=3)
+                self.values = \
+                    self._expand_dims(self._nan_triangle())*self.values
                 self.values[self.values == 0] = np.nan
                 self.is_cumulative = True
             return self
         else:
-            new_obj = copy.deepcopy(self)
-            return new_obj.incr_to_cum(inplace=True)
+            new_obj = self.copy(deep=False)
+            return new_obj.incr_to_cum(inplace=True)._unshare_values(self)
 
     def cum_to_incr(self, inplace=False):
         """Method to convert an cumlative triangle into a incremental triangle.
@@ -237,6 +309,15 @@ class Triangle(TriangleBase):
         """
 
         if inplace:
+            if self.is_cumulative and self.array_backend == 'memmap':
+                obj = self._memmap_apply(
+                    lambda chunk, key: chunk.cum_to_incr(inplace=True))
+                self._set_memmap(obj._values)
+                self.is_cumulative = False
+            if self.is_cumulative and self.array_backend == 'sparse':
+                self._sparse_development_apply(lambda x: np.concatenate(
+                    (x[:, :1], np.diff(x, axis=1)), axis=1))
+                self.is_cumulative = False
             if self.is_cumulative:
                 temp = np.nan_to_num(self.values)[..., 1:] - \
                     np.nan_to_num(self.values)[..., :-1]
@@ -247,8 +328,8 @@ class Triangle(TriangleBase):
                 self.is_cumulative = False
             return self
         else:
-            new_obj = copy.deepcopy(self)
-            return new_obj.cum_to_incr(inplace=True)
+            new_obj = self.copy(deep=False)
+            return new_obj.cum_to_incr(inplace=True)._unshare_values(self)
 
     def dev_to_val(self, inplace=False):
         ''' Converts triangle from a development lag triangle to a valuation
@@ -267,7 +348,9 @@ class Triangle(TriangleBase):
         if inplace:
             self = self._val_dev_chg('dev_to_val') if not self.is_val_tri else self
             return self
-        return self._val_dev_chg('dev_to_val') if not self.is_val_tri else copy.deepcopy(self)
+        obj = self.copy(deep=False) if self.is_val_tri else \
+            self._val_dev_chg('dev_to_val')
+        return obj._unshare_values(self)
 
     def val_to_dev(self, inplace=False):
         ''' Converts triangle from a valuation triangle to a development lag
@@ -284,7 +367,7 @@ class Triangle(TriangleBase):
             Updated instance of triangle with development lags
         '''
         if not self.is_val_tri:
-            ret_val = self
+            ret_val = self if inplace else self.copy(deep=False)
         else:
             if self.is_ultimate:
                 obj = self[self.valuation<'2262']
@@ -303,50 +386,47 @@ class Triangle(TriangleBase):
                 ret_val = obj
             else:
                 ret_val = self._val_dev_chg('val_to_dev')
-        ret_val.values = self._expand_dims(ret_val._nan_triangle())*ret_val.values
+        ret_val.values = \
+            self._expand_dims(ret_val._nan_triangle())*ret_val.values
         if inplace:
             self = ret_val
         return ret_val
 
 
     def _val_dev_chg(self, kind):
-        obj = copy.deepcopy(self)
-        o_vals = obj._expand_dims(np.arange(len(obj.origin))[:, np.newaxis])
+        obj = self.copy(deep=False)
         if self.shape[-1] == 1:
             return obj
+        # Each (origin, column) cell moves to the target column of its age
+        # (val_to_dev) or of its valuation (dev_to_val).
+        origin, col = np.indices(obj.shape[-2:])
         if kind == 'val_to_dev':
             step = {'Y': 12, 'Q': 3, 'M': 1}[obj.development_grain]
             mtrx = \
-                12*(obj.ddims.to_timestamp(how='e').year.values[np.newaxis] -
-                    obj.origin.to_timestamp(how='s')
-                       .year.values[:, np.newaxis]) + \
-                   (obj.ddims.to_timestamp(how='e').month.values[np.newaxis] -
-                    obj.origin.to_timestamp(how='s')
-                       .month.values[:, np.newaxis]) + 1
+                self._to_months(obj.ddims.to_timestamp(how='e').values) - \
+                self._to_months(obj.origin.to_timestamp(how='s').values
+                                )[:, np.newaxis] + 1
             rng = range(mtrx[mtrx > 0].min(), mtrx.max()+1, step)
+            target = (mtrx - rng.start) // step
+            keep = (mtrx >= rng.start) & ((mtrx - rng.start) % step == 0)
         else:
             rng = obj.valuation.unique().sort_values()
-        old_arr = None
-        for item in rng:
-            if kind == 'val_to_dev':
-                val = np.where(mtrx == item)
-            else:
-                val = np.where(obj._expand_dims(obj.valuation == item)
-                                  .reshape(obj.shape, order='f'))[-2:]
-            val = np.unique(np.array(list(zip(val[0], val[1]))), axis=0)
-            arr = np.expand_dims(obj.values[:, :, val[:, 0], val[:, 1]], -1)
-            if val[0, 0] != 0:
-                prepend = obj._expand_dims(np.array([np.nan]*(val[0, 0]))[:, np.newaxis])
-                arr = np.concatenate((prepend, arr), -2)
-            if len(obj.origin)-1-val[-1, 0] != 0:
-                append = obj._expand_dims(
-                    np.array([np.nan]*(len(obj.origin)-1-val[-1, 0]))[:, np.newaxis])
-                arr = np.concatenate((arr, append), -2)
-            if obj.is_cumulative and old_arr is not None:
-                arr = np.isnan(arr)*np.nan_to_num(old_arr) + np.nan_to_num(arr)
-            old_arr = arr.copy()
-            o_vals = np.append(o_vals, arr, -1)
-        obj.values = o_vals[..., 1:]
+            target = rng.get_indexer(obj.valuation) \
+                        .reshape(obj.shape[-2:], order='F')
+            keep = target >= 0
+        values = np.empty(obj.shape[:-1] + (len(rng),))
+        values[:] = np.nan
+        values[..., origin[keep], target[keep]] = \
+            obj.values[..., origin[keep], col[keep]]
+        if obj.is_cumulative:
+            # Carry the latest value forward into columns left empty
+            idx = (~np.isnan(values)) * np.arange(len(rng))
+            idx = np.maximum.accumulate(idx, axis=-1)
+            k, v, o = np.ogrid[:values.shape[0], :values.shape[1],
+                               :values.shape[2]]
+            values = values[k[..., np.newaxis], v[..., np.newaxis],
+                            o[..., np.newaxis], idx]
+        obj.values = values
         obj.values[obj.values == 0] = np.nan
         if kind == 'val_to_dev':
             obj.ddims = np.array([item for item in rng])
@@ -374,8 +454,9 @@ class Triangle(TriangleBase):
             ]`` For example, 'OYDY' for Origin Year/Development Year, 'OQDM'
             for Origin quarter/Development Month, etc.
         incremental : bool
-            Grain does not work on incremental triangles and this argument let's
-            the function know to make it cumuative before operating on the grain.
+            Grain does not work on incremental triangles and this argument
+            let's the function know to make it cumuative before operating on
+            the grain.
         inplace : bool
             Whether to mutate the existing Triangle instance or return a new
             one.
@@ -384,6 +465,90 @@ class Triangle(TriangleBase):
         -------
             Triangle
         """
+        if self.is_val_tri or self.is_ultimate or self.shape[3] == 1:
+            obj = self._grain_valuation(grain)
+        elif self.array_backend == 'sparse':
+            obj = self._sparse_grain(grain)
+        else:
+            obj = self._grain_development(grain)
+        if inplace:
+            self = obj
+        return obj
+
+    def _grain_axes(self, grain):
+        ''' Integer month arithmetic behind grain.  Months are counted from
+            year zero.
+
+        Returns
+        -------
+        origin : array
+            The start month of each origin period.
+        o_map : array
+            The index of the new origin period of each origin period.
+        odims : array
+            The start month of each new origin period.
+        ddims : array
+            The development ages, in months, of the new grain.
+        '''
+        months = {'Y': 12, 'Q': 3, 'M': 1}
+        dev_grain_dict = {'M': {'Y': 12, 'Q': 3, 'M': 1},
+                          'Q': {'Y': 4, 'Q': 1},
+                          'Y': {'Y': 1}}
+        step = dev_grain_dict[self.development_grain][grain[-1]]
+        origin = self._to_months(self.odims)
+        odims, o_map = np.unique(origin - origin % months[grain[1:2]],
+                                 return_inverse=True)
+        valuation = origin[:, np.newaxis] + \
+            np.array(self.ddims, dtype='int64')[np.newaxis] - 1
+        valuation = np.unique(
+            valuation[valuation <= self._to_months(self.valuation_date)])
+        age = valuation[np.newaxis] - odims[:, np.newaxis] + 1
+        ddims = np.arange(age[age > 0].min(), age.max() + 1,
+                          months[self.development_grain])
+        return origin, o_map, odims, ddims[::-1][::step][::-1]
+
+    def _grain_development(self, grain):
+        ''' grain of a development triangle, computed in lag space.  The
+            cumulative value of each origin at each new development age is
+            gathered, carrying it forward where missing, and summed within
+            each new origin period.
+        '''
+        obj = self.copy(deep=False)
+        if not self.is_cumulative:
+            obj.incr_to_cum(inplace=True)
+        origin, o_map, odims, ddims = obj._grain_axes(grain)
+        # Index of the latest development age of each origin at each new age
+        lag = np.searchsorted(
+            np.array(obj.ddims, dtype='int64'),
+            ddims[np.newaxis] - (origin - odims[o_map])[:, np.newaxis],
+            side='right') - 1
+        # Missing cumulative values carry forward the prior value
+        values = obj.values
+        o = np.arange(len(origin))[:, np.newaxis]
+        idx = self._last_filled(values)[..., o, np.maximum(lag, 0)]
+        k, v = np.ogrid[:values.shape[0], :values.shape[1]]
+        values = np.nan_to_num(values[k[..., np.newaxis, np.newaxis],
+                                      v[..., np.newaxis, np.newaxis],
+                                      o, idx]) * (lag >= 0)
+        values = np.add.reduceat(
+            values, np.unique(o_map, return_index=True)[1], axis=2)
+        obj.values = values
+        obj.odims = self._from_months(odims)
+        obj.ddims = ddims
+        obj.origin_grain = grain[1:2]
+        obj.development_grain = grain[-1]
+        obj.valuation = obj._valuation_triangle()
+        obj.values = obj.values * obj._expand_dims(obj._nan_triangle())
+        obj.values[obj.values == 0] = np.nan
+        if not self.is_cumulative:
+            obj = obj.cum_to_incr()
+        return obj
+
+    def _grain_valuation(self, grain):
+        ''' grain of valuation triangles, triangles with an ultimate and
+            latest diagonals.  Origins are summed within each new origin period
+            in valuation space before converting back to development lags.
+        '''
         if not self.is_cumulative:
             # Must be cumulative to work
             obj = self.incr_to_cum().dev_to_val(inplace=True)
@@ -393,29 +558,15 @@ class Triangle(TriangleBase):
         ograin_new = grain[1:2]
         ograin_old = obj.origin_grain
         if ograin_new != ograin_old:
-            o_dt = pd.Series(obj.odims)
-            if ograin_new == 'Q':
-                o = np.array(pd.to_datetime(
-                    o_dt.dt.year.astype(str) + 'Q' + o_dt.dt.quarter.astype(str)))
-            elif ograin_new == 'Y':
-                o = np.array(pd.to_datetime(o_dt.dt.year, format='%Y'))
-            else:
-                o = obj.odims
-            o_new = np.unique(o)
-            o = np.repeat(np.expand_dims(o, axis=1), len(o_new), axis=1)
-            o_new = np.repeat(o_new[np.newaxis], len(o), axis=0)
-            o_bool = np.repeat((o == o_new)[:, np.newaxis],
-                               len(obj.ddims), axis=1)
-            o_bool = obj._expand_dims(o_bool)
-            new_tri = np.repeat(np.nan_to_num(obj.values)[..., np.newaxis],
-                                o_bool.shape[-1], axis=-1)
-            new_tri[~np.isfinite(new_tri)] = 0
-            new_tri = np.swapaxes(np.sum(new_tri*o_bool, axis=2), -1, -2)
-            obj.values = new_tri
-            obj.odims = np.unique(o)
+            months = {'Y': 12, 'Q': 3, 'M': 1}[ograin_new]
+            origin = self._to_months(obj.odims)
+            odims, starts = np.unique(origin - origin % months,
+                                      return_index=True)
+            values = obj.values.copy()
+            values[~np.isfinite(values)] = 0
+            obj.values = np.add.reduceat(values, starts, axis=2)
+            obj.odims = self._from_months(odims)
             obj.valuation = obj._valuation_triangle()
-            if hasattr(obj, '_nan_triangle_'):
-                del obj._nan_triangle_
         obj = obj.val_to_dev(inplace=True)
         # Now do development
         dev_grain_dict = {'M': {'Y': 12, 'Q': 3, 'M': 1},
@@ -433,18 +584,11 @@ class Triangle(TriangleBase):
         obj.development_grain = dgrain_new
         obj.values[obj.values == 0] = np.nan
         obj.valuation = obj._valuation_triangle()
-        if hasattr(obj, '_nan_triangle_'):
-            # Force update on _nan_triangle at next access.
-            del obj._nan_triangle_
         if not self.is_cumulative:
             obj = obj.cum_to_incr()
-        if inplace:
-            self = obj
-            return self
-        else:
-            return obj
-
+        return obj
 
+    @index_chunked
     def trend(self, trend=0.0, axis='origin'):
         """  Allows for the trending of a Triangle object or an origin vector.
         This method trends using days and assumes a years is 365.25 days long.
@@ -470,6 +614,6 @@ class Triangle(TriangleBase):
             trend = (1 + trend)**-(
                 pd.Series(self.valuation.end_time.values-days)
                 .dt.days.values.reshape(self.shape[-2:], order='f')/365.25)
-        obj = copy.deepcopy(self)
+        obj = self.copy(deep=False)
         obj.values = obj.values*trend
         return obj
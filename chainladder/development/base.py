@@ -4,13 +4,16 @@
 import numpy as np
 import pandas as pd
 import copy
+import os
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.base import BaseEstimator, TransformerMixin
 from chainladder import WeightedRegression
-from chainladder.core import EstimatorIO
+from chainladder.core import EstimatorIO, EstimatorCache
 
 
-class DevelopmentBase(BaseEstimator, TransformerMixin, EstimatorIO):
+class DevelopmentBase(EstimatorCache, BaseEstimator, TransformerMixin,
+                      EstimatorIO):
     @staticmethod
     def _get_cdf(obj):
         if 'ldf_' not in obj:
@@ -46,6 +49,15 @@ class Development(DevelopmentBase):
         Drops lowest link ratio(s) from LDF calculation
     drop_valuation : str or list of str (default=None)
         Drops specific valuation periods. str must be date convertible.
+    chunk_size : int, optional (default=None)
+        Number of index entries of the triangle fit at a time.  This bounds
+        the memory used by the regression for triangles with many index
+        entries.  By default the whole triangle is fit at once, unless its
+        values are memory mapped, in which case it is fit one chunk of its
+        values at a time.
+    n_jobs : int, optional (default=None)
+        Number of threads used to fit chunks concurrently. -1 uses all
+        processors.  Only applies when chunk_size is set.
 
 
     Attributes
@@ -64,7 +76,8 @@ class Development(DevelopmentBase):
     """
     def __init__(self, n_periods=-1, average='volume',
                  sigma_interpolation='log-linear', drop=None,
-                 drop_high=None, drop_low=None, drop_valuation=None):
+                 drop_high=None, drop_low=None, drop_valuation=None,
+                 chunk_size=None, n_jobs=None):
         self.n_periods = n_periods
         self.average = average
         self.sigma_interpolation = sigma_interpolation
@@ -72,6 +85,8 @@ class Development(DevelopmentBase):
         self.drop_low = drop_low
         self.drop_valuation = drop_valuation
         self.drop = drop
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
 
     def _assign_n_periods_weight(self, X):
         if type(self.n_periods) is int:
@@ -112,25 +127,26 @@ class Development(DevelopmentBase):
             w = X[X.valuation>=val_date_min]
             return np.nan_to_num((w/w).values)*X._expand_dims(X._nan_triangle())
 
-
-    def _drop_adjustment(self, X, link_ratio):
+    def _drop_adjustment(self, X, link_ratio, first):
+        ''' Weights of the exclusions.  Exclusions that depend on the data
+            look at the first triangle of the index only. '''
         weight = X._nan_triangle()[:, :-1]
         if self.drop_high == self.drop_low == \
            self.drop == self.drop_valuation is None:
             return weight
         if self.drop_high is not None:
-            weight = weight*self._drop_hilo('high', X, link_ratio)
+            weight = weight*self._drop_hilo('high', first, link_ratio)
         if self.drop_low is not None:
-            weight = weight*self._drop_hilo('low', X, link_ratio)
+            weight = weight*self._drop_hilo('low', first, link_ratio)
         if self.drop is not None:
             weight = weight*self._drop(X)
         if self.drop_valuation is not None:
-            weight = weight*self._drop_valuation(X)
+            weight = weight*self._drop_valuation(first)
         return weight
 
     def _drop_hilo(self, kind, X, link_ratio):
         link_ratio[link_ratio == 0] = np.nan
-        lr_valid_count = np.sum(~np.isnan(link_ratio)[0, 0], axis=0)
+        lr_valid_count = np.sum(~np.isnan(X.link_ratio.values[0, 0]), axis=0)
         if kind == 'high':
             vals = np.nanmax(link_ratio, -2, keepdims=True)
             drop_hilo = self.drop_high
@@ -171,7 +187,7 @@ class Development(DevelopmentBase):
 
     def _drop(self, X):
         drop = [self.drop] if type(self.drop) is not list else self.drop
-        arr = X._nan_triangle()
+        arr = X._nan_triangle().copy()
         for item in drop:
             arr[np.where(X.origin == item[0])[0][0],
                 np.where(X.development == item[1])[0][0]] = 0
@@ -194,33 +210,59 @@ class Development(DevelopmentBase):
         """
         if (type(X.ddims) != np.ndarray):
             raise ValueError('Triangle must be expressed with development lags')
-        tri_array = X.values.copy()
-        tri_array[tri_array == 0] = np.nan
         if type(self.average) is str:
-            average = [self.average] * (tri_array.shape[-1] - 1)
+            average = [self.average] * (X.shape[-1] - 1)
         else:
             average = self.average
-        average = np.array(average)
-        self.average_ = average
+        self.average_ = np.array(average)
+        if self.n_periods == 1:
+            warnings.warn('Setting n_periods=1 does not allow enough degrees '
+                          'of freedom to support calculation of all regression'
+                          ' statistics.  Only LDFs have been calculated.')
+        first = next(self._index_chunks(X, 1))
+        chunk_size = self.chunk_size
+        if chunk_size is None and X.array_backend == 'memmap':
+            chunk_size = len(X._memmap_keys()[0])
+        if chunk_size is None or chunk_size >= X.shape[0]:
+            fits = [self._fit_chunk(X, first)]
+        else:
+            chunks = self._index_chunks(X, chunk_size)
+            n_jobs = os.cpu_count() if self.n_jobs == -1 else self.n_jobs
+            if n_jobs is not None and n_jobs > 1:
+                with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                    fits = list(executor.map(
+                        lambda chunk: self._fit_chunk(chunk, first), chunks))
+            else:
+                fits = [self._fit_chunk(chunk, first) for chunk in chunks]
+        self.w_ = np.concatenate([item[0] for item in fits], 0)
+        params = np.concatenate([item[1] for item in fits], 0)
+        self.ldf_ = self._param_property(X, params, 0)
+        self.cdf_ = self._get_cdf(self)
+        self.sigma_ = self._param_property(X, params, 1)
+        self.std_err_ = self._param_property(X, params, 2)
+        return self
+
+    def _fit_chunk(self, X, first):
+        ''' Fits the regression of one chunk of the index and returns its
+            weights and its ldf, sigma and std_err parameters '''
+        tri_array = X.values.copy()
+        tri_array[tri_array == 0] = np.nan
         weight_dict = {'regression': 0, 'volume': 1, 'simple': 2}
         x, y = tri_array[..., :-1], tri_array[..., 1:]
         val = np.array([weight_dict.get(item.lower(), 1)
-                        for item in average])
+                        for item in self.average_])
         for i in [2, 1, 0]:
             val = np.repeat(val[np.newaxis], tri_array.shape[i], axis=0)
         val = np.nan_to_num(val * (y * 0 + 1))
-        link_ratio = np.divide(y, x, where=np.nan_to_num(x) != 0)
-        self.w_ = np.array(self._assign_n_periods_weight(X) *
-                           self._drop_adjustment(X, link_ratio),
-                           dtype='float16')
-        w = self.w_ / (x**(val))
+        link_ratio = np.divide(y, x, out=np.full(x.shape, np.nan),
+                               where=np.nan_to_num(x) != 0)
+        w_ = np.array(self._assign_n_periods_weight(X) *
+                      self._drop_adjustment(X, link_ratio, first),
+                      dtype='float16')
+        w = w_ / (x**(val))
         params = WeightedRegression(axis=2, thru_orig=True).fit(x, y, w)
         if self.n_periods != 1:
             params = params.sigma_fill(self.sigma_interpolation)
-        else:
-            warnings.warn('Setting n_periods=1 does not allow enough degrees '
-                          'of freedom to support calculation of all regression'
-                          ' statistics.  Only LDFs have been calculated.')
         params.std_err_ = np.nan_to_num(params.std_err_) + \
             np.nan_to_num(
                 (1-np.nan_to_num(params.std_err_*0+1)) *
@@ -228,12 +270,20 @@ class Development(DevelopmentBase):
                 np.swapaxes(np.sqrt(x**(2-val))[..., 0:1, :], -1, -2))
         params = np.concatenate(
             (params.slope_, params.sigma_, params.std_err_), 3)
-        params = np.swapaxes(params, 2, 3)
-        self.ldf_ = self._param_property(X, params, 0)
-        self.cdf_ = self._get_cdf(self)
-        self.sigma_ = self._param_property(X, params, 1)
-        self.std_err_ = self._param_property(X, params, 2)
-        return self
+        return w_, np.swapaxes(params, 2, 3)
+
+    @staticmethod
+    def _index_chunks(X, chunk_size):
+        ''' Splits X along its index into triangles of chunk_size entries '''
+        for start in range(0, X.shape[0], chunk_size):
+            key = np.arange(start, min(start + chunk_size, X.shape[0]))
+            obj = X.copy(deep=False)
+            obj.kdims = X.kdims[key]
+            if obj.array_backend == 'sparse':
+                obj._sparse_take(0, key)
+            else:
+                obj.values = X.values[key[0]:key[-1] + 1]
+            yield obj
 
     def transform(self, X):
         """ If X and self are of different shapes, align self to X, else
@@ -257,9 +307,20 @@ class Development(DevelopmentBase):
 
     def _param_property(self, X, params, idx):
         obj = copy.copy(X)
-        obj.values = np.ones(X.shape)[..., :-1]*params[..., idx:idx+1, :]
-        obj.ddims = X.link_ratio.ddims
+        obj.values = np.repeat(params[..., idx:idx+1, :], X.shape[2], 2)
+        obj.ddims = np.array(['{}-{}'.format(X.ddims[i], X.ddims[i+1])
+                              for i in range(len(X.ddims)-1)])
         obj.valuation = obj._valuation_triangle(obj.ddims)
         obj.nan_override = True
         obj._set_slicers()
         return obj
+
+
+def _unique_origin(values):
+    """ np.unique of values along the origin axis.  Values that are the same
+    for every origin, as development patterns usually are, are taken from
+    the first origin without sorting them. """
+    first = values[..., :1, :]
+    if np.all((values == first) | (np.isnan(values) & np.isnan(first))):
+        return first
+    return np.unique(values, axis=-2)
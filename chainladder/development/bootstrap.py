@@ -1,19 +1,20 @@
 # This Source Code Form is subject to the terms of the Mozilla Public
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
-from sklearn.utils import check_random_state
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy import sparse
 
 from chainladder.methods.chainladder import Chainladder
 from chainladder.development.base import DevelopmentBase, Development
 import numpy as np
-import pandas as pd
 import copy
+import numbers
 
 
 class BootstrapODPSample(DevelopmentBase):
     """
-    Class to generate bootstrap samples of triangles.  Currently this Only
-    supports 'single' triangles (single index and single column).
+    Class to generate bootstrap samples of triangles.  Each triangle of the
+    index and columns is bootstrapped from its own residuals.
 
     Parameters
     ----------
@@ -27,30 +28,61 @@ class BootstrapODPSample(DevelopmentBase):
         factor.
     drop : tuple or list of tuples
         Drops specific origin/development combination(s) from residual sample
-    random_state : int, RandomState instance or None, optional (default=None)
-        If int, random_state is the seed used by the random number generator;
-        If RandomState instance, random_state is the random number generator;
-        If None, the random number generator is the RandomState instance used
-        by np.random.
+    process_dist : str (default='gamma')
+        The distribution of the future incremental losses used to add process
+        risk to the simulated reserves.  Options are 'gamma' and 'od poisson'.
+    random_state : int, SeedSequence, Generator, RandomState or None, optional
+        (default=None)
+        If int or SeedSequence, random_state seeds the simulations;
+        If Generator or RandomState instance, the seed is drawn from it;
+        If None, the seed is drawn from fresh entropy when fit.
+    n_jobs : int or None, optional (default=None)
+        Number of blocks of simulations generated in parallel.  None means 1
+        and -1 means all processors.  The simulations are the same for any
+        number of jobs.
 
     Attributes
     ----------
     resampled_triangles_ : Triangle
-        A set of triangles represented by each simulation
-    scale_ :
-        The scale parameter to be used in generating process risk
+        A set of triangles represented by each simulation.  The index holds
+        ``n_sims`` simulations for each index entry of the fitted triangle
+        with the simulation number as the last index level.  The simulations
+        are generated on first access.  Use ``iter_resampled`` to work through
+        them in blocks instead.
+    scale_ : ndarray
+        The scale parameter of each index/column to be used in generating
+        process risk
+    reserves_ : Triangle
+        The simulated reserves of each origin including process risk, with
+        the index of ``resampled_triangles_``.  The reserves are generated on
+        first access.  Use ``iter_reserves`` to work through them in blocks
+        instead.
+
+    Notes
+    -----
+    The residuals are resampled from one stream of uniform numbers of the
+    seed's ``numpy.random.SeedSequence``.  Simulation number ``i`` takes the
+    ``i``-th run of them, one for each cell, so a block of simulations is
+    drawn in one call by jumping ahead to its first run.  Gamma and poisson
+    draws take a varying amount of the stream, so process risk is drawn
+    simulation by simulation instead, from the second child of the ``i``-th
+    child spawned from the seed.  A simulation is therefore the same whatever
+    the block size or number of jobs it is generated with.
     """
-    def __init__(self, n_sims=1000, n_periods=-1,
-                 hat_adj=True, drop=None, random_state=None):
+    def __init__(self, n_sims=1000, n_periods=-1, hat_adj=True, drop=None,
+                 process_dist='gamma', random_state=None, n_jobs=None):
         self.n_sims = n_sims
         self.n_periods = n_periods
         self.hat_adj = hat_adj
         self.drop = drop
+        self.process_dist = process_dist
         self.random_state = random_state
+        self.n_jobs = n_jobs
 
     def fit(self, X, y=None, sample_weight=None):
         if (type(X.ddims) != np.ndarray):
-            raise ValueError('Triangle must be expressed with development lags')
+            raise ValueError(
+                'Triangle must be expressed with development lags')
         obj = copy.copy(X)
         self.w_ = X._nan_triangle() if not self.drop else self._drop(X)
         lag = {'M': 1, 'Q': 3, 'Y': 12}[X.development_grain]
@@ -59,17 +91,28 @@ class BootstrapODPSample(DevelopmentBase):
             drop = [(item[0], item[1]-lag) for item in self.drop]
         else:
             drop = self.drop
-        obj = Development(n_periods=self.n_periods, drop=drop).fit_transform(obj)
+        if self.process_dist not in ['gamma', 'od poisson']:
+            raise ValueError("process_dist must be 'gamma' or 'od poisson'")
+        self._ldf_drop = drop
+        obj = Development(
+            n_periods=self.n_periods, drop=drop).fit_transform(obj)
         obj = Chainladder().fit(obj)
-        # Works for only a single triangle - can we generalize this
         exp_incr_triangle = obj.full_expectation_.cum_to_incr() \
-                               .values[0, 0, :, :X.shape[-1]]
+                               .values[..., :X.shape[-1]]
         exp_incr_triangle = np.nan_to_num(exp_incr_triangle) * \
             obj.X_._nan_triangle()
         self.design_matrix_ = self._get_design_matrix(X)
-        self.hat_ = self._get_hat(X, exp_incr_triangle) if self.hat_adj else None
-        self.resampled_triangles_, self.scale_ = \
-            self._get_simulation(X, exp_incr_triangle)
+        if self.hat_adj:
+            self.hat_ = self._get_hat(X, exp_incr_triangle)
+        else:
+            self.hat_ = None
+        self.scale_, self._resid_dist, self._n_resids = \
+            self._get_residuals(X, exp_incr_triangle)
+        self._exp_incr_triangle = exp_incr_triangle
+        self._X = X.copy(deep=False)
+        self._seed = self._get_seed(self.random_state)
+        self._resampled_triangles = None
+        self._reserves = None
         n_obs = np.nansum(self.w_)
         n_origin_params = X.shape[2]
         n_dev_params = X.shape[3] - 1
@@ -77,16 +120,187 @@ class BootstrapODPSample(DevelopmentBase):
         deg_free_adj_fctr = np.sqrt(n_obs/deg_free)
         return self
 
-    def _get_simulation(self, X, exp_incr_triangle):
+    @property
+    def resampled_triangles_(self):
+        if self._resampled_triangles is None:
+            self._resampled_triangles = self._concat_blocks(
+                self.iter_resampled(self._job_block_size()))
+        return self._resampled_triangles
+
+    def iter_resampled(self, block_size=1000):
+        """ Generates the resampled triangles in blocks of simulations so
+        that large ``n_sims`` can be reduced without holding every
+        simulation in memory.  The blocks hold the simulations of
+        ``resampled_triangles_`` in order of simulation number.  With
+        ``n_jobs``, that many blocks are generated at a time.
+
+        Parameters
+        ----------
+        block_size : int (default=1000)
+            Number of simulations of each block
+
+        Yields
+        ------
+            Triangle of at most ``block_size`` simulations for each index
+            entry of the fitted triangle
+        """
+        return self._iter_blocks(block_size, reserves=False)
+
+    @property
+    def reserves_(self):
+        if self._reserves is None:
+            self._reserves = self._concat_blocks(
+                self.iter_reserves(self._job_block_size()))
+        return self._reserves
+
+    def iter_reserves(self, block_size=1000):
+        """ Generates the simulated reserves in blocks of simulations.  Each
+        resampled triangle is developed with the chainladder method and its
+        future incremental losses are drawn from ``process_dist`` with the
+        projected losses as means and variances of ``scale_`` times the
+        means.  The blocks hold the simulations of ``reserves_`` in order of
+        simulation number.  With ``n_jobs``, that many blocks are generated
+        at a time.
+
+        Parameters
+        ----------
+        block_size : int (default=1000)
+            Number of simulations of each block
+
+        Yields
+        ------
+            Triangle of the reserves of each origin for at most
+            ``block_size`` simulations of each index entry of the fitted
+            triangle
+        """
+        return self._iter_blocks(block_size, reserves=True)
+
+    def _iter_blocks(self, block_size, reserves):
+        blocks = [np.arange(start, min(start + block_size, self.n_sims))
+                  for start in range(0, self.n_sims, block_size)]
+        n_jobs = effective_n_jobs(self.n_jobs)
+        if n_jobs == 1:
+            for sims in blocks:
+                yield self._get_block(sims, reserves)
+            return
+        # Workers get a copy without the simulations already held by self
+        est = copy.copy(self)
+        est._resampled_triangles = est._reserves = None
+        with Parallel(n_jobs=self.n_jobs) as parallel:
+            for start in range(0, len(blocks), n_jobs):
+                for block in parallel(
+                        delayed(est._get_block)(sims, reserves)
+                        for sims in blocks[start:start + n_jobs]):
+                    yield block
+
+    def _get_block(self, sims, reserves):
+        X = self._get_simulation(sims)
+        return self._get_reserves(X, sims) if reserves else X
+
+    def _job_block_size(self):
+        """ Block size that spreads n_sims evenly over the jobs """
+        return -(-self.n_sims // effective_n_jobs(self.n_jobs))
+
+    def _concat_blocks(self, blocks):
+        """ Joins blocks of simulations in the key major order of a single
+        block """
+        blocks = list(blocks)
+        if len(blocks) == 1:
+            return blocks[0]
+        k = self._X.shape[0]
+        obj = copy.copy(blocks[0])
+        obj.kdims = np.concatenate(
+            [item.kdims.reshape(k, -1, item.kdims.shape[-1])
+             for item in blocks], 1).reshape(-1, obj.kdims.shape[-1])
+        obj.values = np.concatenate(
+            [item.values.reshape((k, -1) + item.shape[1:])
+             for item in blocks], 1).reshape((-1,) + obj.shape[1:])
+        obj._set_slicers()
+        return obj
+
+    @staticmethod
+    def _get_seed(random_state):
+        """ The SeedSequence that the simulations are spawned from """
+        if isinstance(random_state, np.random.SeedSequence):
+            return random_state
+        if random_state is None or \
+           isinstance(random_state, numbers.Integral):
+            return np.random.SeedSequence(random_state)
+        if isinstance(random_state, np.random.Generator):
+            return np.random.SeedSequence(
+                random_state.integers(2**32, size=4))
+        if isinstance(random_state, np.random.RandomState):
+            return np.random.SeedSequence(
+                random_state.randint(2**32, size=4, dtype=np.int64))
+        raise ValueError('{!r} cannot be used to seed a numpy.random.'
+                         'SeedSequence instance'.format(random_state))
+
+    def _get_uniforms(self, sims, size):
+        """ Runs of size uniform numbers of the simulation numbers, sims,
+        from the residual stream.  Each run of consecutive simulations is
+        drawn in one call after jumping ahead to its first simulation. """
+        sims = np.asarray(sims, dtype=np.int64)
+        uniforms = np.empty((len(sims), size))
+        seed = self._seed
+        breaks = np.flatnonzero(np.diff(sims) != 1) + 1
+        for run in np.split(np.arange(len(sims)), breaks):
+            if len(run) == 0:
+                continue
+            bit_generator = np.random.PCG64(np.random.SeedSequence(
+                seed.entropy, spawn_key=tuple(seed.spawn_key) + (0,),
+                pool_size=seed.pool_size))
+            # Each uniform takes exactly one step of the bit generator
+            bit_generator.advance(int(sims[run[0]]) * size)
+            uniforms[run] = np.random.Generator(bit_generator).random(
+                (len(run), size))
+        return uniforms
+
+    def _get_generator(self, sim):
+        """ Generator of the process risk of simulation number sim """
+        seed = self._seed
+        return np.random.Generator(np.random.PCG64(np.random.SeedSequence(
+            seed.entropy, spawn_key=tuple(seed.spawn_key) + (int(sim), 1),
+            pool_size=seed.pool_size)))
+
+    def _get_reserves(self, X, sims):
+        """ Reserves with process risk of the resampled triangles of the
+        simulation numbers, sims """
+        model = Chainladder().fit(Development(
+            n_periods=self.n_periods, drop=self._ldf_drop).fit_transform(X))
+        k, v, o, d = self._X.shape
+        exp_incr_triangle = np.nan_to_num(
+            model.full_expectation_.cum_to_incr().values[..., :d] *
+            np.isnan(self._X._nan_triangle()))
+        exp_incr_triangle = np.swapaxes(
+            exp_incr_triangle.reshape(k, -1, v, o, d), 0, 1)
+        scale = self.scale_[:, :, np.newaxis, np.newaxis]
+        shape = abs(exp_incr_triangle)/scale
+        process = np.empty(shape.shape)
+        # Shapland cites Verral and England 2002 in using gamma as a proxy for
+        # poisson because of computational efficiency even though poisson is
+        # the more theoretically correct choice.
+        for num, sim in enumerate(sims):
+            rng = self._get_generator(sim)
+            if self.process_dist == 'gamma':
+                process[num] = rng.gamma(shape=shape[num], scale=scale)
+            else:
+                process[num] = rng.poisson(lam=shape[num])*scale
+        process = process*np.sign(exp_incr_triangle)
+        obj = model.ibnr_
+        obj.values = np.swapaxes(np.sum(process, -1, keepdims=True), 0, 1) \
+            .reshape(obj.shape)
+        return obj
+
+    def _get_residuals(self, X, exp_incr_triangle):
+        """ The scale and the pool of adjusted residuals of each triangle """
         k_value = 1  # for ODP Poisson
-        if X.shape[:2] != (1, 1):
-            raise ValueError('Only single index/column triangles are ',
-                             'supported')
         unscaled_residuals = \
             ((X.cum_to_incr().values - exp_incr_triangle) /
-             np.sqrt(np.abs(exp_incr_triangle**k_value)))[0, 0, ...]
-        standardized_residuals = self.hat_ * unscaled_residuals
-        pearson_chi_sq = sum(sum(np.nan_to_num(unscaled_residuals)**2))
+             np.sqrt(np.abs(exp_incr_triangle**k_value)))
+        hat = 1 if self.hat_ is None else self.hat_
+        standardized_residuals = hat * unscaled_residuals
+        pearson_chi_sq = np.sum(
+            np.nan_to_num(unscaled_residuals)**2, axis=(2, 3))
         n_params = self.design_matrix_.shape[1]
         degree_freedom = np.nansum(X._nan_triangle()) - n_params
         # Shapland has a hetero adjustment to degree_freedom here
@@ -95,84 +309,99 @@ class BootstrapODPSample(DevelopmentBase):
         k, v, o, d = X.shape
         resids = np.reshape(standardized_residuals, (k, v, o*d))
 
-        adj_resid_dist = resids[np.isfinite(resids)]  # Missing k,v dimensions
         # Suggestions from Using the ODP Bootstrap Model: A Practitioners Guide
-        adj_resid_dist = adj_resid_dist[adj_resid_dist != 0]
-        adj_resid_dist = adj_resid_dist - np.mean(adj_resid_dist)
-
-        random_state = check_random_state(self.random_state)
-        resampled_residual = [random_state.choice(adj_resid_dist,
-                              size=exp_incr_triangle.shape,
-                              replace=True)*(exp_incr_triangle*0+1)
-                              for item in range(self.n_sims)]
-        resampled_residual = np.array(resampled_residual) \
-                               .reshape(self.n_sims, exp_incr_triangle.shape[0],
-                                        exp_incr_triangle.shape[1])
-        resampled_residual = resampled_residual
-        b = np.repeat(np.expand_dims(exp_incr_triangle, 0), self.n_sims, 0)
-        resampled_triangles = (resampled_residual*np.sqrt(abs(b))+b).cumsum(2)
-        resampled_triangles = np.swapaxes(
-            np.expand_dims(resampled_triangles, 0), 0, 1)
-        obj = copy.copy(X)
-        obj.kdims = np.arange(self.n_sims)
-        obj.values = resampled_triangles
-        obj._set_slicers()
-        return obj, scale_phi
+        valid = np.isfinite(resids) & (resids != 0)
+        n_resids = np.sum(valid, axis=-1)
+        # Residual pool of each triangle with its valid residuals first
+        adj_resid_dist = np.take_along_axis(
+            resids, np.argsort(~valid, axis=-1, kind='stable'), -1)
+        adj_resid_dist = adj_resid_dist - np.expand_dims(
+            np.sum(np.where(valid, resids, 0), -1) / n_resids, -1)
+        return scale_phi, adj_resid_dist, n_resids
 
-        # Shapland cites Verral and England 2002 in using gamma as a proxy for
-        # poisson because of computational efficiency even though poisson is
-        # the more theoretically correct choice.  Does this belong in the fit?
-
-        # Process variance adjustment
-        #lower_diagonal = (obj._nan_triangle()*0)
-        #lower_diagonal[np.isnan(lower_diagonal)]=1
-        #obj.values = Chainladder().fit(Development().fit_transform(obj)).full_expectation_.values[...,:-1]*lower_diagonal
-        #obj.nan_override = True
-        #if self.process_dist == 'gamma':
-        #    process_triangle = np.nan_to_num(np.array([random_state.gamma(shape=abs(item/scale_phi),scale=scale_phi)*np.sign(np.nan_to_num(item)) for item in sim_exp_incr_triangle]))
-        #if self.process_dist == 'od poisson':
-        #    process_triangle = np.nan_to_num(np.array([random_state.poisson(lam=abs(item))*np.sign(np.nan_to_num(item))for item in sim_exp_incr_triangle]))
-        #IBNR = process_triangle.cumsum(axis=2)[:,:,-1]
+    def _get_simulation(self, sims):
+        """ Resampled triangles of the simulation numbers, sims """
+        k, v, o, d = self._X.shape
+        uniforms = self._get_uniforms(sims, k*v*o*d).reshape(
+            (len(sims), k, v, o, d))
+        idx = (uniforms * self._n_resids[:, :, np.newaxis, np.newaxis]) \
+            .astype(np.int64)
+        b = self._exp_incr_triangle
+        resampled_residual = self._resid_dist[
+            np.arange(k)[np.newaxis, :, np.newaxis, np.newaxis, np.newaxis],
+            np.arange(v)[np.newaxis, np.newaxis, :, np.newaxis, np.newaxis],
+            idx] * (b*0+1)
+        resampled_triangles = (resampled_residual*np.sqrt(abs(b))+b).cumsum(-1)
+        obj = copy.copy(self._X)
+        index = self._X.index.values
+        obj.kdims = np.empty((k*len(sims), index.shape[1]+1), dtype=object)
+        obj.kdims[:, :-1] = np.repeat(index, len(sims), 0)
+        obj.kdims[:, -1] = np.tile(sims, k)
+        obj.key_labels = list(self._X.key_labels) + ['Simulation']
+        obj.values = np.swapaxes(resampled_triangles, 0, 1).reshape(
+            k*len(sims), v, o, d)
+        obj._set_slicers()
+        return obj
 
     def _get_design_matrix(self, X):
         """ The design matrix used in hat matrix adjustment (Shapland eq3.12)
+        as a sparse matrix.  There is a row for each observed cell in column
+        major order with a 1 for the origin of the cell and for each
+        development period after the first up to that of the cell.
         """
-        w = X._nan_triangle()
-        arr = np.diag(w[:, 0])
-        intra_beta = np.zeros((w.shape[0], w.shape[1]-1))
-        arr = np.concatenate((arr, intra_beta), axis=1)
-        for i in range(w.shape[1]-1):
-            len_alpha = len(w[:, i+1][~np.isnan(w[:, i+1])])
-            intra_alpha = np.diag(w[:, i+1])[:len_alpha, :]
-            intra_beta[:, i] = 1
-            intra_beta = intra_beta[:len_alpha, :]
-            intra_arr = np.concatenate((intra_alpha, intra_beta), axis=1)
-            arr = np.concatenate((arr, intra_arr), axis=0)
-        return arr
+        o, d = X.shape[-2:]
+        dev, origin = np.where(~np.isnan(X._nan_triangle().T))
+        n = len(origin)
+        beta = np.arange(np.sum(dev)) - np.repeat(np.cumsum(dev) - dev, dev)
+        rows = np.concatenate((np.arange(n), np.repeat(np.arange(n), dev)))
+        cols = np.concatenate((origin, o + beta))
+        return sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(n, o + d - 1))
 
     def _get_hat(self, X, exp_incr_triangle):
-        """ The hat matrix adjustment (Shapland eq3.23)"""
-        weight_matrix = np.diag(pd.DataFrame(exp_incr_triangle).unstack().dropna().values)
-        design_matrix = self.design_matrix_
-        hat = np.matmul(np.matmul(np.matmul(design_matrix,np.linalg.inv(np.matmul(design_matrix.T, np.matmul(weight_matrix, design_matrix)))), design_matrix.T), weight_matrix)
-        hat = np.diagonal(np.sqrt(np.divide(1, abs(1-hat), where=(1-hat)!=0)))
-        total_length = X._nan_triangle().shape[0]
-        reshaped_hat = np.reshape(hat[:total_length],(1, total_length))
-        indices = np.nansum(X._nan_triangle(), axis=0).cumsum().astype(int)
-        for num, item in enumerate(indices[:-1]):
-            col_length = int(indices[num+1]-indices[num])
-            col = np.reshape(hat[int(indices[num]):int(indices[num+1])],(1,col_length))
-            nans = np.repeat(np.expand_dims(np.array([np.nan]),0),total_length-col_length, axis=1)
-            col = np.concatenate((col, nans), axis=1)
-            reshaped_hat = np.concatenate((reshaped_hat,col),axis=0)
-        return reshaped_hat.T
+        """ The hat matrix adjustment (Shapland eq3.23) of each triangle.
+
+        The diagonal of the hat matrix, H = X(X'WX)^-1 X'W, does not depend
+        on how the origin and development parameters are expressed.  With an
+        indicator for the origin, i, and for the development period, j, of
+        each cell, X'WX only has the weight totals of each origin and
+        development on its diagonal and the cell weights between them, and
+        the diagonal of H is
+
+            h_ij = w_ij * (A_ii + 2 * A_ij + A_jj)
+
+        where A is the inverse of X'WX.  Only X'WX, with one row per
+        parameter, is ever solved.
+        """
+        o, d = X.shape[-2:]
+        w = np.nan_to_num(exp_incr_triangle)
+        origin, dev = np.arange(o), o + np.arange(d - 1)
+        xwx = np.zeros(w.shape[:2] + (o + d - 1,)*2)
+        xwx[..., origin, origin] = np.sum(w, -1)
+        xwx[..., dev, dev] = np.sum(w, -2)[..., 1:]
+        xwx[..., :o, o:] = w[..., 1:]
+        xwx[..., o:, :o] = np.swapaxes(w[..., 1:], -1, -2)
+        inv = np.linalg.solve(
+            xwx, np.broadcast_to(np.eye(o + d - 1), xwx.shape))
+        diag = np.diagonal(inv, axis1=-2, axis2=-1)
+        zeros = np.zeros(w.shape[:-1] + (1,))
+        dev_diag = np.concatenate(
+            (zeros[..., :1, :], diag[..., np.newaxis, o:]), -1)
+        quad = diag[..., :o, np.newaxis] + dev_diag + \
+            2 * np.concatenate((zeros, inv[..., :o, o:]), -1)
+        hat = w * quad
+        # Cells fit exactly have a hat of 1 up to rounding and no adjustment
+        exact = np.isclose(hat, 1)
+        hat = np.sqrt(np.divide(1, abs(1-hat), out=np.zeros(hat.shape),
+                                where=~exact))
+        return hat * X._nan_triangle()
 
     def _get_hetero_adjustment(self):
         pass
 
     def _drop(self, X):
         drop = [self.drop] if type(self.drop) is not list else self.drop
-        arr = X._nan_triangle()
+        arr = X._nan_triangle().copy()
         for item in drop:
             arr[np.where(X.origin == item[0])[0][0],
                 np.where(X.development == item[1])[0][0]] = 0
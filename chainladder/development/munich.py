@@ -4,12 +4,15 @@
 from sklearn.base import BaseEstimator, TransformerMixin
 from chainladder.utils.weighted_regression import WeightedRegression
 from chainladder.development import Development
-from chainladder.core import EstimatorIO
+from chainladder.development.base import _unique_origin
+from chainladder.core import EstimatorIO, EstimatorCache
+from chainladder.core.cache import fitted_property
 import numpy as np
 import copy
 
 
-class MunichAdjustment(BaseEstimator, TransformerMixin, EstimatorIO):
+class MunichAdjustment(EstimatorCache, BaseEstimator, TransformerMixin,
+                       EstimatorIO):
     """Applies the Munich Chainladder adjustment to a set of paid/incurred
        ldfs.
 
@@ -42,6 +45,7 @@ class MunichAdjustment(BaseEstimator, TransformerMixin, EstimatorIO):
         """
         if (type(X.ddims) != np.ndarray):
             raise ValueError('Triangle must be expressed with development lags')
+        self.clear_cache()
         obj = copy.copy(X)
         if 'ldf_' not in obj:
             obj = Development().fit_transform(obj)
@@ -100,13 +104,13 @@ class MunichAdjustment(BaseEstimator, TransformerMixin, EstimatorIO):
         p_to_i_ldf = self.p_to_i_ldf_
         p_to_i_sigma = self.p_to_i_sigma_
         paid, incurred = self.p_to_i_X_[0], self.p_to_i_X_[1]
-        p_to_i_ldf = np.unique(p_to_i_ldf, axis=-2)  # May cause issues later
-        p_to_i_sigma = np.unique(p_to_i_sigma, axis=-2)  # May cause issues
+        p_to_i_ldf = _unique_origin(p_to_i_ldf)  # May cause issues later
+        p_to_i_sigma = _unique_origin(p_to_i_sigma)  # May cause issues
         residualP = (p_to_i_ata[0]-p_to_i_ldf[0]) / \
             p_to_i_sigma[0]*np.sqrt(paid[..., :-1, :-1])
         residualI = (p_to_i_ata[1]-p_to_i_ldf[1]) / \
             p_to_i_sigma[1]*np.sqrt(incurred[..., :-1, :-1])
-        nans = (X-X[X.valuation == X.valuation_date]).values[0, 0]*0+1
+        nans = (X-X[X.valuation == X.valuation_date]).values[:, :1]*0+1
         q_resid = (paid/incurred - self.q_f_[1]) / \
             self.rho_sigma_[1]*np.sqrt(incurred)*nans
         q_inv_resid = (incurred/paid - 1/self.q_f_[1]) / \
@@ -128,33 +132,26 @@ class MunichAdjustment(BaseEstimator, TransformerMixin, EstimatorIO):
             np.reshape(self.residual_[0], (k, v, o*d)), w).slope_
         return self._p_to_i_concate(lambdaP, lambdaI)[..., np.newaxis]
 
-    @property
+    @fitted_property
     def munich_full_triangle_(self):
-        full_paid = self.p_to_i_X_[0][..., 0:1]
-        full_incurred = self.p_to_i_X_[1][..., 0:1]
-        for i in range(self.p_to_i_X_[0].shape[-1]-1):
-            paid = (self.p_to_i_ldf_[0][..., i:i+1] +
-                    self.lambda_coef_[0] *
-                    self.p_to_i_sigma_[0][..., i:i+1] /
-                    self.rho_sigma_[0][..., i:i+1] *
-                    (full_incurred[..., -1:]/full_paid[..., -1:] -
-                     self.q_f_[0][..., i:i+1]))*full_paid[..., -1:]
-            inc = (self.p_to_i_ldf_[1][..., i:i+1] + self.lambda_coef_[1] *
-                   self.p_to_i_sigma_[1][..., i:i+1] /
-                   self.rho_sigma_[1][..., i:i+1] *
-                   (full_paid[..., -1:]/full_incurred[..., -1:] -
-                   self.q_f_[1][..., i:i+1]))*full_incurred[..., -1:]
-            full_incurred = np.concatenate(
-                (full_incurred,
-                 np.nan_to_num(self.p_to_i_X_[1][..., i+1:i+2]) +
-                 (1-np.nan_to_num(self.p_to_i_X_[1][..., i+1:i+2]*0+1)) *
-                 inc), axis=3)
-            full_paid = np.concatenate(
-                (full_paid,
-                 np.nan_to_num(self.p_to_i_X_[0][..., i+1:i+2]) +
-                 (1-np.nan_to_num(self.p_to_i_X_[0][..., i+1:i+2]*0+1)) *
-                 paid), axis=3)
-        return self._p_to_i_concate(full_paid, full_incurred)
+        X = self.p_to_i_X_
+        d = X.shape[-1]
+        known = np.nan_to_num(X*0+1)
+        filled = np.nan_to_num(X)
+        coef = self.lambda_coef_ * self.p_to_i_sigma_[..., :d-1] / \
+            self.rho_sigma_[..., :d-1]
+        full = np.empty(X.shape)
+        full[..., 0] = X[..., 0]
+        # Paid and incurred are projected together, each from the ratio of
+        # the other to itself
+        for i in range(d-1):
+            latest = full[..., i:i+1]
+            projected = (self.p_to_i_ldf_[..., i:i+1] + coef[..., i:i+1] *
+                         (latest[::-1]/latest - self.q_f_[..., i:i+1])) * \
+                latest
+            full[..., i+1:i+2] = filled[..., i+1:i+2] + \
+                (1-known[..., i+1:i+2]) * projected
+        return full
 
     def _get_cdf(self, X):
         ''' needs to be an attribute that gets assigned.  requires we overwrite
@@ -175,7 +172,7 @@ class MunichAdjustment(BaseEstimator, TransformerMixin, EstimatorIO):
         obj._set_slicers()
         return obj
 
-    @property
+    @fitted_property
     def ldf_(self):
         ldf_tri = self.cdf_.values.copy()
         ldf_tri = np.concatenate((ldf_tri, np.ones(ldf_tri.shape)[..., -1:]), -1)
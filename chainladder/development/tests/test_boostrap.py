@@ -7,3 +7,94 @@ def test_bs_sample():
     a = cl.Development().fit(cl.BootstrapODPSample(n_sims=40000).fit_transform(tri).mean()).ldf_
     b = cl.Development().fit_transform(tri).ldf_
     assert np.all(abs(((a-b)/b).values)<.005)
+
+
+def test_bs_multiple_triangles():
+    clrd = cl.load_dataset('clrd').groupby('LOB').sum()
+    clrd = clrd[['CumPaidLoss', 'IncurLoss']].iloc[:2]
+    bs = cl.BootstrapODPSample(n_sims=10, random_state=42).fit(clrd)
+    assert bs.resampled_triangles_.shape == (20, 2, 10, 10)
+    assert bs.resampled_triangles_.key_labels == ['LOB', 'Simulation']
+    for i in range(2):
+        for j in range(2):
+            one = cl.BootstrapODPSample(n_sims=10).fit(clrd.iloc[i, j])
+            assert np.allclose(one.hat_[0, 0], bs.hat_[i, j], equal_nan=True)
+            assert np.allclose(one.scale_[0, 0], bs.scale_[i, j])
+
+
+def test_bs_iter_resampled():
+    tri = cl.load_dataset('raa')
+    bs = cl.BootstrapODPSample(n_sims=100, random_state=42).fit(tri)
+    blocks = list(bs.iter_resampled(block_size=30))
+    assert [len(item.index) for item in blocks] == [30, 30, 30, 10]
+    np.testing.assert_equal(
+        np.concatenate([item.values for item in blocks]),
+        bs.resampled_triangles_.values)
+    np.testing.assert_equal(
+        bs._get_simulation(np.array([7, 3, 4, 50])).values,
+        bs.resampled_triangles_.values[[7, 3, 4, 50]])
+    summary = cl.SimulationSummary(n_bins=20)
+    for block in blocks:
+        summary.update(cl.Chainladder().fit(block).ibnr_)
+    ibnr = cl.Chainladder().fit(bs.resampled_triangles_).ibnr_.values
+    assert summary.n_sims_ == 100
+    np.testing.assert_allclose(summary.mean_.values[0], np.mean(ibnr, 0))
+    np.testing.assert_allclose(
+        summary.std_.values[0], np.std(ibnr, 0, ddof=1))
+    np.testing.assert_allclose(summary.max_.values[0], np.max(ibnr, 0))
+    median = summary.quantile(.5).values[0]
+    assert np.all(abs(np.mean(ibnr <= median, 0)[1:] - .5) <= .1)
+
+
+def test_bs_reserves():
+    tri = cl.load_dataset('raa')
+    for process_dist in ['gamma', 'od poisson']:
+        bs = cl.BootstrapODPSample(
+            n_sims=2000, process_dist=process_dist, random_state=42).fit(tri)
+        reserves = bs.reserves_
+        ibnr = cl.Chainladder().fit(bs.resampled_triangles_).ibnr_
+        ibnr = ibnr.sum('origin').mean()
+        assert reserves.shape == (2000, 1, 10, 1)
+        assert abs(reserves.sum('origin').mean() / ibnr - 1) < .02
+        np.testing.assert_equal(
+            np.concatenate([item.values for item in bs.iter_reserves(300)]),
+            reserves.values)
+
+
+def test_bs_hat_closed_form():
+    tri = cl.load_dataset('genins')
+    bs = cl.BootstrapODPSample(n_sims=10).fit(tri)
+    design = bs.design_matrix_.toarray()
+    observed = ~np.isnan(tri._nan_triangle().T)
+    assert design.shape == (np.sum(observed), np.sum(tri.shape[-2:]) - 1)
+    exp = np.nan_to_num(tri.cum_to_incr().values[0, 0])
+    w = np.diag(exp.T[observed])
+    hat = np.diagonal(design.dot(np.linalg.inv(
+        design.T.dot(w).dot(design))).dot(design.T).dot(w))
+    closed = bs._get_hat(tri, tri.cum_to_incr().values)[0, 0].T[observed]
+    # Cells fit exactly, with a hat of 1, have no adjustment
+    exact = closed == 0
+    assert np.allclose(hat[exact], 1)
+    assert np.allclose(closed[~exact], np.sqrt(1 / abs(1 - hat[~exact])))
+
+
+def test_bs_hat_exact_fit():
+    tri = cl.load_dataset('genins')
+    bs = cl.BootstrapODPSample(n_sims=10).fit(tri)
+    # Corner cells are fit exactly up to rounding and have no adjustment
+    assert bs.hat_[0, 0, 0, -1] == 0
+    assert bs.hat_[0, 0, -1, 0] == 0
+    assert bs._n_resids[0, 0] == 53
+
+
+def test_bs_n_jobs():
+    tri = cl.load_dataset('raa')
+    serial = cl.BootstrapODPSample(n_sims=50, random_state=42).fit(tri)
+    parallel = cl.BootstrapODPSample(
+        n_sims=50, random_state=np.random.SeedSequence(42), n_jobs=2).fit(tri)
+    np.testing.assert_equal(serial.resampled_triangles_.values,
+                            parallel.resampled_triangles_.values)
+    np.testing.assert_equal(serial.reserves_.values, parallel.reserves_.values)
+    np.testing.assert_equal(
+        np.concatenate([item.values for item in parallel.iter_reserves(7)]),
+        serial.reserves_.values)
@@ -87,3 +87,14 @@ def test_assymetric_development():
     dev = cl.Development(n_periods=1, average='simple').fit(quarterly)
     dev2 = cl.Development(n_periods=1, average='regression').fit(quarterly)
     assert_allclose(dev.ldf_.values, dev2.ldf_.values, atol=1e-5)
+
+
+def test_chunked_fit():
+    clrd = cl.load_dataset('clrd')['CumPaidLoss']
+    dev = cl.Development(drop_high=True, n_periods=5).fit(clrd)
+    chunked = cl.Development(drop_high=True, n_periods=5, chunk_size=100,
+                             n_jobs=2).fit(clrd)
+    assert dev.ldf_ == chunked.ldf_
+    assert dev.sigma_ == chunked.sigma_
+    assert dev.std_err_ == chunked.std_err_
+    np.testing.assert_equal(dev.w_, chunked.w_)
@@ -19,3 +19,15 @@ def test_mcl_incurred():
     p = cl.MunichAdjustment(paid_to_incurred={'paid':'incurred'}).fit(cl.Development(sigma_interpolation='mack').fit_transform(cl.load_dataset('mcl'))).munich_full_triangle_[1,0,0,:,:]
     arr = np.array(df[0])
     assert_allclose(arr, p, atol=1e-5)
+
+
+def test_mcl_multiple_triangles():
+    clrd = cl.load_dataset('clrd').groupby('LOB').sum()
+    clrd = clrd[['CumPaidLoss', 'IncurLoss']]
+    paid_to_incurred = {'CumPaidLoss': 'IncurLoss'}
+    mcl = cl.MunichAdjustment(paid_to_incurred).fit(clrd)
+    for num in range(clrd.shape[0]):
+        one = cl.MunichAdjustment(paid_to_incurred).fit(clrd.iloc[num])
+        assert_allclose(mcl.munich_full_triangle_[:, num],
+                        one.munich_full_triangle_[:, 0])
+        assert_allclose(mcl.cdf_.values[num], one.cdf_.values[0])
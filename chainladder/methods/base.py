@@ -6,10 +6,12 @@ import copy
 from sklearn.base import BaseEstimator
 from chainladder.tails import TailConstant
 from chainladder.development import Development
-from chainladder.core import EstimatorIO
+from chainladder.development.base import _unique_origin
+from chainladder.core import EstimatorIO, EstimatorCache
+from chainladder.core.cache import fitted_property
 
 
-class MethodBase(BaseEstimator, EstimatorIO):
+class MethodBase(EstimatorCache, BaseEstimator, EstimatorIO):
     def __init__(self):
         pass
 
@@ -39,6 +41,7 @@ class MethodBase(BaseEstimator, EstimatorIO):
         self : object
             Returns the instance itself.
         """
+        self.clear_cache()
         self.X_ = self.validate_X(X)
         return self
 
@@ -58,15 +61,15 @@ class MethodBase(BaseEstimator, EstimatorIO):
         X_new: Triangle
 
         """
-        obj = copy.copy(self)
+        obj = copy.copy(self).clear_cache()
         obj.X_ = copy.copy(X)
         obj.sample_weight = sample_weight
-        if np.unique(self.cdf_.values, axis=-2).shape[-2] == 1:
+        if _unique_origin(self.cdf_.values).shape[-2] == 1:
             obj.cdf_.values = np.repeat(
-                np.unique(self.cdf_.values, axis=-2),
+                _unique_origin(self.cdf_.values),
                 len(X.odims), -2)
             obj.ldf_.values = np.repeat(
-                np.unique(self.ldf_.values, axis=-2),
+                _unique_origin(self.ldf_.values),
                 len(X.odims), -2)
             obj.cdf_.odims = obj.ldf_.odims = obj.X_.odims
             obj.cdf_.valuation = obj.ldf_.valuation = \
@@ -75,13 +78,14 @@ class MethodBase(BaseEstimator, EstimatorIO):
         obj.ldf_._set_slicers()
         return obj
 
-    @property
+    @fitted_property
     def full_expectation_(self):
+        return self._get_full_expectation(self.ultimate_)
+
+    def _get_full_expectation(self, ultimate):
         obj = copy.copy(self.X_)
-        obj.values = (self.ultimate_.values /
-                      np.unique(self.cdf_.values, axis=-2))
-        obj.values = np.concatenate((obj.values,
-                                    self.ultimate_.values), -1)
+        obj.values = ultimate.values / _unique_origin(self.cdf_.values)
+        obj.values = np.concatenate((obj.values, ultimate.values), -1)
         ddims = [int(item[item.find('-')+1:]) for item in self.ldf_.ddims]
         obj.ddims = np.array([obj.ddims[0]]+ddims)
         obj.valuation = obj._valuation_triangle(obj.ddims)
@@ -94,7 +98,7 @@ class MethodBase(BaseEstimator, EstimatorIO):
     def ultimate_(self):
         raise NotImplementedError
 
-    @property
+    @fitted_property
     def ibnr_(self):
         obj = copy.copy(self.ultimate_)
         obj.values = self.ultimate_.values-self.X_.latest_diagonal.values
@@ -103,6 +107,7 @@ class MethodBase(BaseEstimator, EstimatorIO):
         return obj
 
     def _get_full_triangle_(self):
+        ultimate = self.ultimate_
         obj = copy.copy(self.X_)
         w = 1-np.nan_to_num(obj._nan_triangle())
         extend = len(self.ldf_.ddims) - len(self.X_.ddims)
@@ -110,18 +115,17 @@ class MethodBase(BaseEstimator, EstimatorIO):
         w = np.concatenate((w, ones), -1)
         obj.nan_override = True
         e_tri = \
-            np.repeat(self.ultimate_.values, self.cdf_.values.shape[3], 3) / \
-            np.unique(self.cdf_.values, axis=-2)
+            np.repeat(ultimate.values, self.cdf_.values.shape[3], 3) / \
+            _unique_origin(self.cdf_.values)
         e_tri = e_tri * w
         zeros = obj._expand_dims(ones - ones)
-        properties = self.full_expectation_
+        properties = self._get_full_expectation(ultimate)
         obj.valuation = properties.valuation
         obj.valuation_date = properties.valuation_date
         obj.ddims = properties.ddims
         obj.values = \
             np.concatenate((np.nan_to_num(obj.values), zeros), -1) + e_tri
-        obj.values = np.concatenate((obj.values,
-                                     self.ultimate_.values), 3)
+        obj.values = np.concatenate((obj.values, ultimate.values), 3)
         obj.values[obj.values==0] = np.nan
         obj._set_slicers()
         return obj
@@ -3,7 +3,9 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 import numpy as np
 import copy
-from chainladder.methods import MethodBase
+from chainladder.methods.base import MethodBase
+from chainladder.development.base import _unique_origin
+from chainladder.core.cache import fitted_property
 
 
 class Chainladder(MethodBase):
@@ -76,7 +78,7 @@ class Chainladder(MethodBase):
         obj.full_triangle_ = obj._get_full_triangle_()
         return obj
 
-    @property
+    @fitted_property
     def ultimate_(self):
         development = -1
         nans = self.X_._nan_triangle()
@@ -85,9 +87,9 @@ class Chainladder(MethodBase):
                                self.cdf_.shape[development], development)
         cdf = self.cdf_.values[..., :nans.shape[development]]
         obj_tri = obj.values[..., :nans.shape[development]]
-        if np.unique(cdf, axis=2).shape[2] == 1 and \
-           len(obj.odims) != cdf.shape[2]:
-            cdf = np.repeat(np.unique(cdf, axis=2), len(obj.odims), axis=2)
+        unique_cdf = _unique_origin(cdf)
+        if unique_cdf.shape[2] == 1 and len(obj.odims) != cdf.shape[2]:
+            cdf = np.repeat(unique_cdf, len(obj.odims), axis=2)
         obj.values = (cdf*obj_tri)*nans
         obj = obj.latest_diagonal
         obj.ddims = np.array([None])
@@ -5,6 +5,7 @@ import numpy as np
 import pandas as pd
 import copy
 from chainladder.methods import Chainladder
+from chainladder.core.cache import fitted_property
 
 
 class MackChainladder(Chainladder):
@@ -59,12 +60,16 @@ class MackChainladder(Chainladder):
             Returns the instance itself.
         """
         super().fit(X, y, sample_weight)
-        self._mack_recursion('param_risk')
-        self._mack_recursion('process_risk')
-        self._mack_recursion('total_param_risk')
+        ldf = self._get_ldf()
+        self.parameter_risk_ = self._mack_recursion(
+            'param_risk', ldf, self.X_.std_err_.values)
+        self.process_risk_ = self._mack_recursion(
+            'process_risk', ldf, self.full_std_err_.values)
+        self.total_parameter_risk_ = self._mack_recursion(
+            'total_param_risk', ldf)
         return self
 
-    @property
+    @fitted_property
     def full_std_err_(self):
         obj = copy.copy(self.X_)
         tri_array = self.full_triangle_.values
@@ -83,7 +88,7 @@ class MackChainladder(Chainladder):
         obj._set_slicers()
         return obj
 
-    @property
+    @fitted_property
     def total_process_risk_(self):
         origin = 2
         obj = copy.copy(self.process_risk_)
@@ -93,71 +98,49 @@ class MackChainladder(Chainladder):
         obj._set_slicers()
         return obj
 
-    def _mack_recursion(self, est):
+    def _mack_recursion(self, est, ldf, std_err=None):
         obj = copy.copy(self.X_)
-        nans = self.X_._nan_triangle()[np.newaxis, np.newaxis]
-        nans = nans * np.ones(self.X_.shape)
-        nans = np.concatenate(
-            (nans, np.ones((*self.X_.shape[:3], 1))*np.nan), 3)
-        nans = 1-np.nan_to_num(nans)
         properties = self.full_triangle_
         obj.valuation = properties.valuation
         obj.ddims = np.append(
             properties.ddims[:len(self.X_.ddims)],
             properties.ddims[-1])
         obj.nan_override = True
-        risk_arr = np.zeros((*self.X_.shape[:3], 1))
-        if est == 'param_risk':
-            obj.values = self._get_risk(nans, risk_arr,
-                                        obj.std_err_.values)
-            obj._set_slicers()
-            self.parameter_risk_ = obj
-        elif est == 'process_risk':
-            obj.values = self._get_risk(nans, risk_arr,
-                                        self.full_std_err_.values)
-            obj._set_slicers()
-            self.process_risk_ = obj
-        else:
-            risk_arr = risk_arr[..., 0:1, :]
-            obj.values = self._get_tot_param_risk(risk_arr)
+        if est == 'total_param_risk':
+            obj.values = self._get_tot_param_risk(ldf)
             obj.odims = ['Total param risk']
-            obj._set_slicers()
-            self.total_parameter_risk_ = obj
+        else:
+            obj.values = self._get_risk(ldf, std_err)
+        obj._set_slicers()
+        return obj
 
-    def _get_risk(self, nans, risk_arr, std_err):
-        full_tri = self.full_triangle_.values[..., :len(self.X_.ddims)]
-        t1_t = (full_tri * std_err)**2
+    def _get_ldf(self):
+        """ The ldfs of each development period with the tail folded into
+        the last one """
         extend = self.X_.ldf_.shape[-1]-self.X_.shape[-1]+1
         ldf = self.X_.ldf_.values[..., :len(self.X_.ddims)-1]
-        ldf = np.concatenate(
+        return np.concatenate(
             (ldf, np.prod(self.X_.ldf_.values[..., -extend:], -1,
              keepdims=True)), -1)
-        for i in range(len(self.X_.ddims)):
-            t1 = t1_t[..., i:i+1]
-            t2 = (ldf[..., i:i+1] * risk_arr[..., i:i+1])**2
-            t_tot = np.sqrt(t1+t2)*nans[..., i+1:i+2]
-            risk_arr = np.concatenate((risk_arr, t_tot), 3)
-        return risk_arr
-
-    def _get_tot_param_risk(self, risk_arr):
+
+    def _get_risk(self, ldf, std_err):
+        full_tri = self.full_triangle_.values[..., :len(self.X_.ddims)]
+        t1 = (full_tri * std_err)**2
+        # Risk only accumulates in the unknown cells and the ultimate
+        future = np.isnan(self.X_._nan_triangle())
+        future = np.concatenate(
+            (future[:, 1:], np.ones((future.shape[0], 1), bool)), -1)
+        return _accumulate_risk(t1, ldf**2, future)
+
+    def _get_tot_param_risk(self, ldf):
         """ This assumes triangle symmertry """
         t1 = self.full_triangle_.values[..., :len(self.X_.ddims)] - \
             np.nan_to_num(self.X_.values) + \
             np.nan_to_num(self.X_._get_latest_diagonal(False).values)
         t1 = np.sum(t1*self.X_.std_err_.values, axis=2, keepdims=True)
-        extend = self.X_.ldf_.shape[-1]-self.X_.shape[-1]+1
-        ldf = self.X_.ldf_.values[..., :len(self.X_.ddims)-1]
-        ldf = np.concatenate(
-            (ldf, np.prod(self.X_.ldf_.values[..., -extend:], -1,
-             keepdims=True)), -1)
-        ldf = np.unique(ldf, axis=-2)
-        for i in range(self.full_triangle_.shape[-1]-1):
-            t_tot = np.sqrt((t1[..., i:i+1])**2 + (ldf[..., i:i+1] *
-                            risk_arr[..., -1:])**2)
-            risk_arr = np.concatenate((risk_arr, t_tot), -1)
-        return risk_arr
-
-    @property
+        return _accumulate_risk(t1**2, ldf[..., :1, :]**2, 1)
+
+    @fitted_property
     def mack_std_err_(self):
         obj = copy.copy(self.parameter_risk_)
         obj.values = np.sqrt(self.parameter_risk_.values**2 +
@@ -165,7 +148,7 @@ class MackChainladder(Chainladder):
         obj._set_slicers()
         return obj
 
-    @property
+    @fitted_property
     def total_mack_std_err_(self):
         obj = copy.copy(self.X_.latest_diagonal)
         obj.values = np.sqrt(self.total_process_risk_.values**2 +
@@ -175,7 +158,7 @@ class MackChainladder(Chainladder):
             obj.values[..., 0, 0], index=obj.kdims,
             columns=[item + ' Total Mack Std Err' for item in obj.vdims])
 
-    @property
+    @fitted_property
     def summary_(self):
         # This might be better as a dataframe
         obj = copy.copy(self.X_)
@@ -188,3 +171,22 @@ class MackChainladder(Chainladder):
         obj.nan_override = True
         obj._set_slicers()
         return obj
+
+
+def _accumulate_risk(t1, t2, future):
+    """ Solves the Mack recursion
+
+        risk[..., i+1]**2 = future[..., i] * (t1[..., i] +
+                                              t2[..., i] * risk[..., i]**2)
+
+    along the development axis from risk[..., 0] = 0 in closed form, where
+    future is 0 up to the first unknown period of each origin and 1 after.
+    Each term t1[..., i] grows by the product of the later t2 up to period
+    j, which is a ratio of cumulative products of t2.
+    """
+    risk = np.zeros(t1.shape[:-1] + (t1.shape[-1] + 1,))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.cumprod(np.broadcast_to(t2, t1.shape), -1)
+        risk[..., 1:] = np.sqrt(
+            future * growth * np.cumsum(t1 * future / growth, -1))
+    return risk
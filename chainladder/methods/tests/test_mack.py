@@ -108,3 +108,17 @@ def test_mack_mack_std_err_(data, averages, est_sigma, tail, atol):
     p = p[:, :-1] if not tail else p
     r = np.array(df[0])
     assert_allclose(r, p, atol=atol)
+
+
+def test_mack_multiple_triangles():
+    clrd = cl.load_dataset('clrd').groupby('LOB').sum()
+    clrd = clrd[['CumPaidLoss', 'IncurLoss']]
+    mack = cl.MackChainladder().fit(cl.Development().fit_transform(clrd))
+    for i in range(clrd.shape[0]):
+        for j in range(clrd.shape[1]):
+            one = cl.MackChainladder().fit(
+                cl.Development().fit_transform(clrd.iloc[i, j]))
+            for attr in ['parameter_risk_', 'process_risk_',
+                         'total_parameter_risk_']:
+                assert_allclose(getattr(mack, attr).values[i, j],
+                                getattr(one, attr).values[0, 0])
@@ -1,4 +1,5 @@
 import chainladder as cl
+from numpy.testing import assert_equal
 raa = cl.load_dataset('RAA')
 raa_1989 = raa[raa.valuation < raa.valuation_date]
 cl_ult = cl.Chainladder().fit(raa).ultimate_  # Chainladder Ultimate
@@ -19,3 +20,30 @@ def test_bf_predict():
 def test_mack_predict():
     mack = cl.MackChainladder().fit(raa_1989)
     mack.predict(raa)
+
+
+def test_fitted_property_cache():
+    mack = cl.MackChainladder().fit(raa_1989)
+    ultimate = mack.ultimate_
+    assert mack.ultimate_.values is ultimate.values
+    assert 'ultimate_' in mack.cache_info().index
+    predicted = mack.predict(raa)
+    assert predicted.ultimate_.values is not ultimate.values
+    assert mack.ultimate_.values is ultimate.values
+    mack.fit(raa)
+    assert mack.ultimate_.values is not ultimate.values
+    assert mack.ultimate_ == cl.MackChainladder().fit(raa).ultimate_
+    mack.cache_fitted = False
+    assert mack.clear_cache().ultimate_.values is not mack.ultimate_.values
+    assert len(mack.cache_info()) == 0
+
+
+def test_fitted_property_inplace():
+    model = cl.Chainladder().fit(raa)
+    ultimate, ibnr = model.ultimate_.values.copy(), model.ibnr_.values.copy()
+    u = model.ultimate_
+    u += 1000
+    i = model.ibnr_
+    i *= 0
+    assert_equal(model.ultimate_.values, ultimate)
+    assert_equal(model.ibnr_.values, ibnr)
@@ -5,10 +5,10 @@ import copy
 import numpy as np
 from sklearn.base import BaseEstimator, TransformerMixin
 from chainladder.development import DevelopmentBase, Development
-from chainladder.core import EstimatorIO
+from chainladder.core import EstimatorIO, EstimatorCache
 
 
-class TailBase(BaseEstimator, TransformerMixin, EstimatorIO):
+class TailBase(EstimatorCache, BaseEstimator, TransformerMixin, EstimatorIO):
     ''' Base class for all tail methods.  Tail objects are equivalent
         to development objects with an additional set of tail statistics'''
     def fit(self, X, y=None, sample_weight=None):
@@ -47,7 +47,9 @@ class TailBase(BaseEstimator, TransformerMixin, EstimatorIO):
         return self
 
     def transform(self, X):
-        X_new = copy.deepcopy(X)
+        X_new = X.copy(deep=False)
+        for attr in ['std_err_', 'cdf_', 'ldf_', 'sigma_']:
+            setattr(X_new, attr, getattr(X, attr).copy(deep=False))
         X_new.std_err_.values = np.concatenate(
             (X_new.std_err_.values,
              self.std_err_.values[..., -1:]), -1)
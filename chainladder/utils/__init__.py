@@ -5,4 +5,5 @@ from chainladder.utils.weighted_regression import WeightedRegression # noqa (API
 from chainladder.utils.exhibits import (
     DataFrame, Row, Column, Tabs) # noqa (API import)
 from chainladder.utils.utility_functions import ( # noqa (API import)
-    load_dataset, parallelogram_olf, read_pickle, read_json)
+    load_dataset, parallelogram_olf, read_pickle, read_json, read_npz)
+from chainladder.utils.simulation import SimulationSummary # noqa (API import)
@@ -0,0 +1,191 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import numpy as np
+
+
+class SimulationSummary:
+    ''' Running summary of simulated triangles whose last index level is the
+        simulation number, such as the blocks of
+        ``BootstrapODPSample.iter_resampled`` or the ``ibnr_`` of a method
+        fit on them.  Statistics are accumulated over the simulations of each
+        of the other index entries, one block at a time, in memory that does
+        not grow with the number of simulations.
+
+        Quantiles are estimated from a sketch of at most ``n_bins`` weighted
+        centroids per cell.  They are exact while fewer than ``n_bins``
+        simulations have been seen and accurate to about ``1/n_bins`` in
+        rank after that.
+
+    Parameters
+    ----------
+    n_bins : int (default=1000)
+        Number of centroids of the quantile sketch of each cell
+
+    Attributes
+    ----------
+    n_sims_ : int
+        Number of simulations summarized
+    mean_ : Triangle
+        Mean of the simulations
+    std_ : Triangle
+        Sample standard deviation of the simulations
+    min_ : Triangle
+        Minimum of the simulations
+    max_ : Triangle
+        Maximum of the simulations
+    '''
+    def __init__(self, n_bins=1000):
+        self.n_bins = n_bins
+        self.n_sims_ = 0
+
+    def update(self, X):
+        ''' Adds a block of simulations to the summary
+
+        Parameters
+        ----------
+        X : Triangle
+            Simulations with the simulation number as the last index level
+
+        Returns
+        -------
+            self
+        '''
+        keys = X.index.iloc[:, :-1]
+        n_keys = len(keys.drop_duplicates()) if len(keys.columns) else 1
+        values = X.values.reshape((n_keys, -1) + X.shape[1:])
+        values = np.swapaxes(values, 0, 1).reshape(values.shape[1], -1)
+        if self.n_sims_ == 0:
+            self._template = X.iloc[:n_keys].copy(deep=False)
+            if len(keys.columns) == 0:
+                self._template.kdims = np.array(['Total'])
+                self._template.key_labels = ['Total']
+            else:
+                self._template.kdims = keys.drop_duplicates().values
+                self._template.key_labels = list(keys.columns)
+            self._count = np.zeros(values.shape[1])
+            self._mean = np.zeros(values.shape[1])
+            self._m2 = np.zeros(values.shape[1])
+            self._min = np.full(values.shape[1], np.inf)
+            self._max = np.full(values.shape[1], -np.inf)
+            self._centroids = np.full((values.shape[1], 0), np.nan)
+            self._weights = np.zeros((values.shape[1], 0))
+        self._update_moments(values)
+        self._update_sketch(values)
+        self.n_sims_ = self.n_sims_ + values.shape[0]
+        return self
+
+    def _update_moments(self, values):
+        ''' Merges the count, mean and sum of squared deviations of a block
+            into the running ones (Chan et al.) '''
+        count = np.sum(~np.isnan(values), 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.nansum(values, 0) / count
+            m2 = np.nansum((values - mean)**2, 0)
+            total = self._count + count
+            delta = np.nan_to_num(mean - self._mean)
+            self._mean = np.where(
+                count > 0, self._mean + delta * count / total, self._mean)
+            self._m2 = np.where(
+                count > 0,
+                self._m2 + m2 + delta**2 * self._count * count / total,
+                self._m2)
+        self._count = total
+        self._min = np.minimum(
+            self._min, np.min(np.where(np.isnan(values), np.inf, values), 0))
+        self._max = np.maximum(
+            self._max, np.max(np.where(np.isnan(values), -np.inf, values), 0))
+
+    def _update_sketch(self, values):
+        ''' Merges a block into the centroids and compresses each cell back
+            to at most n_bins centroids.  Centroids are narrower in the tails
+            where the rank of a value changes faster with its size. '''
+        centroids = np.concatenate((self._centroids, values.T), 1)
+        weights = np.concatenate(
+            (self._weights, (~np.isnan(values.T)).astype(float)), 1)
+        order = np.argsort(centroids, 1)
+        centroids = np.take_along_axis(centroids, order, 1)
+        weights = np.take_along_axis(weights, order, 1)
+        if centroids.shape[1] > self.n_bins:
+            cum = np.cumsum(weights, 1) - weights / 2
+            total = np.maximum(np.sum(weights, 1, keepdims=True), 1)
+            bins = np.arcsin(np.clip(2 * cum / total - 1, -1, 1)) / np.pi
+            bins = np.minimum(
+                ((bins + 0.5) * self.n_bins).astype(int), self.n_bins - 1)
+            bins = bins + np.arange(len(bins))[:, np.newaxis] * self.n_bins
+            size = len(bins) * self.n_bins
+            weight = np.bincount(bins.flatten(), weights.flatten(), size)
+            total = np.bincount(
+                bins.flatten(), np.nan_to_num(centroids * weights).flatten(),
+                size)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                centroids = (total / weight).reshape(-1, self.n_bins)
+            weights = weight.reshape(-1, self.n_bins)
+        self._centroids, self._weights = centroids, weights
+
+    def _to_triangle(self, values):
+        obj = self._template.copy(deep=False)
+        obj.values = values.reshape(self._template.shape)
+        obj._set_slicers()
+        return obj
+
+    @property
+    def mean_(self):
+        return self._to_triangle(
+            np.where(self._count > 0, self._mean, np.nan))
+
+    @property
+    def std_(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._to_triangle(np.sqrt(self._m2 / (self._count - 1)))
+
+    @property
+    def min_(self):
+        return self._to_triangle(
+            np.where(self._count > 0, self._min, np.nan))
+
+    @property
+    def max_(self):
+        return self._to_triangle(
+            np.where(self._count > 0, self._max, np.nan))
+
+    def quantile(self, q):
+        ''' Estimated quantile of the simulations
+
+        Parameters
+        ----------
+        q : float
+            The quantile to estimate, between 0 and 1
+
+        Returns
+        -------
+            Triangle
+        '''
+        weights = self._weights
+        total = np.sum(weights, 1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Rank of the center of each centroid, as in the linear
+            # interpolation of order statistics
+            rank = np.nan_to_num(
+                (np.cumsum(weights, 1) - (weights + 1) / 2) / (total - 1))
+        rank = np.where(weights > 0, rank, 1)
+        centroids = np.where(
+            weights > 0, self._centroids, self._max[:, np.newaxis])
+        order = np.argsort(rank, 1, kind='stable')
+        rank = np.concatenate((np.zeros((len(rank), 1)),
+                               np.take_along_axis(rank, order, 1),
+                               np.ones((len(rank), 1))), 1)
+        centroids = np.concatenate((self._min[:, np.newaxis],
+                                    np.take_along_axis(centroids, order, 1),
+                                    self._max[:, np.newaxis]), 1)
+        upper = np.sum(rank < q, 1, keepdims=True)
+        upper = np.clip(upper, 1, rank.shape[1] - 1)
+        r_lo, c_lo = [np.take_along_axis(item, upper - 1, 1)[:, 0]
+                      for item in (rank, centroids)]
+        r_hi, c_hi = [np.take_along_axis(item, upper, 1)[:, 0]
+                      for item in (rank, centroids)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frac = np.where(r_hi > r_lo, (q - r_lo) / (r_hi - r_lo), 0)
+            values = c_lo + np.clip(frac, 0, 1) * (c_hi - c_lo)
+        values[self._count == 0] = np.nan
+        return self._to_triangle(values)
@@ -22,6 +22,32 @@ def test_triangle_json_io():
     np.testing.assert_equal(clrd.ddims, clrd2.ddims)
     assert np.all(clrd.valuation == clrd2.valuation)
 
+
+def test_triangle_npz_io(tmp_path):
+    clrd = cl.load_dataset('clrd')
+    sims = cl.BootstrapODPSample(n_sims=3).fit_transform(
+        cl.load_dataset('raa'))
+    ldf = cl.Development().fit(clrd).ldf_
+    for tri, mmap_mode in [(clrd, None), (clrd, 'r'),
+                           (clrd.to_sparse(), None), (sims, None),
+                           (clrd.latest_diagonal, None), (ldf, None),
+                           (clrd.to_sparse().latest_diagonal, None)]:
+        path = str(tmp_path / 'triangle.npz')
+        tri.to_npz(path)
+        tri2 = cl.read_npz(path, mmap_mode=mmap_mode)
+        np.testing.assert_equal(tri.values, tri2.values)
+        np.testing.assert_equal(tri.kdims, tri2.kdims)
+        np.testing.assert_equal(tri.vdims, tri2.vdims)
+        np.testing.assert_equal(tri.odims, tri2.odims)
+        np.testing.assert_equal(tri.ddims, tri2.ddims)
+        assert np.all(tri.valuation == tri2.valuation)
+        assert tri.valuation_date == tri2.valuation_date
+        assert tri2.array_backend == \
+            ('memmap' if mmap_mode else tri.array_backend)
+    sims.to_npz(path)
+    assert isinstance(cl.read_npz(path).kdims[0, 1], int)
+    assert isinstance(cl.read_npz(path, 'r'), cl.Triangle)
+
 def test_estimator_json_io():
     assert cl.read_json(cl.Development().to_json()).get_params() == \
            cl.Development().get_params()
@@ -6,7 +6,11 @@ import numpy as np
 import joblib
 import json
 import os
+import struct
+import zipfile
+from scipy import sparse
 from chainladder.core.triangle import Triangle
+from chainladder.core.io import _from_npy
 from chainladder.workflow import Pipeline
 
 
@@ -47,6 +51,85 @@ def read_pickle(path):
     return joblib.load(path)
 
 
+def read_npz(path, mmap_mode=None):
+    """ Reads a Triangle saved with ``Triangle.to_npz``.
+
+    Parameters
+    ----------
+    path : str
+        The .npz file to read
+    mmap_mode : {None, 'r+', 'r', 'w+', 'c'}, optional (default=None)
+        If not None, the ``values`` of a dense triangle are memory mapped
+        from the file with the given mode, as in ``numpy.load``, rather than
+        read into memory.  See ``Triangle.to_memmap``.
+
+    Returns
+    -------
+        Triangle
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        header = json.loads(str(archive['header'][()]))
+        dtypes = header['dtypes']
+        tri = Triangle()
+        levels = [_from_npy(archive['kdims_{}'.format(num)],
+                            dtypes['kdims_{}'.format(num)])
+                  for num in range(len(header['key_labels']))]
+        if header['kdims_ndim'] == 1:
+            tri.kdims = levels[0].astype(header['kdims_dtype'])
+        else:
+            tri.kdims = np.empty((len(levels[0]), len(levels)),
+                                 dtype=header['kdims_dtype'])
+            for num, level in enumerate(levels):
+                tri.kdims[:, num] = level
+        for name in ['vdims', 'odims', 'ddims', 'valuation']:
+            setattr(tri, name, _from_npy(archive[name], dtypes[name]))
+        for name in ['key_labels', 'origin_grain', 'development_grain',
+                     'origin_format', 'development_format', 'nan_override',
+                     'is_cumulative']:
+            setattr(tri, name, header[name])
+        tri.valuation_date = pd.Timestamp(archive['valuation_date'][()])
+        shape = tuple(header['shape'])
+        if header['array_backend'] == 'sparse':
+            tri._set_sparse(sparse.csr_matrix(
+                (archive['sparse_data'], archive['sparse_indices'],
+                 archive['sparse_indptr']),
+                shape=(shape[0], int(np.prod(shape[1:])))), shape,
+                np.nan if header.get('sparse_fill') is None
+                else header['sparse_fill'])
+        elif mmap_mode is not None:
+            tri._set_memmap(_memmap_npz_member(path, 'values.npy', mmap_mode))
+            tri._memmap_dir = os.path.dirname(os.path.abspath(path))
+        else:
+            tri.values = archive['values']
+    tri._set_slicers()
+    return tri
+
+
+def _memmap_npz_member(path, name, mode):
+    """ Memory maps an uncompressed .npy member of a .npz file in place """
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError('Compressed members cannot be memory mapped.')
+    with open(path, 'rb') as f:
+        # The member data follows its local file header, whose name and
+        # extra field lengths can differ from those of the central directory
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+        name_length, extra_length = struct.unpack('<HH', local_header[26:])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = \
+                np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = \
+                np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode=mode, shape=shape,
+                     order='F' if fortran_order else 'C', offset=offset)
+
+
 def read_json(json_str):
     json_dict = json.loads(json_str)
     if type(json_dict) is list:
@@ -69,6 +152,8 @@ def read_json(json_str):
             json_dict['valuation_date'], format='%Y-%m-%d')
         tri._set_slicers()
         tri.valuation = tri._valuation_triangle()
+        if json_dict.get('array_backend', 'numpy') == 'sparse':
+            tri = tri.to_sparse()
         return tri
     else:
         import chainladder as cl
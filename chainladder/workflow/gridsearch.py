@@ -5,7 +5,15 @@ from sklearn.model_selection import ParameterGrid
 from sklearn.base import BaseEstimator
 from sklearn.pipeline import Pipeline as PipelineSL
 from chainladder.core import EstimatorIO
+from joblib import Parallel, delayed
+from joblib.parallel import get_active_backend
+from collections import OrderedDict
 import copy
+import joblib
+import os
+import shutil
+import tempfile
+import numpy as np
 import pandas as pd
 import json
 
@@ -40,20 +48,40 @@ class GridSearch(BaseEstimator):
         FitFailedWarning is raised. This parameter does not affect the refit
         step, which will always raise the error. Default is 'raise' but from
         version 0.22 it will change to np.nan.
+    n_jobs : int or None, optional (default=None)
+        Number of candidates fit in parallel.  None means 1 and -1 means all
+        processors.  Candidates are dispatched with the active joblib backend,
+        processes by default or threads within
+        ``joblib.parallel_backend('threading')``.  For process backends the
+        triangle values are written to a memory map once and shared by all
+        workers rather than pickled for each candidate.  When the estimator
+        is a Pipeline, candidates that share their first transform are fit in
+        the same job so that they can reuse each other's transforms.
 
     Attributes
     ----------
     results_ : DataFrame
         A DataFrame with each param_grid key as a column and the ``scoring``
-        score as the last column
+        score as the last column.  When the estimator is a Pipeline, the
+        ``cache_hits`` and ``cache_misses`` columns count the transforms of
+        each candidate that were reused from an earlier candidate or fit.
+
+    Notes
+    -----
+    The transforms of a Pipeline are cached by the content of their input and
+    the parameters of the steps up to and including them.  Candidates that
+    only differ in the parameters of later steps, such as
+    ``tail__extrap_periods``, reuse the fitted ``Development`` of the first
+    such candidate instead of refitting it.
     """
     def __init__(self, estimator, param_grid, scoring, verbose=0,
-                 error_score='raise'):
+                 error_score='raise', n_jobs=None):
         self.estimator = estimator
         self.param_grid = param_grid
         self.scoring = scoring
         self.verbose = verbose
         self.error_score = error_score
+        self.n_jobs = n_jobs
 
     def fit(self, X, y=None, **fit_params):
         """Fit the model with X.
@@ -76,17 +104,137 @@ class GridSearch(BaseEstimator):
         else:
             scoring = self.scoring
         grid = list(ParameterGrid(self.param_grid))
-        results_ = []
-        for num, item in enumerate(grid):
-            est = copy.deepcopy(self.estimator).set_params(**item)
-            model = est.fit(X, y, **fit_params)
-            for score in scoring.keys():
-                item[score] = scoring[score](model)
-            results_.append(item)
-        self.results_ = pd.DataFrame(results_)
+        candidates = [
+            copy.deepcopy(self.estimator).set_params(**copy.deepcopy(item))
+            for item in grid]
+        if isinstance(self.estimator, PipelineSL):
+            data_key = joblib.hash((X, y))
+            fit_keys = {name: joblib.hash(value) for name, value in
+                        _step_fit_params(self.estimator, fit_params).items()}
+            keys = [_transform_keys(item, data_key, fit_keys)
+                    for item in candidates]
+            groups = OrderedDict()
+            for num, item in enumerate(keys):
+                groups.setdefault(item[0] if item else num, []).append(num)
+            groups = list(groups.values())
+        else:
+            keys = None
+            groups = [[num] for num in range(len(grid))]
+        if self.n_jobs is None or self.n_jobs == 1:
+            groups = [list(range(len(grid)))]
+            scores = [_fit_and_score(candidates, keys, X, y, scoring,
+                                     fit_params)]
+        else:
+            folder = None
+            if not getattr(get_active_backend()[0], 'supports_sharedmem',
+                           False):
+                folder = tempfile.mkdtemp(prefix='chainladder_')
+                X = _memmap_triangle(X, folder)
+                fit_params = {k: _memmap_triangle(v, folder)
+                              for k, v in fit_params.items()}
+            try:
+                scores = Parallel(n_jobs=self.n_jobs, verbose=self.verbose)(
+                    delayed(_fit_and_score)(
+                        [candidates[num] for num in group],
+                        None if keys is None else
+                        [keys[num] for num in group],
+                        X, y, scoring, fit_params)
+                    for group in groups)
+            finally:
+                if folder is not None:
+                    shutil.rmtree(folder, ignore_errors=True)
+        for group, group_scores in zip(groups, scores):
+            for num, score in zip(group, group_scores):
+                grid[num].update(score)
+        self.results_ = pd.DataFrame(grid)
         return self
 
 
+def _fit_and_score(candidates, keys, X, y, scoring, fit_params):
+    ''' Fits and scores each candidate in order.  keys are the content
+        addresses of the transforms of Pipeline candidates or None. '''
+    scores = []
+    if keys is None:
+        for est in candidates:
+            model = est.fit(X, y, **fit_params)
+            scores.append(
+                {score: scoring[score](model) for score in scoring.keys()})
+        return scores
+    fit_params = _step_fit_params(candidates[0], fit_params)
+    last_use = {key: num for num, item in enumerate(keys) for key in item}
+    cache = {}
+    for num, (est, est_keys) in enumerate(zip(candidates, keys)):
+        Xt, hits = X, 0
+        steps = [(idx, name, step)
+                 for idx, (name, step) in enumerate(est.steps[:-1])
+                 if not _is_passthrough(step)]
+        for (idx, name, step), key in zip(steps, est_keys):
+            if key in cache:
+                hits += 1
+            elif hasattr(step, 'fit_transform'):
+                cache[key] = (
+                    step, step.fit_transform(Xt, y, **fit_params[name]))
+            else:
+                cache[key] = (
+                    step, step.fit(Xt, y, **fit_params[name]).transform(Xt))
+            est.steps[idx] = (name, cache[key][0])
+            Xt = cache[key][1]
+        name, step = est.steps[-1]
+        if not _is_passthrough(step):
+            step.fit(Xt, y, **fit_params[name])
+        score = {score: scoring[score](est) for score in scoring.keys()}
+        score.update(cache_hits=hits, cache_misses=len(est_keys) - hits)
+        scores.append(score)
+        for key in est_keys:
+            if last_use[key] == num:
+                del cache[key]
+    return scores
+
+
+def _is_passthrough(step):
+    return step is None or (isinstance(step, str) and step == 'passthrough')
+
+
+def _step_fit_params(estimator, fit_params):
+    ''' Splits Pipeline fit_params of the form step__param by step '''
+    params = {name: {} for name, _ in estimator.steps}
+    for key, value in fit_params.items():
+        step, param = key.split('__', 1)
+        params[step][param] = value
+    return params
+
+
+def _transform_keys(estimator, data_key, fit_keys):
+    ''' Content addresses of the transforms of a Pipeline.  Each address
+        hashes a step and its fit_params with the address of its input, so
+        equal addresses imply equal fitted transforms. '''
+    keys, key = [], data_key
+    for name, step in estimator.steps[:-1]:
+        if _is_passthrough(step):
+            continue
+        key = joblib.hash(
+            (key, name, type(step), step.get_params(), fit_keys[name]))
+        keys.append(key)
+    return keys
+
+
+def _memmap_triangle(X, folder):
+    ''' Shallow copy of a dense Triangle with its values backed by a file in
+        folder.  joblib passes file backed arrays to its workers by reference.
+        The copy-on-write mode keeps writes of a worker private to it. '''
+    if getattr(X, 'array_backend', None) != 'numpy':
+        return X
+    filename = os.path.join(folder, '{}.mmap'.format(id(X)))
+    values = np.memmap(filename, dtype=X.values.dtype, mode='w+',
+                       shape=X.values.shape)
+    values[:] = X.values
+    values.flush()
+    X = copy.copy(X)
+    X.values = np.memmap(filename, dtype=values.dtype, mode='c',
+                         shape=values.shape)
+    return X
+
+
 class Pipeline(PipelineSL, EstimatorIO):
     """This is a direct of copy the scikit-learn Pipeline class.
 
@@ -25,3 +25,34 @@ def test_grid():
     grid.fit(medmal_paid, benk__sample_weight=medmal_prem)
     assert grid.results_['IBNR'][0] == \
         cl.Benktander(n_iters=250, apriori=1).fit(cl.TailCurve().fit_transform(cl.Development().fit_transform(medmal_paid)), sample_weight=medmal_prem).ibnr_.sum()
+
+
+def test_grid_n_jobs():
+    raa = cl.load_dataset('raa')
+    pipe = cl.Pipeline([('dev', cl.Development()), ('tail', cl.TailCurve()),
+                        ('model', cl.Chainladder())])
+    param_grid = dict(dev__n_periods=[3, 5, -1],
+                      tail__curve=['exponential', 'inverse_power'])
+    scoring = {'IBNR': lambda x: x.named_steps.model.ibnr_.sum()}
+    serial = cl.GridSearch(pipe, param_grid, scoring=scoring).fit(raa)
+    parallel = cl.GridSearch(pipe, param_grid, scoring=scoring,
+                             n_jobs=2).fit(raa)
+    assert serial.results_.equals(parallel.results_)
+
+
+def test_grid_cache():
+    raa = cl.load_dataset('raa')
+    pipe = cl.Pipeline([('dev', cl.Development()), ('tail', cl.TailCurve()),
+                        ('model', cl.Chainladder())])
+    param_grid = dict(dev__n_periods=[3, -1],
+                      tail__extrap_periods=[50, 100])
+    scoring = {'IBNR': lambda x: x.named_steps.model.ibnr_.sum()}
+    grid = cl.GridSearch(pipe, param_grid, scoring=scoring).fit(raa)
+    assert list(grid.results_['cache_hits']) == [0, 1, 0, 1]
+    assert list(grid.results_['cache_misses']) == [2, 1, 2, 1]
+    for num, n_periods, extrap_periods in [
+            (0, 3, 50), (1, 3, 100), (2, -1, 50), (3, -1, 100)]:
+        model = cl.Chainladder().fit(
+            cl.TailCurve(extrap_periods=extrap_periods).fit_transform(
+                cl.Development(n_periods=n_periods).fit_transform(raa)))
+        assert grid.results_['IBNR'][num] == model.ibnr_.sum()
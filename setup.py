@@ -29,7 +29,7 @@ setup(
     # long_description=open('README.md').read(),
     install_requires=[
         "pandas>=0.23.0",
-        "numpy>=1.12.0",
+        "numpy>=1.17.0",
         "scikit-learn>=0.18.0",
         "joblib"
     ],